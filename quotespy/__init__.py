@@ -1,3 +1,4 @@
 # __path__ = __import__("quotespy").extend_path(__path__, __name__)
 import quotespy.graphics
 import quotespy.tweet_graphics
+import quotespy.tools
@@ -1,19 +1,32 @@
 from os import path
 from random import choice
 from textwrap import wrap
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from PIL import Image, ImageDraw, ImageFont
 from .tools.default_settings import default_settings_lyrics, default_settings_quote
 from .tools.errors import MissingGraphicSettings
-from .tools.type_interfaces import DefaultFormats, GraphicInfo, GraphicSettings
-from .tools.utils import get_ready_text, parse_json_settings
+from .tools.layout import balanced_wrap, fit_font_size
+from .tools.type_interfaces import DefaultFormats, GraphicInfo, GraphicSettings, LineBreaking
+from .tools.utils import get_ready_text, iter_ready_text, parse_json_settings
+from ..tools.batch import canvas_bytes, render_batch
+from ..tools.dedup import RenderDeduplicator
+from ..tools.fonts import draw_runs, load_font, missing_glyphs, runs_width, split_runs
+from ..tools.output import ShardedLayout, open_sink, save_image
+from ..tools.type_interfaces import BatchJob, PreflightReport
+from ..tools.utils import STREAMED_FORMATS, in_shard, source_format, validate_shard
 from .tools.validation import (
+    validate_fallback_fonts,
     validate_format_option,
     validate_g_settings,
     validate_graphic_info,
+    validate_line_breaking,
+    validate_preview_scale,
     validate_settings_existence,
 )
 
+# Characters that end a sentence, where pages of a long text preferably end
+SENTENCE_ENDINGS = (".", "!", "?", ";", ":")
+
 
 def __load_default_settings(default_settings_format: str) -> GraphicSettings:
     """Load the default graphic settings depending on what is chosen.
@@ -75,6 +88,22 @@ def __choose_graphic_settings(
     return validated_settings
 
 
+def __font_chain(g_settings: GraphicSettings) -> List[str]:
+    """Get the main font of the graphic followed by its fallback fonts, if any.
+
+    Parameters
+    ----------
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+
+    Returns
+    -------
+    List[str]
+        Names of (or paths to) the fonts, the main one first.
+    """
+    return [g_settings["font_family"]] + g_settings.get("fallback_fonts", [])
+
+
 def __get_y_and_heights(
     text_wrapped: List[str],
     height_avail: int,
@@ -158,12 +187,410 @@ def __get_x_centered(
     return x
 
 
+def __wrap_text(
+    text: str,
+    g_settings: GraphicSettings,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value
+) -> List[str]:
+    """Break down the text into lines with a maximum of `wrap_limit` characters.
+
+    Parameters
+    ----------
+    text : str
+        Text of the graphic.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+    line_breaking : LineBreaking, optional
+        Line breaking mode: fill each line as much as possible ("greedy") or make the lines similarly wide ("balanced"), by default LineBreaking.GREEDY.value
+
+    Returns
+    -------
+    List[str]
+        Lines of text.
+    """
+    if line_breaking == LineBreaking.BALANCED.value:
+        return balanced_wrap(
+            text, g_settings["font_family"], g_settings["font_size"], g_settings["wrap_limit"])
+
+    return wrap(text, g_settings["wrap_limit"])
+
+
+def __draw_graphic(
+    graphic_info: GraphicInfo,
+    g_settings: GraphicSettings,
+    antialias: bool = True,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value
+) -> Image.Image:
+    """Draw a graphic from already validated graphic information and settings.
+
+    Parameters
+    ----------
+    graphic_info : GraphicInfo
+        Dictionary with the title and the text of the graphic.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+    antialias : bool, optional
+        Whether to draw antialiased text (disabled for previews), by default True
+    line_breaking : LineBreaking, optional
+        Line breaking mode (see `__wrap_text`), by default LineBreaking.GREEDY.value
+
+    Returns
+    -------
+    Image.Image
+        The drawn graphic.
+    """
+    # Set up variables
+    FNT = load_font(g_settings["font_family"], g_settings["font_size"])
+    WIDTH, HEIGHT = g_settings["size"]
+    # Break down the text into lines with a maximum of `wrap_limit` characters
+    text_wrapped = __wrap_text(graphic_info["text"], g_settings, line_breaking)
+
+    margin_bottom = g_settings["margin_bottom"]
+    y, line_heights = __get_y_and_heights(
+        text_wrapped, HEIGHT, margin_bottom, FNT)
+
+    # Create a new image
+    img = Image.new("RGBA", (WIDTH, HEIGHT),
+                    color=g_settings["color_scheme"][0])
+    # Create the drawing interface
+    drawing_interface = ImageDraw.Draw(img)
+    if not antialias:
+        drawing_interface.fontmode = "1"
+
+    # Draw each line of text
+    __draw_lines(drawing_interface, text_wrapped, y, line_heights,
+                 WIDTH, FNT, g_settings["color_scheme"][1], __font_chain(g_settings))
+
+    return img
+
+
+def __draw_lines(
+    drawing_interface: ImageDraw.ImageDraw,
+    text_lines: List[str],
+    y: int,
+    line_heights: List[int],
+    width_avail: int,
+    font: ImageFont.FreeTypeFont,
+    fill: str,
+    font_chain: Optional[List[str]] = None
+) -> None:
+    """Draw lines of text horizontally-centered, starting at the given vertical coordinate.
+
+    Characters the main font can't draw are drawn with the first fallback font that can (see `split_runs`).
+
+    Parameters
+    ----------
+    drawing_interface : ImageDraw.ImageDraw
+        Drawing interface of the image.
+    text_lines : List[str]
+        Lines of text to draw.
+    y : int
+        Vertical coordinate of the first line.
+    line_heights : List[int]
+        Height of each line (margin included).
+    width_avail : int
+        Width available to draw (essentially the image's width).
+    font : ImageFont.FreeTypeFont
+        Font used to draw.
+    fill : str
+        Color of the text.
+    font_chain : Optional[List[str]], optional
+        Names of the main font and its fallback fonts, by default None (main font only)
+    """
+    if font_chain is not None and len(font_chain) > 1:
+        fonts = [font] + [load_font(font_family, font.size) for font_family in font_chain[1:]]
+
+    for i, line in enumerate(text_lines):
+        runs = split_runs(line, font_chain) if font_chain is not None else [(0, line)]
+
+        if len(runs) == 1:
+            # Find the X coordinate at which to draw the line, horizontally-centered
+            x = __get_x_centered(line, width_avail, font)
+
+            # Draw the line
+            drawing_interface.text((x, y), line, font=font, fill=fill)
+        else:
+            # Draw each run with its own font
+            x = (width_avail - runs_width(runs, fonts)) // 2
+            draw_runs(drawing_interface, (x, y), runs, fonts, fill)
+
+        # Update the Y coordinate for the next line
+        y += line_heights[i]
+
+
+def __paginate(
+    text_lines: List[str],
+    line_heights: List[int],
+    height_avail: int,
+    margin: float
+) -> List[Tuple[int, int]]:
+    """Split the lines of text into pages that fit the graphic's height, preferring to end a page at the end of a sentence.
+
+    Parameters
+    ----------
+    text_lines : List[str]
+        Lines of text.
+    line_heights : List[int]
+        Height of each line (margin included, except for the last line).
+    height_avail : int
+        Height available to draw in (essentially the image's height).
+    margin : float
+        Vertical margin between text lines.
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        Start (inclusive) and end (exclusive) indices of the lines of each page.
+    """
+    n_lines = len(text_lines)
+    pages = []
+    start = 0
+    while start < n_lines:
+        # Fit as many lines as possible (at least one) in the page
+        end = start + 1
+        height_page = line_heights[start]
+        while end < n_lines and height_page + line_heights[end] - \
+                (margin if end + 1 < n_lines else 0) <= height_avail:
+            height_page += line_heights[end]
+            end += 1
+
+        # Unless this is the last page, go back to the last sentence ending\
+        # in the second half of the page
+        if end < n_lines:
+            for sentence_end in range(end, start + (end - start + 1) // 2, -1):
+                if text_lines[sentence_end - 1].rstrip("\"')").endswith(SENTENCE_ENDINGS):
+                    end = sentence_end
+                    break
+
+        pages.append((start, end))
+        start = end
+
+    return pages
+
+
+def __save_pages(
+    graphic_info: GraphicInfo,
+    g_settings: GraphicSettings,
+    save_dir: str,
+    antialias: bool = True,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value,
+    save_suffix: str = "",
+    save_options: Optional[Dict] = None
+) -> int:
+    """Draw a long text across as many graphics as needed, saved as "{title}_1.png", "{title}_2.png" and so on.
+
+    The text is wrapped and measured once, then sliced into pages (see `__paginate`), which are drawn one after the other on the same canvas.
+
+    Parameters
+    ----------
+    graphic_info : GraphicInfo
+        Dictionary with the title and the text of the graphic.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+    save_dir : str
+        Destination path of the created graphics.
+    antialias : bool, optional
+        Whether to draw antialiased text, by default True
+    line_breaking : LineBreaking, optional
+        Line breaking mode (see `__wrap_text`), by default LineBreaking.GREEDY.value
+    save_suffix : str, optional
+        Appended to the name of each graphic (before the extension), by default ""
+    save_options : Optional[Dict], optional
+        Keyword arguments for `Image.save`, by default None
+
+    Returns
+    -------
+    int
+        Number of graphics (pages) created.
+    """
+    FNT = load_font(g_settings["font_family"], g_settings["font_size"])
+    WIDTH, HEIGHT = g_settings["size"]
+    background, fill = g_settings["color_scheme"]
+    margin_bottom = g_settings["margin_bottom"]
+
+    text_wrapped = __wrap_text(graphic_info["text"], g_settings, line_breaking)
+    _, line_heights = __get_y_and_heights(
+        text_wrapped, HEIGHT, margin_bottom, FNT)
+    pages = __paginate(text_wrapped, line_heights, HEIGHT, margin_bottom)
+
+    img = Image.new("RGBA", (WIDTH, HEIGHT), color=background)
+    drawing_interface = ImageDraw.Draw(img)
+    if not antialias:
+        drawing_interface.fontmode = "1"
+
+    for page, (start, end) in enumerate(pages, start=1):
+        # Clear the previous page
+        if page > 1:
+            drawing_interface.rectangle((0, 0, WIDTH, HEIGHT), fill=background)
+
+        page_heights = line_heights[start:end]
+        height_page = sum(page_heights) - (margin_bottom if end < len(text_wrapped) else 0)
+        y = (HEIGHT - height_page) // 2
+        __draw_lines(drawing_interface, text_wrapped[start:end], y, page_heights,
+                     WIDTH, FNT, fill, __font_chain(g_settings))
+
+        save_name = f"{graphic_info['title']}_{page}{save_suffix}.png"
+        save_image(img, path.join(save_dir, save_name), save_options)
+
+    return len(pages)
+
+
+def __scale_settings(g_settings: GraphicSettings, scale: float) -> GraphicSettings:
+    """Scale the dimensions of validated graphic settings (graphic size, font size and margin), e.g. to draw a preview.
+
+    Parameters
+    ----------
+    g_settings : GraphicSettings
+        Validated graphic settings.
+    scale : float
+        Fraction of the original dimensions.
+
+    Returns
+    -------
+    GraphicSettings
+        Scaled graphic settings.
+    """
+    scaled_settings = dict(g_settings)
+    scaled_settings["font_size"] = max(1, round(g_settings["font_size"] * scale))
+    scaled_settings["size"] = [
+        max(1, round(dimension * scale)) for dimension in g_settings["size"]]
+    scaled_settings["margin_bottom"] = g_settings["margin_bottom"] * scale
+
+    return scaled_settings
+
+
+def __fit_settings(
+    graphic_info: GraphicInfo,
+    g_settings: GraphicSettings
+) -> GraphicSettings:
+    """Choose the font size and `wrap_limit` for which the text best fills the graphic, using the settings' `font_size` as the largest size allowed.
+
+    Parameters
+    ----------
+    graphic_info : GraphicInfo
+        Dictionary with the title and the text of the graphic.
+    g_settings : GraphicSettings
+        Validated graphic settings.
+
+    Returns
+    -------
+    GraphicSettings
+        Graphic settings with the fitted font size and `wrap_limit`.
+    """
+    font_size, wrap_limit = fit_font_size(
+        graphic_info["text"],
+        g_settings["font_family"],
+        g_settings["font_size"],
+        g_settings["size"],
+        g_settings["margin_bottom"]
+    )
+
+    fitted_settings = dict(g_settings)
+    fitted_settings["font_size"] = font_size
+    fitted_settings["wrap_limit"] = wrap_limit
+
+    return fitted_settings
+
+
+def __graphic_overflows(
+    graphic_info: GraphicInfo,
+    g_settings: GraphicSettings,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value
+) -> bool:
+    """Check if the text of a graphic overflows its canvas, by measuring the text without drawing it.
+
+    Parameters
+    ----------
+    graphic_info : GraphicInfo
+        Dictionary with the title and the text of the graphic.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+    line_breaking : LineBreaking, optional
+        Line breaking mode (see `__wrap_text`), by default LineBreaking.GREEDY.value
+
+    Returns
+    -------
+    bool
+        True if the text doesn't fit in the graphic.
+    """
+    text_wrapped = __wrap_text(graphic_info["text"], g_settings, line_breaking)
+
+    return __lines_overflow(text_wrapped, g_settings)
+
+
+def __lines_overflow(text_wrapped: List[str], g_settings: GraphicSettings) -> bool:
+    """Check if already wrapped lines of text overflow the graphic's canvas.
+
+    Parameters
+    ----------
+    text_wrapped : List[str]
+        Lines of text.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+
+    Returns
+    -------
+    bool
+        True if the lines don't fit in the graphic.
+    """
+    FNT = load_font(g_settings["font_family"], g_settings["font_size"])
+    WIDTH, HEIGHT = g_settings["size"]
+
+    # The text is taller than the graphic
+    y, _ = __get_y_and_heights(
+        text_wrapped, HEIGHT, g_settings["margin_bottom"], FNT)
+    if y < 0:
+        return True
+
+    # Or one of the lines is wider than the graphic
+    return any(__get_x_centered(line, WIDTH, FNT) < 0 for line in text_wrapped)
+
+
+def __preflight_graphic(
+    graphic_info: GraphicInfo,
+    g_settings: GraphicSettings,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value,
+    max_lines: Optional[int] = None
+) -> PreflightReport:
+    """Lay out the text of a graphic, without drawing it, and report on its lines, overflow and missing glyphs.
+
+    Parameters
+    ----------
+    graphic_info : GraphicInfo
+        Dictionary with the title and the text of the graphic.
+    g_settings : GraphicSettings
+        Validated dictionary with the settings for the graphic.
+    line_breaking : LineBreaking, optional
+        Line breaking mode (see `__wrap_text`), by default LineBreaking.GREEDY.value
+    max_lines : Optional[int], optional
+        Maximum number of lines of text allowed, by default None (no maximum)
+
+    Returns
+    -------
+    PreflightReport
+        Report on the layout of the graphic.
+    """
+    text_wrapped = __wrap_text(graphic_info["text"], g_settings, line_breaking)
+
+    return {
+        "lines": len(text_wrapped),
+        "overflow": __lines_overflow(text_wrapped, g_settings),
+        "too_many_lines": max_lines is not None and len(text_wrapped) > max_lines,
+        "missing_glyphs": missing_glyphs(graphic_info["text"], __font_chain(g_settings)),
+    }
+
+
 def create_graphic(
     graphic_info: GraphicInfo,
     graphic_settings: GraphicSettings,
     default_settings_format: Optional[DefaultFormats] = DefaultFormats.CUSTOM.value,
     save_dir: Optional[str] = "",
-) -> None:
+    preview: Optional[float] = None,
+    auto_fit: bool = False,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value,
+    paginate: bool = False,
+    fallback_fonts: Optional[List[str]] = None,
+) -> Optional[bool]:
     """Create a single graphic given the title, the text and the graphic settings.
     create_img(graphic_info, graphic_settings)
 
@@ -181,49 +608,133 @@ def create_graphic(
         Default graphic settings format to use, by default DefaultFormats.CUSTOM.value
     save_dir : Optional[str], optional
         Destination path of the created graphic, by default ""
+    preview : Optional[float], optional
+        If given, draw a quick preview at this fraction of the graphic's size (with aliased text and fast compression), saved as "{title}_preview.png", by default None
+    auto_fit : bool, optional
+        Whether to choose the font size (up to `font_size`) and `wrap_limit` for which the text best fills the graphic, by default False
+    line_breaking : LineBreaking, optional
+        Either fill each line as much as possible ("greedy", like `textwrap.wrap`) or break the text into lines of similar widths, never wider than the greedy ones ("balanced"), by default LineBreaking.GREEDY.value
+    paginate : bool, optional
+        Whether to split a text too long for one graphic across as many graphics as needed (at line boundaries, preferably at the end of a sentence), saved as "{title}_1.png", "{title}_2.png" and so on, by default False
+    fallback_fonts : Optional[List[str]], optional
+        Fonts (in order of preference) used to draw the characters the main font lacks, by default None
+
+    Returns
+    -------
+    Optional[bool]
+        For previews, whether the text would overflow the full-size graphic(s). None otherwise.
     """
     # Validate the graphic info
     validate_graphic_info(graphic_info)
+    line_breaking = validate_line_breaking(line_breaking)
 
     # Use the graphic settings passed (either custom or default)
     g_settings = __choose_graphic_settings(
         graphic_settings, default_settings_format)
+    if fallback_fonts:
+        g_settings = dict(
+            g_settings, fallback_fonts=validate_fallback_fonts(fallback_fonts))
+    if auto_fit:
+        g_settings = __fit_settings(graphic_info, g_settings)
 
-    # Set up variables
-    FNT = ImageFont.truetype(
-        g_settings["font_family"], g_settings["font_size"], encoding="utf-8"
-    )
-    WIDTH, HEIGHT = g_settings["size"]
-    # Break down the text into lines with a maximum of `wrap_limit` characters
-    text_wrapped = wrap(graphic_info["text"], g_settings["wrap_limit"])
+    if paginate:
+        if preview is None:
+            __save_pages(graphic_info, g_settings, save_dir, True, line_breaking)
+            return
 
-    margin_bottom = g_settings["margin_bottom"]
-    y, line_heights = __get_y_and_heights(
-        text_wrapped, HEIGHT, margin_bottom, FNT)
+        # Pages only overflow if a line is too wide for the graphic
+        scale = validate_preview_scale(preview)
+        FNT = load_font(g_settings["font_family"], g_settings["font_size"])
+        text_wrapped = __wrap_text(graphic_info["text"], g_settings, line_breaking)
+        overflow = any(
+            __get_x_centered(line, g_settings["size"][0], FNT) < 0 for line in text_wrapped)
 
-    # Create a new image
-    img = Image.new("RGBA", (WIDTH, HEIGHT),
-                    color=g_settings["color_scheme"][0])
-    # Create the drawing interface
-    drawing_interface = ImageDraw.Draw(img)
+        __save_pages(graphic_info, __scale_settings(g_settings, scale), save_dir,
+                     False, line_breaking, "_preview", {"compress_level": 1})
 
-    # Draw each line of text
-    for i, line in enumerate(text_wrapped):
-        # Find the X coordinate at which to draw the line, horizontally-centered
-        x = __get_x_centered(line, WIDTH, FNT)
+        return overflow
 
-        # Draw the line
-        drawing_interface.text(
-            (x, y), line, font=FNT, fill=g_settings["color_scheme"][1]
-        )
+    if preview is not None:
+        scale = validate_preview_scale(preview)
+        overflow = __graphic_overflows(graphic_info, g_settings, line_breaking)
 
-        # Update the Y coordinate for the next line
-        y += line_heights[i]
+        img = __draw_graphic(
+            graphic_info, __scale_settings(g_settings, scale), False, line_breaking)
+        save_name = f"{graphic_info['title']}_preview.png"
+        save_name = path.join(save_dir, save_name)
+        save_image(img, save_name, {"compress_level": 1})
+
+        return overflow
+
+    img = __draw_graphic(graphic_info, g_settings, True, line_breaking)
 
     # Save the image
     save_name = f"{graphic_info['title']}.png"
     save_name = path.join(save_dir, save_name)
-    img.save(save_name)
+    save_image(img, save_name)
+
+
+def __graphic_jobs(
+    titles_quotes: Iterable[Tuple[str, str]],
+    g_settings: GraphicSettings,
+    preview_scale: Optional[float] = None,
+    overflows: Optional[Dict[str, bool]] = None,
+    auto_fit: bool = False,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value
+) -> Iterator[BatchJob]:
+    """Validate each loaded quote and turn it into a job for `render_batch`.
+
+    Parameters
+    ----------
+    titles_quotes : Iterable[Tuple[str, str]]
+        The loaded titles and the respective quote/lyrics.
+    g_settings : GraphicSettings
+        Validated graphic settings shared by all quotes.
+    preview_scale : Optional[float], optional
+        If given, the jobs draw previews at this fraction of the graphic's size, by default None
+    overflows : Optional[Dict[str, bool]], optional
+        For previews, filled with whether each full-size graphic would overflow, by default None
+    auto_fit : bool, optional
+        Whether to fit the font size of each quote to the graphic, by default False
+    line_breaking : LineBreaking, optional
+        Validated line breaking mode, by default LineBreaking.GREEDY.value
+
+    Returns
+    -------
+    Iterator[BatchJob]
+        One job per quote.
+    """
+    quote_settings = g_settings
+    draw_settings = g_settings
+    if preview_scale is not None:
+        draw_settings = __scale_settings(g_settings, preview_scale)
+
+    for title, text in titles_quotes:
+        quote_dict = {"title": title, "text": text}
+        validate_graphic_info(quote_dict)
+
+        if auto_fit:
+            quote_settings = __fit_settings(quote_dict, g_settings)
+            draw_settings = quote_settings
+            if preview_scale is not None:
+                draw_settings = __scale_settings(quote_settings, preview_scale)
+
+        if preview_scale is None:
+            name = quote_dict["title"]
+            args = (quote_dict, draw_settings, True, line_breaking)
+        else:
+            name = f"{quote_dict['title']}_preview"
+            args = (quote_dict, draw_settings, False, line_breaking)
+            overflows[quote_dict["title"]] = __graphic_overflows(
+                quote_dict, quote_settings, line_breaking)
+
+        yield {
+            "name": name,
+            "content": ["graphic", quote_dict["text"], draw_settings, preview_scale, line_breaking],
+            "args": args,
+            "cost": canvas_bytes(draw_settings["size"]),
+            "group": None
+        }
 
 
 def gen_graphics_from_file(
@@ -231,27 +742,126 @@ def gen_graphics_from_file(
     graphic_settings: GraphicSettings,
     default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
     save_dir: Optional[str] = "",
-) -> None:
-    """Load quotes from the specified .txt or .json file and create a graphic for each one.
+    dedup: Optional[RenderDeduplicator] = None,
+    layout: Optional[ShardedLayout] = None,
+    archive_path: Optional[str] = None,
+    workers: int = 1,
+    memory_budget: Optional[int] = None,
+    preview: Optional[float] = None,
+    auto_fit: bool = False,
+    line_breaking: LineBreaking = LineBreaking.GREEDY.value,
+    dry_run: bool = False,
+    max_lines: Optional[int] = None,
+    fallback_fonts: Optional[List[str]] = None,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Optional[Dict[str, Union[bool, PreflightReport]]]:
+    """Load quotes from the specified .txt, .json, .jsonl, .csv or .tsv file (or SQLite database) and create a graphic for each one.
+
+    JSON Lines files (one `{"title": ..., "text": ...}` object per line), CSV/TSV files and SQLite databases (one quote per row) are read lazily, so graphics are created while the file is read.
 
     If `default_settings_format` is passed, `graphic_settings` must be an empty dictionary.
 
+    The graphic settings are validated once for the whole file.
+
     Parameters
     ----------
     file_path : str
-        Path to the .txt or .json file with lyrics/quotes.
+        Path to the .txt, .json, .jsonl, .csv or .tsv file (or to the .db, .sqlite or .sqlite3 SQLite database) with lyrics/quotes.
     graphic_settings : GraphicSettings
         Custom settings for the graphics. 
     default_settings_format : DefaultFormats, optional
         Default graphic settings format to use, by default DefaultFormats.CUSTOM.value
     save_dir : Optional[str], optional
         Destination path of the created graphic, by default ""
+    dedup : Optional[RenderDeduplicator], optional
+        Used to copy or hard-link graphics identical to ones already created instead of drawing them again, by default None
+    layout : Optional[ShardedLayout], optional
+        Layout used to shard the graphics into subdirectories of `save_dir`, by default None (all graphics directly in `save_dir`)
+    archive_path : Optional[str], optional
+        Path to a .zip or .tar archive in which to save the graphics instead of `save_dir`, by default None
+    workers : int, optional
+        Number of processes drawing graphics in parallel, by default 1
+    memory_budget : Optional[int], optional
+        Maximum memory (in bytes) for the canvases being drawn at the same time by the workers, by default None
+    preview : Optional[float], optional
+        If given, draw quick previews at this fraction of the graphics' size (see `create_graphic`), by default None
+    auto_fit : bool, optional
+        Whether to choose, for each quote, the font size (up to `font_size`) and `wrap_limit` for which its text best fills the graphic, by default False
+    line_breaking : LineBreaking, optional
+        Line breaking mode (see `create_graphic`), by default LineBreaking.GREEDY.value
+    dry_run : bool, optional
+        Whether to only validate and lay out each quote, without drawing or saving any graphic, by default False
+    max_lines : Optional[int], optional
+        For dry runs, maximum number of lines of text a graphic may have, by default None (no maximum)
+    fallback_fonts : Optional[List[str]], optional
+        Fonts (in order of preference) used to draw the characters the main font lacks, by default None
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of "title" and "text" to the columns they are read from, by default None (the "title" and "text" columns)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the quotes, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the quotes with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch (the titles of the earlier quotes are still counted, so they are numbered as in a full batch), by default None
+    shard : Optional[Tuple[int, int]], optional
+        Index (from 0) and number of shards: if given, only the quotes assigned to this shard (by a stable hash of their title) are processed, so several machines can split the same file without coordination, by default None (all quotes)
+
+    Returns
+    -------
+    Optional[Dict[str, Union[bool, PreflightReport]]]
+        For dry runs, a mapping of each title to the report on its layout (number of lines, overflow, too many lines and missing glyphs). For previews, a mapping of each title to whether its text would overflow the full-size graphic. None otherwise.
     """
-    # Get the quotes from the source file (TXT or JSON) (make sure duplicate\
-    # titles have their respective frequency in the name)
-    titles_quotes_updated = get_ready_text(file_path)
+    # Get the quotes from the source file (TXT, JSON, JSON Lines, CSV or TSV)\
+    # (make sure duplicate titles have their respective frequency in the name)
+    if source_format(file_path) in STREAMED_FORMATS:
+        # Read lazily, as the quotes are drawn
+        titles_quotes_updated = iter_ready_text(file_path, columns, query, after_rowid)
+    else:
+        titles_quotes_updated = get_ready_text(file_path).items()
+
+    # Keep only the quotes of this shard
+    if shard is not None:
+        shard = validate_shard(shard)
+        titles_quotes_updated = (
+            (title, text) for title, text in titles_quotes_updated if in_shard(title, shard))
+
+    # Use the graphic settings passed (either custom or default), validated\
+    # only once for all quotes
+    g_settings = __choose_graphic_settings(
+        graphic_settings, default_settings_format)
+    if fallback_fonts:
+        g_settings = dict(
+            g_settings, fallback_fonts=validate_fallback_fonts(fallback_fonts))
+    line_breaking = validate_line_breaking(line_breaking)
+
+    # Lay out each quote without creating any graphic
+    if dry_run:
+        reports = {}
+        for title, text in titles_quotes_updated:
+            quote_dict = {"title": title, "text": text}
+            validate_graphic_info(quote_dict)
+            quote_settings = __fit_settings(quote_dict, g_settings) if auto_fit else g_settings
+            reports[title] = __preflight_graphic(
+                quote_dict, quote_settings, line_breaking, max_lines)
+
+        return reports
+
+    if preview is None:
+        preview_scale = None
+        overflows = None
+        save_options = None
+    else:
+        preview_scale = validate_preview_scale(preview)
+        overflows = {}
+        # Fastest PNG compression for previews
+        save_options = {"compress_level": 1}
 
     # Create a graphic for each quote
-    for quote in titles_quotes_updated:
-        quote_dict = {"title": quote, "text": titles_quotes_updated[quote]}
-        create_graphic(quote_dict, graphic_settings, save_dir=save_dir)
+    jobs = __graphic_jobs(
+        titles_quotes_updated, g_settings, preview_scale, overflows, auto_fit,
+        line_breaking)
+    sink = open_sink(save_dir, layout, archive_path, save_options)
+    render_batch(jobs, __draw_graphic, sink, dedup, workers, memory_budget)
+
+    return overflows
@@ -1 +1 @@
-from . import errors, type_interfaces, utils, validation
+from . import errors, index, layout, type_interfaces, utils, validation
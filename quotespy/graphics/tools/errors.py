@@ -146,3 +146,48 @@ class MissingTitlesOrQuotes(Exception):
             The error message.
         """
         self.msg = msg
+
+
+class InvalidPreviewScale(Exception):
+    """Error raised when the scale of a preview graphic is not a number between 0 (exclusive) and 1.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidPreviewScale with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidLineBreaking(Exception):
+    """Error raised when the line breaking mode chosen does not exist.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidLineBreaking with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidIndexSource(Exception):
+    """Error raised when a source file that can't be indexed (not an uncompressed .txt file) is given to the index builder.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidIndexSource with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
@@ -0,0 +1,215 @@
+import json
+import mmap
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+from .errors import InvalidIndexSource, MissingTitles
+from .utils import __iter_title_counts
+
+# Extension of the sidecar index files, appended to the source file's name
+INDEX_EXTENSION = ".idx"
+# UTF-8 byte order mark some editors write at the start of text files
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def __scan_titles(file_path: str) -> List[Tuple[str, int]]:
+    """Find the title of each quote of a .txt file (a line with the title wrapped by square brackets) and the byte offset at which its line starts, scanning the memory-mapped file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt file with lyrics/quotes.
+
+    Returns
+    -------
+    List[Tuple[str, int]]
+        Title and byte offset of each quote, in the order of the file.
+    """
+    entries = []
+    with open(file_path, "rb") as source_file:
+        # Empty files can't be memory-mapped (and have no titles)
+        if os.fstat(source_file.fileno()).st_size == 0:
+            return entries
+
+        with mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            position = len(UTF8_BOM) if contents[:len(UTF8_BOM)] == UTF8_BOM else 0
+            while position != -1:
+                line_end = contents.find(b"\n", position)
+                line = contents[position:line_end if line_end != -1 else len(contents)]
+                line = line.rstrip(b"\r")
+
+                if line.startswith(b"[") and line.endswith(b"]"):
+                    entries.append((line[1:-1].decode("utf-8"), position))
+
+                position = line_end + 1 if line_end != -1 else -1
+
+    return entries
+
+
+def build_txt_index(file_path: str) -> List[Tuple[str, int]]:
+    """Build the index of a .txt file of quotes: the title of each quote (updated with its frequency, as in `get_ready_text`) and the byte offset at which it starts, saved to a sidecar file (the file's path followed by `INDEX_EXTENSION`).
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the (uncompressed) .txt file with lyrics/quotes.
+
+    Returns
+    -------
+    List[Tuple[str, int]]
+        Updated title and byte offset of each quote.
+
+    Raises
+    ------
+    InvalidIndexSource
+        Raised when the file is not an uncompressed .txt file.
+    MissingTitles
+        Raised when no title is found in the file.
+    """
+    if os.path.splitext(file_path)[1] != ".txt":
+        raise InvalidIndexSource(
+            f"Only uncompressed .txt files can be indexed, please decompress {file_path} first.")
+
+    source_stats = os.stat(file_path)
+    titles_offsets = __scan_titles(file_path)
+    if titles_offsets == list():
+        raise MissingTitles("Make sure your titles are wrapped in brackets.")
+
+    updated_titles = __iter_title_counts(titles_offsets)
+    entries = [(title, offset) for title, offset in updated_titles]
+
+    index = {
+        "size": source_stats.st_size,
+        "mtime_ns": source_stats.st_mtime_ns,
+        "entries": entries,
+    }
+    # Write to a temporary file first, so that an interrupted write never\
+    # leaves a truncated index behind
+    index_path = f"{file_path}{INDEX_EXTENSION}"
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as index_file:
+        json.dump(index, index_file, ensure_ascii=False)
+    os.replace(temp_path, index_path)
+
+    return entries
+
+
+def load_txt_index(file_path: str) -> List[Tuple[str, int]]:
+    """Load the index of a .txt file of quotes (see `build_txt_index`), building it again if it is missing or the file changed since.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt file with lyrics/quotes.
+
+    Returns
+    -------
+    List[Tuple[str, int]]
+        Updated title and byte offset of each quote.
+    """
+    index_path = f"{file_path}{INDEX_EXTENSION}"
+    source_stats = os.stat(file_path)
+    try:
+        with open(index_path, "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return build_txt_index(file_path)
+
+    if (index.get("size"), index.get("mtime_ns")) != (source_stats.st_size, source_stats.st_mtime_ns):
+        return build_txt_index(file_path)
+
+    return [(title, offset) for title, offset in index["entries"]]
+
+
+def __read_entries(
+    file_path: str,
+    entries: List[Tuple[str, int]],
+    end: Optional[int]
+) -> Iterator[Tuple[str, str]]:
+    """Read the quotes of consecutive index entries, seeking straight to the first one.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt file with lyrics/quotes.
+    entries : List[Tuple[str, int]]
+        Consecutive index entries (updated title and byte offset).
+    end : Optional[int]
+        Byte offset at which the last entry ends, None for the end of the file.
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        Updated title and text of each quote.
+    """
+    if entries == list():
+        return
+
+    with open(file_path, "rb") as source_file:
+        source_file.seek(entries[0][1])
+        size = -1 if end is None else end - entries[0][1]
+        contents = source_file.read(size).decode("utf-8")
+
+    # Same quote pattern as `__load_quotes_txt`
+    pattern_quotes = r"^([^\[].*?[^\]])$"
+    quotes = re.findall(pattern_quotes, contents.replace("\r\n", "\n"), flags=re.MULTILINE)
+    for (title, _), quote in zip(entries, quotes):
+        yield (title, quote)
+
+
+def iter_indexed_text(
+    file_path: str,
+    start: int = 0,
+    stop: Optional[int] = None
+) -> Iterator[Tuple[str, str]]:
+    """Load a slice of the quotes of a .txt file (e.g. the share of a worker), reading only that part of the file thanks to its index.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt file with lyrics/quotes.
+    start : int, optional
+        Position of the first quote of the slice, by default 0
+    stop : Optional[int], optional
+        Position after the last quote of the slice, by default None (up to the last quote)
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        Updated title and text of each quote of the slice.
+    """
+    index = load_txt_index(file_path)
+    entries = index[start:stop]
+    stop = len(index) if stop is None else min(stop, len(index))
+    end = index[stop][1] if stop < len(index) else None
+
+    return __read_entries(file_path, entries, end)
+
+
+def get_indexed_text(file_path: str, titles: List[str]) -> Dict[str, str]:
+    """Look up quotes of a .txt file by their (updated) titles, e.g. to create some of its graphics again, reading only those quotes thanks to the file's index.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt file with lyrics/quotes.
+    titles : List[str]
+        Titles of the quotes, as given by `get_ready_text` (e.g. "chorus 2"). Unknown titles are ignored.
+
+    Returns
+    -------
+    Dict[str, str]
+        A mapping of the titles found to the respective quote/lyrics.
+    """
+    index = load_txt_index(file_path)
+    positions = {title: position for position, (title, _) in enumerate(index)}
+
+    titles_quotes = {}
+    for title in titles:
+        if title not in positions:
+            continue
+        position = positions[title]
+        end = index[position + 1][1] if position + 1 < len(index) else None
+        titles_quotes.update(__read_entries(file_path, index[position:position + 1], end))
+
+    return titles_quotes
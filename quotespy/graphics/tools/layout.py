@@ -0,0 +1,199 @@
+from textwrap import wrap
+from typing import List, Tuple
+from ...tools.fonts import FontMetrics, get_font_metrics
+
+# Fraction of the graphic's width and height the text may take when its
+# font size is chosen automatically
+AUTO_FIT_FILL = 0.9
+
+
+def __widest_wrap(
+    text: str,
+    metrics: FontMetrics,
+    font_size: int,
+    width_avail: float
+) -> Tuple[int, List[str]]:
+    """Find the largest `wrap_limit` for which every line of text fits the available width.
+
+    Parameters
+    ----------
+    text : str
+        Text to be wrapped.
+    metrics : FontMetrics
+        Glyph metrics of the font.
+    font_size : int
+        Size of the font.
+    width_avail : float
+        Width available for each line.
+
+    Returns
+    -------
+    Tuple[int, List[str]]
+        The maximum number of characters per line and the wrapped lines.
+    """
+    # First guess based on the average glyph width
+    average_width = metrics.text_width(text, font_size) / max(len(text), 1)
+    wrap_limit = max(1, min(len(text), int(width_avail / max(average_width, 1e-6))))
+
+    while True:
+        text_wrapped = wrap(text, wrap_limit)
+        width_text = max(metrics.text_widths(text_wrapped, font_size), default=0)
+        if width_text <= width_avail or wrap_limit == 1:
+            return (wrap_limit, text_wrapped)
+
+        # Shrink the limit proportionally to how much the widest line overflows
+        wrap_limit = max(1, min(wrap_limit - 1, int(wrap_limit * width_avail / width_text)))
+
+
+def fit_font_size(
+    text: str,
+    font_family: str,
+    max_font_size: int,
+    size: List[int],
+    margin_bottom: float
+) -> Tuple[int, int]:
+    """Binary search the largest font size (up to `max_font_size`), and the respective `wrap_limit`, for which the text fits the graphic.
+
+    The text is measured with cached glyph metrics (see `FontMetrics`) instead of being rasterized at each font size tried.
+
+    Parameters
+    ----------
+    text : str
+        Text of the graphic.
+    font_family : str
+        Name of (or path to) the font.
+    max_font_size : int
+        Largest font size allowed.
+    size : List[int]
+        Width and height of the graphic.
+    margin_bottom : float
+        Vertical margin between lines of text.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The font size and the maximum number of characters per line.
+    """
+    metrics = get_font_metrics(font_family)
+    width_avail = size[0] * AUTO_FIT_FILL
+    height_avail = size[1] * AUTO_FIT_FILL
+
+    # Smallest font size, used even if the text doesn't fit
+    best_fit = (1, __widest_wrap(text, metrics, 1, width_avail)[0])
+
+    low, high = 2, max_font_size
+    while low <= high:
+        font_size = (low + high) // 2
+        wrap_limit, text_wrapped = __widest_wrap(
+            text, metrics, font_size, width_avail)
+        height_text = len(text_wrapped) * metrics.line_height(font_size) + \
+            (len(text_wrapped) - 1) * margin_bottom
+
+        if height_text <= height_avail:
+            best_fit = (font_size, wrap_limit)
+            low = font_size + 1
+        else:
+            high = font_size - 1
+
+    return best_fit
+
+
+def balanced_wrap(
+    text: str,
+    font_family: str,
+    font_size: int,
+    wrap_limit: int
+) -> List[str]:
+    """Break the text into lines of similar widths (minimum raggedness, in the style of Knuth-Plass), instead of filling each line as much as possible like `textwrap.wrap`.
+
+    The widest line of the greedy wrap (at `wrap_limit` characters) sets the maximum width of a line, so the balanced lines are never wider than the greedy ones. The sum of the squared leftover widths of all lines is then minimized by dynamic programming over the word boundaries, using word widths measured once, in a single batch (see `FontMetrics.text_widths`). Only words wider than that maximum width are broken (like `textwrap.wrap` breaks them), so the text itself is never changed. Each word is only tried as the start of the lines that fit the maximum width, so the work grows with the number of words times the number of words per line.
+
+    Parameters
+    ----------
+    text : str
+        Text to be wrapped.
+    font_family : str
+        Name of (or path to) the font.
+    font_size : int
+        Size of the font.
+    wrap_limit : int
+        Maximum number of characters per line of the greedy wrap.
+
+    Returns
+    -------
+    List[str]
+        The balanced lines of text.
+    """
+    greedy_lines = wrap(text, wrap_limit)
+    if len(greedy_lines) < 2:
+        return greedy_lines
+
+    metrics = get_font_metrics(font_family)
+    space_width = metrics.text_width(" ", font_size)
+
+    # Width of the widest greedy line, measured like the balanced lines (the\
+    # width of its words plus the spaces between them)
+    line_words = [line.split() for line in greedy_lines]
+    greedy_widths = metrics.text_widths(
+        [word for line in line_words for word in line], font_size)
+    max_width = 0.0
+    first_word = 0
+    for line in line_words:
+        last_word = first_word + len(line)
+        max_width = max(max_width, sum(greedy_widths[first_word:last_word]) +
+                        (len(line) - 1) * space_width)
+        first_word = last_word
+
+    # Words of the original text; a word wider than the maximum width is\
+    # broken into the chunks of `textwrap.wrap`, joined without spaces
+    words = text.split()
+    word_widths = metrics.text_widths(words, font_size)
+    # Each token and whether it is preceded by a space (i.e. it starts a word)
+    tokens: List[Tuple[str, bool]] = []
+    for word, word_width in zip(words, word_widths):
+        if word_width > max_width + 1e-6:
+            chunks = wrap(word, wrap_limit)
+            tokens += [(chunk, i == 0) for i, chunk in enumerate(chunks)]
+        else:
+            tokens.append((word, True))
+
+    # `prefix_widths[i]` is the width of the first `i` tokens (spaces\
+    # excluded) and `prefix_spaces[i]` the number of them that start a word
+    prefix_widths = [0.0]
+    prefix_spaces = [0]
+    token_widths = metrics.text_widths([token for token, _ in tokens], font_size)
+    for (_, spaced), token_width in zip(tokens, token_widths):
+        prefix_widths.append(prefix_widths[-1] + token_width)
+        prefix_spaces.append(prefix_spaces[-1] + spaced)
+
+    # `costs[i]` is the minimum raggedness of the lines for tokens[i:] and\
+    # `breaks[i]` the index of the token that starts the line after the one\
+    # starting at tokens[i]
+    n_tokens = len(tokens)
+    costs = [0.0] * (n_tokens + 1)
+    breaks = [n_tokens] * (n_tokens + 1)
+    for i in range(n_tokens - 1, -1, -1):
+        costs[i] = float("inf")
+        for j in range(i + 1, n_tokens + 1):
+            # Spaces before the tokens after the first one of the line
+            n_spaces = prefix_spaces[j] - prefix_spaces[i + 1]
+            line_width = prefix_widths[j] - prefix_widths[i] + n_spaces * space_width
+            # A token wider than the maximum width still gets its own line
+            if line_width > max_width + 1e-6 and j > i + 1:
+                break
+
+            cost = (max_width - line_width) ** 2 + costs[j]
+            if cost < costs[i]:
+                costs[i] = cost
+                breaks[i] = j
+
+    lines = []
+    i = 0
+    while i < n_tokens:
+        line = tokens[i][0]
+        for token, spaced in tokens[i + 1:breaks[i]]:
+            line += f" {token}" if spaced else token
+        lines.append(line)
+        i = breaks[i]
+
+    return lines
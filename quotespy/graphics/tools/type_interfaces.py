@@ -30,3 +30,11 @@ class DefaultFormats(Enum):
     CUSTOM = ""
     LYRICS = "lyrics"
     QUOTE = "quote"
+
+
+class LineBreaking(Enum):
+    """Contains the line breaking modes used to wrap the text of a graphic.
+    """
+
+    GREEDY = "greedy"
+    BALANCED = "balanced"
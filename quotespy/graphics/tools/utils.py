@@ -2,10 +2,21 @@ import json
 import re
 from random import choice
 from textwrap import wrap
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from PIL import Image, ImageDraw, ImageFont
 from .type_interfaces import GraphicInfo, GraphicSettings
-from .validation import __validate_text_loaded
+from .errors import MissingGraphicInfoField
+from .validation import __validate_text_loaded, validate_graphic_info
+from ...tools.utils import (
+    DELIMITERS,
+    SQLITE_FORMATS,
+    STREAMED_FORMATS,
+    iter_csv_rows,
+    iter_json_lines,
+    iter_sqlite_rows,
+    open_source,
+    source_format,
+)
 
 
 def __load_quotes_txt(file_path: str) -> List[Tuple[str]]:
@@ -24,7 +35,7 @@ def __load_quotes_txt(file_path: str) -> List[Tuple[str]]:
         List of tuples that contain the title and text of each quote loaded.
     """
     # Load the source file contents as a single string
-    with open(file_path, "r", encoding="utf-8") as source_file:
+    with open_source(file_path) as source_file:
         contents = "".join(source_file.readlines())
 
     # Get all the titles
@@ -56,11 +67,122 @@ def __load_text_json(file_path: str) -> Dict[str, str]:
     Dict[str, str]
         Dictionary that maps titles to the respective quote/lyrics.
     """
-    with open(file_path, "r", encoding="utf-8") as json_file:
+    with open_source(file_path) as json_file:
         json_quotes = json.load(json_file)
     return json_quotes
 
 
+def __load_text_jsonl(file_path: str) -> Iterator[Tuple[str, str]]:
+    """Lazily load quotes from a JSON Lines file, with a `{"title": ..., "text": ...}` object per line.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .jsonl file with lyrics/quotes.
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        Title and text of each quote loaded.
+
+    Raises
+    ------
+    MissingGraphicInfoField
+        Raised when a line is not a JSON object.
+    """
+    for quote in iter_json_lines(file_path):
+        if not isinstance(quote, dict):
+            error_msg = 'Each line of a .jsonl file must be a JSON object with a "title" and a "text" field.'
+            raise MissingGraphicInfoField(error_msg)
+        validate_graphic_info(quote)
+        yield (quote["title"], quote["text"])
+
+
+def __load_text_csv(
+    file_path: str,
+    columns: Optional[Dict[str, str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """Lazily load quotes from a CSV (or TSV) file with a header, one quote per row.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .csv or .tsv file with lyrics/quotes.
+    columns : Optional[Dict[str, str]], optional
+        Mapping of "title" and "text" to the columns they are read from, by default None (the "title" and "text" columns)
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        Title and text of each quote loaded.
+    """
+    fields = list(GraphicInfo.__annotations__.keys())
+    for quote in iter_csv_rows(file_path, fields, columns):
+        yield (quote["title"], quote["text"])
+
+
+def __load_text_sqlite(
+    db_path: str,
+    query: str,
+    columns: Optional[Dict[str, str]] = None,
+    after_rowid: Optional[int] = None
+) -> Iterator[Tuple[str, str]]:
+    """Lazily load quotes from a SQLite database, one quote per row returned by `query`.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the SQLite database with lyrics/quotes.
+    query : str
+        SELECT statement returning the title and text of each quote.
+    columns : Optional[Dict[str, str]], optional
+        Mapping of "title" and "text" to the columns they are read from, by default None (the "title" and "text" columns)
+    after_rowid : Optional[int], optional
+        If given, only the quotes with a larger "rowid" column are loaded, by default None
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        Title and text of each quote loaded.
+    """
+    fields = list(GraphicInfo.__annotations__.keys())
+    for quote in iter_sqlite_rows(db_path, query, fields, columns, after_rowid):
+        yield (quote["title"], quote["text"])
+
+
+def __sqlite_title_counts(
+    db_path: str,
+    query: str,
+    columns: Optional[Dict[str, str]],
+    until_rowid: int
+) -> Dict[str, int]:
+    """Count the titles of the quotes of a SQLite database up to a row id (included), so that a resumed batch numbers repeated titles as a full batch does.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the SQLite database with lyrics/quotes.
+    query : str
+        SELECT statement returning the title, text and "rowid" of each quote.
+    columns : Optional[Dict[str, str]]
+        Mapping of "title" and "text" to the columns they are read from (None for the "title" and "text" columns).
+    until_rowid : int
+        Row id of the last quote counted.
+
+    Returns
+    -------
+    Dict[str, int]
+        Frequency of each title.
+    """
+    fields = list(GraphicInfo.__annotations__.keys()) + ["rowid"]
+    title_freqs = {}
+    for quote in iter_sqlite_rows(db_path, query, fields, columns):
+        if quote["rowid"] <= until_rowid:
+            title_freqs[quote["title"]] = title_freqs.get(quote["title"], 0) + 1
+
+    return title_freqs
+
+
 def parse_json_settings(file_path: str) -> GraphicSettings:
     """Load a the `graphic_settings` from a JSON file.
 
@@ -79,23 +201,26 @@ def parse_json_settings(file_path: str) -> GraphicSettings:
     return json_settings
 
 
-def __update_title_counts(quotes: List[Tuple[str]]) -> Dict[str, str]:
-    """Given a list of lists of titles and quotes loaded from a .txt file, update the titles with the respective frequencies.
+def __iter_title_counts(
+    quotes: Iterable[Tuple[str]],
+    title_freqs: Optional[Dict[str, int]] = None
+) -> Iterator[Tuple[str, str]]:
+    """Given titles and quotes, lazily update the titles with the respective frequencies.
 
     Parameters
     ----------
-    quotes : List[Tuple[str]]
-        List of tuples that contain the title and quote of each graphic.
+    quotes : Iterable[Tuple[str]]
+        Tuples that contain the title and quote of each graphic.
+    title_freqs : Optional[Dict[str, int]], optional
+        Frequencies of the titles seen before these quotes (e.g. by an interrupted batch), by default None
 
     Returns
     -------
-    Dict[str, str]
-        Dictionary that maps titles to the corresponding lyrics/quote.
+    Iterator[Tuple[str, str]]
+        Updated title and the corresponding lyrics/quote.
     """
     # Freqs of each unique quote
-    title_freqs = {}
-    # Dictionary with the updated titles mapped to the corresponding quotes
-    updated_quotes = {}
+    title_freqs = {} if title_freqs is None else dict(title_freqs)
 
     # Loop through the loaded quotes to update titles with their frequencies
     for quote in quotes:
@@ -108,27 +233,51 @@ def __update_title_counts(quotes: List[Tuple[str]]) -> Dict[str, str]:
             title_freqs[title] += 1
 
             # Update the title with its current frequency
-            updated_title = f"{title} {str(title_freqs[title])}"
-
-            # Add the updated quote information to the dictionary
-            updated_quotes[updated_title] = text
+            yield (f"{title} {str(title_freqs[title])}", text)
 
         # If this is the first time seeing the quote, simply use it as is
         else:
             title_freqs[title] = 1
-            updated_quotes[title] = text
+            yield (title, text)
+
+
+def __update_title_counts(quotes: List[Tuple[str]]) -> Dict[str, str]:
+    """Given a list of lists of titles and quotes loaded from a .txt file, update the titles with the respective frequencies.
+
+    Parameters
+    ----------
+    quotes : List[Tuple[str]]
+        List of tuples that contain the title and quote of each graphic.
+
+    Returns
+    -------
+    Dict[str, str]
+        Dictionary that maps titles to the corresponding lyrics/quote.
+    """
+    return dict(__iter_title_counts(quotes))
 
-    return updated_quotes
 
+def get_ready_text(
+    file_path: str,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None
+) -> Dict[str, str]:
+    """Load quotes/lyrics from a source file, .txt, .json, .jsonl, .csv or .tsv, or from a SQLite database (.db, .sqlite or .sqlite3), and update the corresponding
+    quotes/lyrics' titles with their frequency (in the case of all options but .json).
 
-def get_ready_text(file_path: str) -> Dict[str, str]:
-    """Load quotes/lyrics from a source file, .txt or .json, and update the corresponding
-    quotes/lyrics' titles with their frequency (in the case of the former option).
+    Source files compressed with gzip, bzip2 or xz (e.g. "lyrics.txt.gz") are decompressed on the fly.
 
     Parameters
     ----------
     file_path : str
-        Path to the .txt or .json file.
+        Path to the .txt, .json, .jsonl, .csv or .tsv file (or to the SQLite database).
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of "title" and "text" to the columns they are read from, by default None (the "title" and "text" columns)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the quotes, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the quotes with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch (the titles of the earlier quotes are still counted, so they are numbered as in a full batch), by default None
 
     Returns
     -------
@@ -136,7 +285,7 @@ def get_ready_text(file_path: str) -> Dict[str, str]:
         A mapping of the loaded titles to the respective quote/lyrics.
     """
     # Get the file extension and load the quotes accordingly (from a TXT or JSON)
-    file_ext = file_path.split(".")[-1]
+    file_ext = source_format(file_path)
 
     # TXT need to be loaded and have their titles updated (so there's no duplicate
     # titles)
@@ -150,4 +299,49 @@ def get_ready_text(file_path: str) -> Dict[str, str]:
     elif file_ext == "json":
         titles_quotes_ready = __load_text_json(file_path)
 
+    elif file_ext in STREAMED_FORMATS:
+        titles_quotes_ready = dict(iter_ready_text(file_path, columns, query, after_rowid))
+
     return titles_quotes_ready
+
+
+def iter_ready_text(
+    file_path: str,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None
+) -> Iterator[Tuple[str, str]]:
+    """Load quotes/lyrics from a source file (see `get_ready_text`) as title and quote/lyrics pairs.
+
+    JSON Lines (.jsonl), CSV and TSV files and SQLite databases are read lazily, one quote per line (or row), so quotes can be used while the file is still being read (or appended to).
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .txt, .json, .jsonl, .csv or .tsv file (or to the SQLite database).
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of "title" and "text" to the columns they are read from, by default None (the "title" and "text" columns)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the quotes, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the quotes with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch (the titles of the earlier quotes are still counted, so they are numbered as in a full batch), by default None
+
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+        The loaded titles (updated with their frequency) and the respective quote/lyrics.
+    """
+    file_ext = source_format(file_path)
+    if file_ext == "jsonl":
+        return __iter_title_counts(__load_text_jsonl(file_path))
+    if file_ext in DELIMITERS:
+        return __iter_title_counts(__load_text_csv(file_path, columns))
+    if file_ext in SQLITE_FORMATS:
+        quotes = __load_text_sqlite(file_path, query, columns, after_rowid)
+        # The titles of the quotes already rendered keep being counted
+        title_freqs = None
+        if after_rowid is not None:
+            title_freqs = __sqlite_title_counts(file_path, query, columns, after_rowid)
+        return __iter_title_counts(quotes, title_freqs)
+
+    return iter(get_ready_text(file_path).items())
@@ -6,6 +6,8 @@ from .errors import (
     InvalidColorFormat,
     InvalidFieldLength,
     InvalidFormatOption,
+    InvalidLineBreaking,
+    InvalidPreviewScale,
     MissingDictKeys,
     MissingGraphicInfoField,
     MissingGraphicSettings,
@@ -13,7 +15,7 @@ from .errors import (
     MissingTitles,
     MissingTitlesOrQuotes,
 )
-from .type_interfaces import DefaultFormats, GraphicInfo, GraphicSettings
+from .type_interfaces import DefaultFormats, GraphicInfo, GraphicSettings, LineBreaking
 
 
 def __validate_dict_keys(
@@ -510,3 +512,90 @@ def validate_graphic_info(g_info: GraphicInfo) -> None:
     __validate_graphic_info_field(g_info, "title", title_error_msg)
     text_error_msg = 'The graphic info dictionary must have a "text" field with the quote/lyrics you want to be drawn, as a string.'
     __validate_graphic_info_field(g_info, "text", text_error_msg)
+
+
+def validate_preview_scale(scale: float) -> float:
+    """Validate the fraction of the graphic's size at which to draw a preview.
+
+    Parameters
+    ----------
+    scale : float
+        Fraction of the graphic's size.
+
+    Returns
+    -------
+    float
+        Validated scale.
+
+    Raises
+    ------
+    InvalidPreviewScale
+        Raised when the scale is not a number between 0 (exclusive) and 1.
+    """
+    error_msg = "Please provide a number between 0 (exclusive) and 1 for the preview scale (e.g. 0.25 for a quarter of the graphic's size)."
+    try:
+        scale = float(scale)
+    except (TypeError, ValueError):
+        raise InvalidPreviewScale(error_msg)
+
+    if (scale <= 0) or (scale > 1):
+        raise InvalidPreviewScale(error_msg)
+
+    return scale
+
+
+def validate_line_breaking(line_breaking: str) -> str:
+    """Validate that the user chose an existing line breaking mode.
+
+    Parameters
+    ----------
+    line_breaking : str
+        Line breaking mode chosen.
+
+    Returns
+    -------
+    str
+        Validated line breaking mode.
+
+    Raises
+    ------
+    InvalidLineBreaking
+        Raised when the line breaking mode does not exist.
+    """
+    valid_options = [option.value for option in LineBreaking]
+    if isinstance(line_breaking, str) and line_breaking.lower() in valid_options:
+        return line_breaking.lower()
+    else:
+        error_msg = f"You chose an invalid line breaking mode.\n\tPlease choose one of this: {valid_options}"
+        raise InvalidLineBreaking(error_msg)
+
+
+def validate_fallback_fonts(fallback_fonts: List[str]) -> List[str]:
+    """Validate the fonts used for characters the main font can't draw.
+
+    Parameters
+    ----------
+    fallback_fonts : List[str]
+        Names of (or paths to) the fallback fonts, in order of preference.
+
+    Returns
+    -------
+    List[str]
+        Validated font names (including the file extension).
+
+    Raises
+    ------
+    FontNotFound
+        Raised when a font is not found on the user's machine (or the fonts are not given as a list).
+    """
+    if not isinstance(fallback_fonts, (list, tuple)):
+        raise FontNotFound("Please provide the fallback fonts as a list of font names (or paths).")
+
+    validated_fonts = []
+    for font_family in fallback_fonts:
+        error_msg = f"The fallback font {font_family} was not in found in your machine.\n\tPlease note you can provide an absolute path to your font if needed."
+        if not isinstance(font_family, str):
+            raise FontNotFound(error_msg)
+        validated_fonts.append(__validate_font_family(font_family, error_msg))
+
+    return validated_fonts
@@ -0,0 +1 @@
+from . import batch, dedup, errors, fonts, output, type_interfaces, utils
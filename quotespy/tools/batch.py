@@ -0,0 +1,222 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+from .dedup import RenderDeduplicator
+from .type_interfaces import BatchJob
+
+
+def canvas_bytes(size: List[int], mode: str = "RGBA") -> int:
+    """Calculate the memory needed for the canvas of a graphic.
+
+    Parameters
+    ----------
+    size : List[int]
+        Validated width and height of the graphic.
+    mode : str, optional
+        PIL mode of the canvas, by default "RGBA"
+
+    Returns
+    -------
+    int
+        Size of the canvas' pixel data in bytes.
+    """
+    return size[0] * size[1] * Image.getmodebands(mode)
+
+
+# Maximum number of jobs of the same group drawn by a worker in one go
+MAX_GROUP_JOBS = 32
+
+
+def __render_encoded(
+    draw: Callable[..., Image.Image],
+    group_args: List[Tuple],
+    save_options: Dict
+) -> List[bytes]:
+    """Draw a group of graphics and encode them as PNG (runs in the worker processes).
+
+    Parameters
+    ----------
+    draw : Callable[..., Image.Image]
+        Function that draws a graphic.
+    group_args : List[Tuple]
+        Arguments for `draw`, for each graphic of the group.
+    save_options : Dict
+        Options for the PNG encoder.
+
+    Returns
+    -------
+    List[bytes]
+        The encoded graphics, in the same order.
+    """
+    encoded = []
+    for args in group_args:
+        img = draw(*args)
+        buffer = BytesIO()
+        img.save(buffer, format="PNG", **save_options)
+        encoded.append(buffer.getvalue())
+    return encoded
+
+
+def __render_parallel(
+    jobs: Iterable[BatchJob],
+    draw: Callable[..., Image.Image],
+    sink: Any,
+    dedup: Optional[RenderDeduplicator],
+    workers: int,
+    memory_budget: Optional[int],
+) -> None:
+    """Draw the graphics of a batch in a pool of worker processes, while the graphics are saved by the calling process.
+
+    Consecutive jobs of the same group are sent together (up to `MAX_GROUP_JOBS` at a time) to the same worker, so that they share its caches (e.g. of profile pictures). Each worker is a process pool of its own, so that every chunk of a group can be routed to it; other jobs go to the worker with the fewest jobs in flight. A chunk only takes the memory of its largest canvas, since its graphics are drawn one after the other.
+
+    New groups are only submitted while the canvases in flight fit in `memory_budget` (and there are at most two groups per worker), otherwise the producer waits for a group to finish.
+    """
+    # Groups in flight, mapped to the names and fingerprints of their\
+    # graphics, their memory cost and the worker drawing them
+    in_flight: Dict[Future, Tuple[List[Tuple[str, Optional[str]]], int, int]] = {}
+    # Number of groups in flight in each worker
+    worker_loads = [0] * workers
+    # Last group submitted and the worker it was sent to
+    last_group = None
+    last_worker = 0
+    in_flight_bytes = 0
+    # Duplicates of graphics still in flight, waiting for the original
+    waiting_duplicates: Dict[str, List[str]] = {}
+    max_in_flight = workers * 2
+    # Jobs of the group being gathered
+    pending: List[BatchJob] = []
+    pending_fingerprints: List[Optional[str]] = []
+
+    def collect(done: Iterable[Future]) -> None:
+        nonlocal in_flight_bytes
+        for future in done:
+            outputs, cost, worker = in_flight.pop(future)
+            in_flight_bytes -= cost
+            worker_loads[worker] -= 1
+            for (name, fingerprint), encoded in zip(outputs, future.result()):
+                output = sink.write_encoded(encoded, name)
+
+                if dedup is not None:
+                    dedup.record(fingerprint, output)
+                    for duplicate_name in waiting_duplicates.pop(fingerprint, []):
+                        dedup.reuse(fingerprint, duplicate_name, sink)
+
+    def submit() -> None:
+        nonlocal in_flight_bytes, last_group, last_worker
+        if pending == list():
+            return
+
+        # Backpressure: wait until the group fits in the budget (a group\
+        # larger than the whole budget runs on its own)
+        cost = max(job["cost"] for job in pending)
+        while in_flight != dict() and (
+            len(in_flight) >= max_in_flight or
+            (memory_budget is not None and in_flight_bytes + cost > memory_budget)
+        ):
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+        # The rest of a group goes to the worker that drew its first chunk
+        group = pending[0].get("group")
+        if group is None or group != last_group:
+            last_worker = worker_loads.index(min(worker_loads))
+        last_group = group
+
+        future = executors[last_worker].submit(
+            __render_encoded, draw, [job["args"] for job in pending], sink.save_options)
+        in_flight[future] = (
+            [(job["name"], fingerprint) for job, fingerprint in zip(pending, pending_fingerprints)],
+            cost,
+            last_worker
+        )
+        in_flight_bytes += cost
+        worker_loads[last_worker] += 1
+        pending.clear()
+        pending_fingerprints.clear()
+
+    executors = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+    try:
+        for job in jobs:
+            fingerprint = None
+            if dedup is not None:
+                fingerprint = dedup.fingerprint(*job["content"])
+                if fingerprint in waiting_duplicates:
+                    waiting_duplicates[fingerprint].append(job["name"])
+                    continue
+                if dedup.reuse(fingerprint, job["name"], sink):
+                    continue
+
+            # Jobs without a group are drawn on their own
+            group = job.get("group")
+            if pending != list() and (
+                group is None or
+                group != pending[0].get("group") or
+                len(pending) >= MAX_GROUP_JOBS
+            ):
+                submit()
+
+            pending.append(job)
+            pending_fingerprints.append(fingerprint)
+            if dedup is not None:
+                waiting_duplicates[fingerprint] = []
+        submit()
+
+        while in_flight != dict():
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+    finally:
+        for future in in_flight:
+            future.cancel()
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+
+def render_batch(
+    jobs: Iterable[BatchJob],
+    draw: Callable[..., Image.Image],
+    sink: Any,
+    dedup: Optional[RenderDeduplicator] = None,
+    workers: int = 1,
+    memory_budget: Optional[int] = None,
+) -> None:
+    """Draw and save every graphic of a batch.
+
+    With more than one worker, `draw` must be a module-level function, since the graphics are drawn in separate processes (which, on Windows, requires the calling script to be guarded by `if __name__ == "__main__"`).
+
+    Parameters
+    ----------
+    jobs : Iterable[BatchJob]
+        Graphics to be created. It is consumed lazily, as the workers become available.
+    draw : Callable[..., Image.Image]
+        Function that draws a graphic given the `args` of its job.
+    sink : Any
+        Where to save the graphics (e.g. a `DirectorySink`). It is closed at the end of the batch.
+    dedup : Optional[RenderDeduplicator], optional
+        Used to reuse graphics identical to ones already created, by default None
+    workers : int, optional
+        Number of worker processes drawing graphics, by default 1 (draw in the calling process)
+    memory_budget : Optional[int], optional
+        Maximum memory (in bytes) for the canvases being drawn at the same time, by default None (no limit besides two jobs per worker)
+    """
+    try:
+        if workers > 1:
+            __render_parallel(jobs, draw, sink, dedup, workers, memory_budget)
+            return
+
+        for job in jobs:
+            # Reuse an identical graphic if it has already been created
+            if dedup is not None:
+                fingerprint = dedup.fingerprint(*job["content"])
+                if dedup.reuse(fingerprint, job["name"], sink):
+                    continue
+
+            img = draw(*job["args"])
+            output = sink.write(img, job["name"])
+
+            if dedup is not None:
+                dedup.record(fingerprint, output)
+    finally:
+        sink.close()
+        if dedup is not None:
+            dedup.save()
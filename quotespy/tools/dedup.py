@@ -0,0 +1,128 @@
+import json
+from hashlib import sha256
+from os import path
+from typing import Any, Dict, Optional
+
+
+class RenderDeduplicator:
+    """Keep track of the graphics already created, so that identical graphics are copied or hard-linked instead of being drawn again.
+
+    The same instance can be passed to several batches (e.g. to multiple `gen_graphics_from_file` calls) and, if `index_path` is given, the fingerprints are persisted between processes.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, hard_link: bool = True):
+        """Initializes RenderDeduplicator, loading the fingerprints from `index_path` if it exists.
+
+        Parameters
+        ----------
+        index_path : Optional[str], optional
+            Path to a .json file in which to persist the fingerprints, by default None
+        hard_link : bool, optional
+            Whether to hard-link duplicates (falling back to a copy when not possible) or always copy them, by default True
+        """
+        self.index_path = index_path
+        self.hard_link = hard_link
+        # Number of graphics actually drawn and number of graphics reused
+        self.renders = 0
+        self.renders_avoided = 0
+        # Fingerprint of each graphic mapped to the file where it was saved
+        self._outputs: Dict[str, str] = {}
+
+        if index_path is not None and path.isfile(index_path):
+            with open(index_path, "r", encoding="utf-8") as index_file:
+                self._outputs = json.load(index_file)
+        # File of each graphic mapped to the fingerprint of its contents, to\
+        # forget fingerprints whose file is overwritten with another graphic
+        self._fingerprints: Dict[str, str] = {
+            output: fingerprint for fingerprint, output in self._outputs.items()}
+
+    def __forget(self, output: str, fingerprint: str) -> None:
+        """Forget the graphic previously saved at `output`, if it had another fingerprint, since its file now has the graphic of `fingerprint`.
+
+        Parameters
+        ----------
+        output : str
+            Where the new graphic was saved.
+        fingerprint : str
+            Fingerprint of the new graphic.
+        """
+        old_fingerprint = self._fingerprints.get(output)
+        if old_fingerprint is not None and old_fingerprint != fingerprint:
+            del self._fingerprints[output]
+            if self._outputs.get(old_fingerprint) == output:
+                del self._outputs[old_fingerprint]
+
+    def fingerprint(self, *content: Any) -> str:
+        """Calculate the fingerprint of a graphic from everything that affects how it is drawn (e.g. its text and validated settings).
+
+        Parameters
+        ----------
+        *content : Any
+            JSON-serializable values that determine the graphic.
+
+        Returns
+        -------
+        str
+            Hexadecimal fingerprint.
+        """
+        payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+        return sha256(payload.encode("utf-8")).hexdigest()
+
+    def reuse(self, fingerprint: str, title: str, sink: Any) -> bool:
+        """Save an already created graphic with the same fingerprint under `title`, if there is one.
+
+        Parameters
+        ----------
+        fingerprint : str
+            Fingerprint of the graphic to be created.
+        title : str
+            Title of the graphic to be created.
+        sink : Any
+            Sink in which the graphics are being saved (e.g. a `DirectorySink`).
+
+        Returns
+        -------
+        bool
+            True if the graphic was reused, False if it still needs to be drawn.
+        """
+        source = self._outputs.get(fingerprint)
+        # The graphic was never created
+        if source is None:
+            return False
+
+        # The sink can't reuse the graphic (e.g. its file no longer exists)
+        output = sink.duplicate(source, title, self.hard_link)
+        if output is None:
+            return False
+        self.__forget(output, fingerprint)
+
+        self.renders_avoided += 1
+        return True
+
+    def record(self, fingerprint: str, output: str) -> None:
+        """Register a newly created graphic.
+
+        Parameters
+        ----------
+        fingerprint : str
+            Fingerprint of the graphic.
+        output : str
+            Where the graphic was saved, as returned by the sink's `write` method.
+        """
+        self.__forget(output, fingerprint)
+        # The graphic may have been saved elsewhere before
+        previous_output = self._outputs.get(fingerprint)
+        if previous_output is not None and self._fingerprints.get(previous_output) == fingerprint:
+            del self._fingerprints[previous_output]
+
+        self._outputs[fingerprint] = output
+        self._fingerprints[output] = fingerprint
+        self.renders += 1
+
+    def save(self) -> None:
+        """Persist the fingerprints to `index_path`, if one was given.
+        """
+        if self.index_path is None:
+            return
+        with open(self.index_path, "w", encoding="utf-8") as index_file:
+            json.dump(self._outputs, index_file)
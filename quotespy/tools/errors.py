@@ -0,0 +1,58 @@
+class InvalidArchiveFormat(Exception):
+    """Error raised when the output archive of a batch is not a .zip or .tar file.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidArchiveFormat with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidColumnMapping(Exception):
+    """Error raised when the columns of a CSV/TSV source file can't be mapped onto the fields of a quote or tweet.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidColumnMapping with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidSourceQuery(Exception):
+    """Error raised when the query of a SQLite source is missing or can't be run.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidSourceQuery with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidShard(Exception):
+    """Error raised when the shard of a batch is not an (index, count) pair of integers with 0 <= index < count.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidShard with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
@@ -0,0 +1,539 @@
+import struct
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from PIL import ImageDraw, ImageFont
+
+# NumPy is optional: without it, batches of text are measured one character\
+# at a time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Font size at which glyph metrics are measured, before being scaled to the
+# size actually needed
+REFERENCE_SIZE = 256
+
+# Above this many distinct characters in a batch, the pairs of adjacent\
+# characters are sorted instead of counted to find the distinct ones
+MAX_COUNTED_CHARS = 2048
+
+# Unicode noncharacter, never mapped by fonts, drawn with the ".notdef" glyph
+NOTDEF_CHAR = "\uffff"
+
+# Preferred cmap subtables (platform ID, encoding ID): full Unicode before\
+# the Basic Multilingual Plane only
+CMAP_PREFERENCE = [(3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)]
+
+
+@lru_cache(maxsize=128)
+def load_font(font_family: str, font_size: int) -> ImageFont.FreeTypeFont:
+    """Load a font, reusing it if the same family and size have already been loaded by this process.
+
+    Parameters
+    ----------
+    font_family : str
+        Name of (or path to) the font.
+    font_size : int
+        Size of the font.
+
+    Returns
+    -------
+    ImageFont.FreeTypeFont
+        The loaded font.
+    """
+    return ImageFont.truetype(font_family, font_size, encoding="utf-8")
+
+
+def __parse_cmap_format_4(data: bytes, offset: int) -> FrozenSet[int]:
+    """Parse a format 4 cmap subtable (segment mapping to delta values).
+
+    Parameters
+    ----------
+    data : bytes
+        Contents of the font file.
+    offset : int
+        Position of the subtable in the file.
+
+    Returns
+    -------
+    FrozenSet[int]
+        Code points mapped to a glyph.
+    """
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    end_codes = struct.unpack_from(f">{seg_count}H", data, offset + 14)
+    start_codes_offset = offset + 16 + seg_count * 2
+    start_codes = struct.unpack_from(f">{seg_count}H", data, start_codes_offset)
+    deltas = struct.unpack_from(f">{seg_count}h", data, start_codes_offset + seg_count * 2)
+    range_offsets_offset = start_codes_offset + seg_count * 4
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offsets_offset)
+
+    coverage = set()
+    for i in range(seg_count):
+        start, end = start_codes[i], min(end_codes[i], 0xFFFE)
+        if range_offsets[i] == 0:
+            # Glyph ID 0 is the ".notdef" glyph
+            coverage.update(
+                code for code in range(start, end + 1) if (code + deltas[i]) & 0xFFFF != 0)
+            continue
+
+        # The glyph IDs are in the glyph ID array, relative to this range offset
+        glyph_ids_offset = range_offsets_offset + i * 2 + range_offsets[i]
+        for code in range(start, end + 1):
+            glyph_id = struct.unpack_from(">H", data, glyph_ids_offset + (code - start) * 2)[0]
+            if glyph_id != 0 and (glyph_id + deltas[i]) & 0xFFFF != 0:
+                coverage.add(code)
+
+    return frozenset(coverage)
+
+
+def __parse_cmap_format_12(data: bytes, offset: int) -> FrozenSet[int]:
+    """Parse a format 12 cmap subtable (segmented coverage).
+
+    Parameters
+    ----------
+    data : bytes
+        Contents of the font file.
+    offset : int
+        Position of the subtable in the file.
+
+    Returns
+    -------
+    FrozenSet[int]
+        Code points mapped to a glyph.
+    """
+    n_groups = struct.unpack_from(">I", data, offset + 12)[0]
+
+    coverage = set()
+    for group in range(n_groups):
+        start, end, start_glyph = struct.unpack_from(">3I", data, offset + 16 + group * 12)
+        # Glyph ID 0 is the ".notdef" glyph
+        coverage.update(range(start + (start_glyph == 0), end + 1))
+
+    return frozenset(coverage)
+
+
+def parse_cmap(font_path: str) -> Optional[FrozenSet[int]]:
+    """Read the code points a TrueType/OpenType font has glyphs for, from its cmap table.
+
+    Only formats 4 and 12 of Unicode subtables are supported, for the first font of font collections (like `ImageFont.truetype` loads by default).
+
+    Parameters
+    ----------
+    font_path : str
+        Path to the font file.
+
+    Returns
+    -------
+    Optional[FrozenSet[int]]
+        Code points covered by the font, or None if no supported cmap subtable was found.
+    """
+    try:
+        with open(font_path, "rb") as font_file:
+            data = font_file.read()
+
+        font_offset = 0
+        # Font collection: use the first font
+        if data[:4] == b"ttcf":
+            font_offset = struct.unpack_from(">I", data, 12)[0]
+
+        n_tables = struct.unpack_from(">H", data, font_offset + 4)[0]
+        cmap_offset = None
+        for table in range(n_tables):
+            tag, _, table_offset, _ = struct.unpack_from(
+                ">4s3I", data, font_offset + 12 + table * 16)
+            if tag == b"cmap":
+                cmap_offset = table_offset
+                break
+        if cmap_offset is None:
+            return None
+
+        # Choose the most complete of the Unicode subtables in a supported format
+        n_subtables = struct.unpack_from(">H", data, cmap_offset + 2)[0]
+        subtables = {}
+        for subtable in range(n_subtables):
+            platform_id, encoding_id, subtable_offset = struct.unpack_from(
+                ">2HI", data, cmap_offset + 4 + subtable * 8)
+            offset = cmap_offset + subtable_offset
+            subtable_format = struct.unpack_from(">H", data, offset)[0]
+            if subtable_format in (4, 12):
+                subtables[(platform_id, encoding_id)] = (subtable_format, offset)
+
+        for encoding in CMAP_PREFERENCE:
+            if encoding in subtables:
+                subtable_format, offset = subtables[encoding]
+                if subtable_format == 12:
+                    return __parse_cmap_format_12(data, offset)
+                return __parse_cmap_format_4(data, offset)
+
+    except (OSError, struct.error):
+        pass
+
+    return None
+
+
+@lru_cache(maxsize=32)
+def get_font_coverage(font_family: str) -> Optional[FrozenSet[int]]:
+    """Get the (cached) code points covered by a font, read once from its cmap table.
+
+    The font file is found the same way `ImageFont.truetype` finds it (e.g. "arial.ttf" in the system's fonts directory).
+
+    Parameters
+    ----------
+    font_family : str
+        Name of (or path to) the font.
+
+    Returns
+    -------
+    Optional[FrozenSet[int]]
+        Code points covered by the font, or None if its cmap table can't be read.
+    """
+    font_path = getattr(load_font(font_family, REFERENCE_SIZE), "path", None)
+    if not isinstance(font_path, str):
+        return None
+
+    return parse_cmap(font_path)
+
+
+class FontMetrics:
+    """Glyph metrics of a font, measured once at `REFERENCE_SIZE` and scaled linearly to any font size.
+
+    Useful to estimate the dimensions of text at many different sizes (e.g. to search for the font size that fits a graphic) without rasterizing it. Kerning and hinting are not taken into account.
+    """
+
+    def __init__(self, font_family: str):
+        """Initializes FontMetrics.
+
+        Parameters
+        ----------
+        font_family : str
+            Name of (or path to) the font.
+        """
+        self.font_family = font_family
+        self._font = load_font(font_family, REFERENCE_SIZE)
+        ascent, descent = self._font.getmetrics()
+        self._line_height = ascent + descent
+        # Advance width of each glyph measured so far, at the reference size
+        self._advances: Dict[str, float] = {}
+        # Kerning adjustment of each pair of characters measured so far, at\
+        # the reference size
+        self._kerning: Dict[Tuple[str, str], float] = {}
+        # Whether the font has a glyph for each character checked so far
+        self._has_glyph: Dict[str, bool] = {}
+        self._notdef_signature = None
+
+    def text_width(self, text: str, font_size: float) -> float:
+        """Estimate the width of a line of text.
+
+        Parameters
+        ----------
+        text : str
+            Line of text.
+        font_size : float
+            Size of the font.
+
+        Returns
+        -------
+        float
+            Width of the text (pixels).
+        """
+        width = sum(self.__advance(char) for char in text)
+
+        return width * font_size / REFERENCE_SIZE
+
+    def __advance(self, char: str) -> float:
+        """Get the (cached) advance width of a character at the reference size.
+        """
+        advance = self._advances.get(char)
+        if advance is None:
+            advance = self._advances[char] = self._font.getlength(char)
+
+        return advance
+
+    def __kerning(self, pair: Tuple[str, str]) -> float:
+        """Get the (cached) kerning adjustment between two characters at the reference size.
+        """
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = self._kerning[pair] = self._font.getlength(pair[0] + pair[1]) - \
+                self.__advance(pair[0]) - self.__advance(pair[1])
+
+        return kerning
+
+    def text_widths(self, texts: List[str], font_size: float) -> List[float]:
+        """Estimate the widths of many lines of text at once, kerning included.
+
+        With NumPy installed, the characters of all lines are measured together: each distinct character and pair of adjacent characters is looked up once in the advance and kerning tables, then the widths are summed per line with vectorized operations. Otherwise, the lines are measured one character at a time with the same tables.
+
+        Parameters
+        ----------
+        texts : List[str]
+            Lines of text.
+        font_size : float
+            Size of the font.
+
+        Returns
+        -------
+        List[float]
+            Width of each line (pixels).
+        """
+        scale = font_size / REFERENCE_SIZE
+
+        if np is None:
+            widths = []
+            for text in texts:
+                width = sum(self.__advance(char) for char in text)
+                width += sum(self.__kerning(pair) for pair in zip(text, text[1:]))
+                widths.append(width * scale)
+            return widths
+
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        joined = "".join(texts)
+        if not joined:
+            return [0.0] * len(texts)
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+
+        # Advance of every character, looking up each distinct character once\
+        # (characters are numbered in order of code point)
+        unique_codes = np.flatnonzero(np.bincount(codes))
+        compact_codes = np.zeros(unique_codes[-1] + 1, dtype=np.int64)
+        compact_codes[unique_codes] = np.arange(len(unique_codes))
+        char_indices = compact_codes[codes]
+        unique_advances = np.array([self.__advance(chr(code)) for code in unique_codes])
+        char_widths = unique_advances[char_indices]
+
+        # Kerning between each character and the next one, except across lines
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        same_line = np.ones(len(codes) - 1, dtype=bool)
+        line_starts = starts[(starts > 0) & (starts < len(codes))]
+        same_line[line_starts - 1] = False
+        if same_line.any():
+            n_chars = len(unique_codes)
+            pairs = char_indices[:-1][same_line] * n_chars + char_indices[1:][same_line]
+            # Counting the pairs is faster than sorting them, unless there\
+            # are too many possible pairs
+            if n_chars <= MAX_COUNTED_CHARS:
+                unique_pairs = np.flatnonzero(np.bincount(pairs))
+                pair_indices = np.searchsorted(unique_pairs, pairs)
+            else:
+                unique_pairs, pair_indices = np.unique(pairs, return_inverse=True)
+            unique_kernings = np.array([
+                self.__kerning((chr(unique_codes[pair // n_chars]), chr(unique_codes[pair % n_chars])))
+                for pair in unique_pairs
+            ])
+            char_widths[:-1][same_line] += unique_kernings[pair_indices]
+
+        # Sum the widths of the characters of each (non-empty) line
+        widths = np.zeros(len(texts))
+        non_empty = lengths > 0
+        widths[non_empty] = np.add.reduceat(char_widths, starts[non_empty])
+
+        return (widths * scale).tolist()
+
+    def __glyph_signature(self, char: str) -> tuple:
+        """Summarize the rasterized glyph of a character (size, bounding box and projections), to compare it with the ".notdef" glyph.
+
+        Parameters
+        ----------
+        char : str
+            A single character.
+
+        Returns
+        -------
+        tuple
+            Summary of the glyph.
+        """
+        mask = self._font.getmask(char)
+        return (mask.size, mask.getbbox(), mask.getprojection())
+
+    def has_glyph(self, char: str) -> bool:
+        """Check if the font can draw a character (whitespace always can).
+
+        The character is looked up in the font's coverage (see `get_font_coverage`). For fonts whose cmap table can't be read, it's instead rasterized (once) and compared with the ".notdef" glyph.
+
+        Parameters
+        ----------
+        char : str
+            A single character.
+
+        Returns
+        -------
+        bool
+            Whether the font has a glyph for the character.
+        """
+        has_glyph = self._has_glyph.get(char)
+        if has_glyph is None:
+            coverage = get_font_coverage(self.font_family)
+            if char.isspace():
+                has_glyph = True
+            elif coverage is not None:
+                has_glyph = ord(char) in coverage
+            else:
+                if self._notdef_signature is None:
+                    self._notdef_signature = self.__glyph_signature(NOTDEF_CHAR)
+                has_glyph = self.__glyph_signature(char) != self._notdef_signature
+            self._has_glyph[char] = has_glyph
+
+        return has_glyph
+
+    def missing_glyphs(self, text: str) -> List[str]:
+        """Find the characters of the text the font can't draw (drawn as the ".notdef" glyph, usually an empty box).
+
+        Parameters
+        ----------
+        text : str
+            Text to check.
+
+        Returns
+        -------
+        List[str]
+            The missing characters, in order of first appearance.
+        """
+        return [char for char in dict.fromkeys(text) if not self.has_glyph(char)]
+
+    def line_height(self, font_size: float) -> float:
+        """Estimate the height of a line of text (ascent plus descent).
+
+        Parameters
+        ----------
+        font_size : float
+            Size of the font.
+
+        Returns
+        -------
+        float
+            Height of a line (pixels).
+        """
+        return self._line_height * font_size / REFERENCE_SIZE
+
+
+@lru_cache(maxsize=32)
+def get_font_metrics(font_family: str) -> FontMetrics:
+    """Get the (cached) glyph metrics of a font.
+
+    Parameters
+    ----------
+    font_family : str
+        Name of (or path to) the font.
+
+    Returns
+    -------
+    FontMetrics
+        Glyph metrics of the font.
+    """
+    return FontMetrics(font_family)
+
+
+def missing_glyphs(text: str, font_families: List[str]) -> List[str]:
+    """Find the characters of the text none of the fonts (a main font and its fallbacks) can draw.
+
+    Parameters
+    ----------
+    text : str
+        Text to check.
+    font_families : List[str]
+        Names of (or paths to) the fonts.
+
+    Returns
+    -------
+    List[str]
+        The missing characters, in order of first appearance.
+    """
+    missing = get_font_metrics(font_families[0]).missing_glyphs(text)
+    for font_family in font_families[1:]:
+        if not missing:
+            break
+        metrics = get_font_metrics(font_family)
+        missing = [char for char in missing if not metrics.has_glyph(char)]
+
+    return missing
+
+
+def split_runs(text: str, font_families: List[str]) -> List[Tuple[int, str]]:
+    """Split the text into runs of characters drawn with the same font: the first font of the chain (a main font and its fallbacks) that has a glyph for each character.
+
+    Whitespace stays in the current run. Characters no font can draw are left to the main font.
+
+    Parameters
+    ----------
+    text : str
+        Text to split.
+    font_families : List[str]
+        Names of (or paths to) the fonts, the main one first.
+
+    Returns
+    -------
+    List[Tuple[int, str]]
+        Index of the font and text of each run.
+    """
+    chain = [get_font_metrics(font_family) for font_family in font_families]
+
+    # Most text is fully covered by the main font
+    if len(chain) == 1 or not chain[0].missing_glyphs(text):
+        return [(0, text)]
+
+    runs = []
+    run_font = 0
+    run_start = 0
+    for position, char in enumerate(text):
+        if char.isspace():
+            continue
+        font_index = next(
+            (index for index, metrics in enumerate(chain) if metrics.has_glyph(char)), 0)
+        if font_index != run_font:
+            if position > run_start:
+                runs.append((run_font, text[run_start:position]))
+            run_font = font_index
+            run_start = position
+    runs.append((run_font, text[run_start:]))
+
+    return runs
+
+
+def runs_width(runs: List[Tuple[int, str]], fonts: List[ImageFont.FreeTypeFont]) -> float:
+    """Calculate the width of runs of text drawn one after the other.
+
+    Parameters
+    ----------
+    runs : List[Tuple[int, str]]
+        Index of the font and text of each run (see `split_runs`).
+    fonts : List[ImageFont.FreeTypeFont]
+        Fonts used to draw the runs.
+
+    Returns
+    -------
+    float
+        Width of the runs (pixels).
+    """
+    return sum(fonts[font_index].getlength(run) for font_index, run in runs)
+
+
+def draw_runs(
+    draw_interface: ImageDraw.ImageDraw,
+    coordinates: Tuple[float, float],
+    runs: List[Tuple[int, str]],
+    fonts: List[ImageFont.FreeTypeFont],
+    fill
+) -> None:
+    """Draw runs of text one after the other, each with its own font, on a shared baseline.
+
+    Parameters
+    ----------
+    draw_interface : ImageDraw.ImageDraw
+        Interface used to draw in the Image.
+    coordinates : Tuple[float, float]
+        Coordinates at which to draw the first run.
+    runs : List[Tuple[int, str]]
+        Index of the font and text of each run (see `split_runs`).
+    fonts : List[ImageFont.FreeTypeFont]
+        Fonts used to draw the runs.
+    fill
+        Color of the text.
+    """
+    x, y = coordinates
+    # Align the runs on the baseline of the main font (where text drawn at\
+    # these coordinates with the main font would sit)
+    baseline = y + fonts[0].getmetrics()[0]
+    for font_index, run in runs:
+        draw_interface.text((x, baseline), run, font=fonts[font_index], fill=fill, anchor="ls")
+        x += fonts[font_index].getlength(run)
@@ -0,0 +1,435 @@
+import json
+import tarfile
+import zipfile
+from io import BytesIO
+from os import link, makedirs, path, remove
+from shutil import copyfile
+from time import time
+from typing import Dict, List, Optional, Set, Union
+from PIL import Image
+from .errors import InvalidArchiveFormat
+from .utils import stable_hash
+
+
+def save_image(
+    img: Image.Image,
+    save_name: str,
+    save_options: Optional[Dict] = None
+) -> None:
+    """Save a graphic, replacing any existing file instead of writing into it.
+
+    Writing into an existing file would also change every hard link to it (see `RenderDeduplicator`), so the old file is removed first.
+
+    Parameters
+    ----------
+    img : Image.Image
+        Graphic to be saved.
+    save_name : str
+        Destination path of the graphic.
+    save_options : Optional[Dict], optional
+        Options for the PNG encoder (e.g. `compress_level`), by default None
+    """
+    if path.lexists(save_name):
+        remove(save_name)
+    if save_options:
+        img.save(save_name, **save_options)
+    else:
+        img.save(save_name)
+
+
+class ShardedLayout:
+    """Output layout that spreads the graphics over hashed subdirectories (e.g. `3f/a2/title.png`), so that no single directory holds too many files.
+
+    A `index_name` file in the output directory maps each title to the path of its graphic.
+    """
+
+    def __init__(self, depth: int = 2, fan_out: int = 256, index_name: str = "index.jsonl"):
+        """Initializes ShardedLayout.
+
+        Parameters
+        ----------
+        depth : int, optional
+            Number of nested subdirectories, by default 2
+        fan_out : int, optional
+            Number of subdirectories at each level, by default 256
+        index_name : str, optional
+            Name of the JSON Lines index file, by default "index.jsonl"
+        """
+        if depth < 1 or fan_out < 2:
+            raise ValueError("The sharded layout needs a depth of at least 1 and a fan-out of at least 2.")
+
+        self.depth = depth
+        self.fan_out = fan_out
+        self.index_name = index_name
+        # Width of the (hexadecimal) subdirectory names
+        self._name_width = len(format(fan_out - 1, "x"))
+
+    def relative_path(self, title: str) -> str:
+        """Get the path of a graphic relative to the output directory.
+
+        Parameters
+        ----------
+        title : str
+            Title of the graphic.
+
+        Returns
+        -------
+        str
+            Relative path of the graphic.
+        """
+        key = stable_hash(title)
+        subdirs = []
+        for _ in range(self.depth):
+            key, bucket = divmod(key, self.fan_out)
+            subdirs.append(format(bucket, f"0{self._name_width}x"))
+
+        return path.join(*subdirs, f"{title}.png")
+
+
+def load_index(index_path: str) -> Dict[str, str]:
+    """Load the index of a sharded output directory.
+
+    Parameters
+    ----------
+    index_path : str
+        Path to the index file.
+
+    Returns
+    -------
+    Dict[str, str]
+        Mapping of titles to the path of their graphic (relative to the output directory). Later entries take precedence.
+    """
+    index = {}
+    with open(index_path, "r", encoding="utf-8") as index_file:
+        for line in index_file:
+            entry = json.loads(line)
+            index[entry["title"]] = entry["path"]
+    return index
+
+
+class DirectorySink:
+    """Save the graphics of a batch as files in a directory, either flat (`title.png`) or following a `ShardedLayout`.
+    """
+
+    def __init__(
+        self,
+        save_dir: str = "",
+        layout: Optional[ShardedLayout] = None,
+        save_options: Optional[Dict] = None
+    ):
+        """Initializes DirectorySink.
+
+        Parameters
+        ----------
+        save_dir : str, optional
+            Directory in which to save the graphics, by default ""
+        layout : Optional[ShardedLayout], optional
+            Layout used to shard the graphics into subdirectories, by default None
+        save_options : Optional[Dict], optional
+            Options for the PNG encoder (e.g. `compress_level`), by default None
+        """
+        self.save_dir = save_dir
+        self.layout = layout
+        self.save_options = save_options or {}
+        self._created_dirs: Set[str] = set()
+        self._index_file = None
+
+    def __path_for(self, title: str) -> str:
+        """Get the destination path of a graphic, creating its subdirectories if needed.
+        """
+        if self.layout is None:
+            return path.join(self.save_dir, f"{title}.png")
+
+        save_name = path.join(self.save_dir, self.layout.relative_path(title))
+        save_subdir = path.dirname(save_name)
+        if save_subdir not in self._created_dirs:
+            makedirs(save_subdir, exist_ok=True)
+            self._created_dirs.add(save_subdir)
+
+        return save_name
+
+    def __add_to_index(self, title: str, save_name: str) -> None:
+        """Append a graphic to the index of a sharded output directory.
+        """
+        if self.layout is None:
+            return
+
+        if self._index_file is None:
+            index_path = path.join(self.save_dir, self.layout.index_name)
+            self._index_file = open(index_path, "a", encoding="utf-8")
+
+        entry = {"title": title, "path": path.relpath(save_name, self.save_dir or ".")}
+        self._index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def write(self, img: Image.Image, title: str) -> str:
+        """Save a graphic.
+
+        Parameters
+        ----------
+        img : Image.Image
+            Graphic to be saved.
+        title : str
+            Title of the graphic.
+
+        Returns
+        -------
+        str
+            Absolute path of the saved graphic.
+        """
+        save_name = self.__path_for(title)
+        save_image(img, save_name, self.save_options)
+        self.__add_to_index(title, save_name)
+
+        return path.abspath(save_name)
+
+    def write_encoded(self, data: bytes, title: str) -> str:
+        """Save a graphic already encoded as PNG.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded graphic.
+        title : str
+            Title of the graphic.
+
+        Returns
+        -------
+        str
+            Absolute path of the saved graphic.
+        """
+        save_name = self.__path_for(title)
+        # Don't write through hard links (see `save_image`)
+        if path.lexists(save_name):
+            remove(save_name)
+        with open(save_name, "wb") as graphic_file:
+            graphic_file.write(data)
+        self.__add_to_index(title, save_name)
+
+        return path.abspath(save_name)
+
+    def duplicate(self, source: str, title: str, hard_link: bool = True) -> Optional[str]:
+        """Save an already saved graphic under another title, by hard-linking (or copying) it.
+
+        Parameters
+        ----------
+        source : str
+            Absolute path of the graphic already saved (as returned by `write`).
+        title : str
+            Title of the new graphic.
+        hard_link : bool, optional
+            Whether to hard-link the graphic (falling back to a copy when not possible), by default True
+
+        Returns
+        -------
+        Optional[str]
+            Absolute path of the new graphic, or None if `source` no longer exists.
+        """
+        if not path.isfile(source):
+            return None
+
+        save_name = self.__path_for(title)
+        if path.abspath(save_name) != source:
+            if path.lexists(save_name):
+                remove(save_name)
+            if hard_link:
+                try:
+                    link(source, save_name)
+                except OSError:
+                    copyfile(source, save_name)
+            else:
+                copyfile(source, save_name)
+        self.__add_to_index(title, save_name)
+
+        return path.abspath(save_name)
+
+    def close(self) -> None:
+        """Flush the index file, if any.
+        """
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+
+class ArchiveSink:
+    """Save the graphics of a batch straight into a .zip or .tar archive, without writing intermediate files.
+
+    If a `ShardedLayout` is given, its paths are used for the archive members and the index is added to the archive when it is closed.
+    """
+
+    def __init__(
+        self,
+        archive_path: str,
+        layout: Optional[ShardedLayout] = None,
+        save_options: Optional[Dict] = None
+    ):
+        """Initializes ArchiveSink, creating (or overwriting) the archive.
+
+        Parameters
+        ----------
+        archive_path : str
+            Path to the .zip or .tar archive.
+        layout : Optional[ShardedLayout], optional
+            Layout used to shard the graphics into subdirectories of the archive, by default None
+        save_options : Optional[Dict], optional
+            Options for the PNG encoder (e.g. `compress_level`), by default None
+
+        Raises
+        ------
+        InvalidArchiveFormat
+            Raised when the archive is neither a .zip nor a .tar file.
+        """
+        self.archive_path = path.abspath(archive_path)
+        self.layout = layout
+        self.save_options = save_options or {}
+        self._index: List[Dict[str, str]] = []
+        # Members written by this sink (the archive is created anew, so\
+        # graphics from earlier batches are gone)
+        self._members: Set[str] = set()
+
+        archive_ext = archive_path.split(".")[-1].lower()
+        if archive_ext == "zip":
+            # PNG data is already compressed
+            self._archive = zipfile.ZipFile(
+                self.archive_path, "w", compression=zipfile.ZIP_STORED)
+        elif archive_ext == "tar":
+            self._archive = tarfile.open(self.archive_path, "w")
+        else:
+            error_msg = f"The archive {archive_path} must be a .zip or .tar file."
+            raise InvalidArchiveFormat(error_msg)
+
+    def __member_name(self, title: str) -> str:
+        """Get the name of a graphic inside the archive.
+        """
+        if self.layout is None:
+            return f"{title}.png"
+        # Archive members always use forward slashes
+        return self.layout.relative_path(title).replace(path.sep, "/")
+
+    def __add_member(self, member_name: str, data: bytes) -> None:
+        """Add a file to the archive.
+        """
+        if isinstance(self._archive, zipfile.ZipFile):
+            self._archive.writestr(member_name, data)
+        else:
+            member = tarfile.TarInfo(member_name)
+            member.size = len(data)
+            member.mtime = int(time())
+            member.mode = 0o644
+            self._archive.addfile(member, BytesIO(data))
+
+    def write(self, img: Image.Image, title: str) -> str:
+        """Encode a graphic and add it to the archive.
+
+        Parameters
+        ----------
+        img : Image.Image
+            Graphic to be saved.
+        title : str
+            Title of the graphic.
+
+        Returns
+        -------
+        str
+            Reference to the graphic, in the form `archive_path::member_name`.
+        """
+        buffer = BytesIO()
+        img.save(buffer, format="PNG", **self.save_options)
+
+        return self.write_encoded(buffer.getvalue(), title)
+
+    def write_encoded(self, data: bytes, title: str) -> str:
+        """Add a graphic already encoded as PNG to the archive.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded graphic.
+        title : str
+            Title of the graphic.
+
+        Returns
+        -------
+        str
+            Reference to the graphic, in the form `archive_path::member_name`.
+        """
+        member_name = self.__member_name(title)
+        self.__add_member(member_name, data)
+        self._members.add(member_name)
+        self._index.append({"title": title, "path": member_name})
+
+        return f"{self.archive_path}::{member_name}"
+
+    def duplicate(self, source: str, title: str, hard_link: bool = True) -> Optional[str]:
+        """Add an already saved graphic under another title: as a hard link member for .tar archives, or as a copy for .zip archives.
+
+        Parameters
+        ----------
+        source : str
+            Reference to the graphic already saved (as returned by `write`).
+        title : str
+            Title of the new graphic.
+        hard_link : bool, optional
+            Unused, since .tar archives always use hard link members and .zip archives can only hold copies, by default True
+
+        Returns
+        -------
+        Optional[str]
+            Reference to the new graphic, or None if `source` was not written to this archive by this sink.
+        """
+        archive_path, _, source_member = source.rpartition("::")
+        if archive_path != self.archive_path or source_member not in self._members:
+            return None
+
+        member_name = self.__member_name(title)
+        if isinstance(self._archive, zipfile.ZipFile):
+            self._archive.writestr(member_name, self._archive.read(source_member))
+        else:
+            member = tarfile.TarInfo(member_name)
+            member.type = tarfile.LNKTYPE
+            member.linkname = source_member
+            member.mtime = int(time())
+            member.mode = 0o644
+            self._archive.addfile(member)
+        self._members.add(member_name)
+        self._index.append({"title": title, "path": member_name})
+
+        return f"{self.archive_path}::{member_name}"
+
+    def close(self) -> None:
+        """Add the index (if a layout is used) and close the archive.
+        """
+        if self.layout is not None and self._index != list():
+            index_lines = [json.dumps(entry, ensure_ascii=False) for entry in self._index]
+            index_data = ("\n".join(index_lines) + "\n").encode("utf-8")
+            self.__add_member(self.layout.index_name, index_data)
+            self._index = []
+        self._archive.close()
+
+
+def open_sink(
+    save_dir: str = "",
+    layout: Optional[ShardedLayout] = None,
+    archive_path: Optional[str] = None,
+    save_options: Optional[Dict] = None
+) -> Union[DirectorySink, ArchiveSink]:
+    """Choose where to save the graphics of a batch: an archive, if `archive_path` is given, or otherwise a directory.
+
+    Parameters
+    ----------
+    save_dir : str, optional
+        Directory in which to save the graphics, by default ""
+    layout : Optional[ShardedLayout], optional
+        Layout used to shard the graphics into subdirectories, by default None
+    archive_path : Optional[str], optional
+        Path to a .zip or .tar archive in which to save the graphics, by default None
+    save_options : Optional[Dict], optional
+        Options for the PNG encoder (e.g. `compress_level`), by default None
+
+    Returns
+    -------
+    Union[DirectorySink, ArchiveSink]
+        The sink in which to save the graphics.
+    """
+    if archive_path is not None:
+        return ArchiveSink(archive_path, layout, save_options)
+    return DirectorySink(save_dir, layout, save_options)
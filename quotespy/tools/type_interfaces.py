@@ -0,0 +1,23 @@
+from typing import Any, Hashable, List, Optional, Tuple
+from typing_extensions import TypedDict
+
+
+class BatchJob(TypedDict):
+    """TypedDict for a single graphic of a batch: the name it is saved with, the content that identifies it (for deduplication), the arguments needed to draw it, the memory its canvas takes (in bytes) and the group it belongs to (consecutive jobs of the same group are drawn by the same worker, None for no group).
+    """
+
+    name: str
+    content: List[Any]
+    args: Tuple
+    cost: int
+    group: Optional[Hashable]
+
+
+class PreflightReport(TypedDict):
+    """TypedDict for the dry-run report of a single graphic: its number of lines of text, whether the text overflows the canvas or has more lines than allowed, and the characters the font lacks.
+    """
+
+    lines: int
+    overflow: bool
+    too_many_lines: bool
+    missing_glyphs: List[str]
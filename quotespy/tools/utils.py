@@ -0,0 +1,345 @@
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import sqlite3
+from hashlib import sha1
+from os import path
+from urllib.request import pathname2url
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .errors import InvalidColumnMapping, InvalidShard, InvalidSourceQuery
+
+# Extensions of SQLite database sources
+SQLITE_FORMATS = ("db", "sqlite", "sqlite3")
+# Source formats read lazily (one quote or tweet at a time)
+STREAMED_FORMATS = ("jsonl", "csv", "tsv") + SQLITE_FORMATS
+# Number of rows fetched at a time from SQLite sources
+SQLITE_BATCH_SIZE = 1000
+# Delimiters of the source formats with columns
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+# Openers of compressed source files, by file extension
+COMPRESSED_EXTENSIONS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+# Openers of compressed source files, by the magic bytes they start with
+COMPRESSED_MAGIC_BYTES = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+
+
+def stable_hash(key: str) -> int:
+    """Hash a string into an integer that is the same on every machine and process (unlike the built-in `hash`).
+
+    Parameters
+    ----------
+    key : str
+        String to hash (e.g. a graphic's title).
+
+    Returns
+    -------
+    int
+        Non-negative 64-bit hash of the string.
+    """
+    digest = sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def validate_shard(shard: Tuple[int, int]) -> Tuple[int, int]:
+    """Validate the shard of a batch processed by one of several independent nodes.
+
+    Parameters
+    ----------
+    shard : Tuple[int, int]
+        Index of the shard (from 0) and number of shards.
+
+    Returns
+    -------
+    Tuple[int, int]
+        Validated index and number of shards.
+
+    Raises
+    ------
+    InvalidShard
+        Raised when the shard is not a pair of integers with 0 <= index < count.
+    """
+    error_msg = "Please provide the shard as an (index, count) pair of integers, with 0 <= index < count."
+    if not isinstance(shard, (list, tuple)) or len(shard) != 2:
+        raise InvalidShard(error_msg)
+
+    index, count = shard
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in shard):
+        raise InvalidShard(error_msg)
+    if count < 1 or not 0 <= index < count:
+        raise InvalidShard(error_msg)
+
+    return (index, count)
+
+
+def in_shard(key: str, shard: Tuple[int, int]) -> bool:
+    """Whether an item of a batch (identified by its title or tweet name) belongs to a shard, the same on every machine.
+
+    Parameters
+    ----------
+    key : str
+        Title (or tweet name) of the item.
+    shard : Tuple[int, int]
+        Validated index of the shard and number of shards.
+
+    Returns
+    -------
+    bool
+        Whether the item belongs to the shard.
+    """
+    index, count = shard
+    # The upper half of the hash, since `ShardedLayout` uses the lower bits\
+    # for the subdirectories (so each shard still fills all of them)
+    return (stable_hash(key) >> 32) % count == index
+
+
+def __compressed_opener(file_path: str) -> Optional[Callable[..., IO]]:
+    """Find how to decompress a source file, from its extension or, if it has none of the known ones, from its first bytes.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the source file.
+
+    Returns
+    -------
+    Optional[Callable[..., IO]]
+        Function that opens the compressed file, None for uncompressed files.
+    """
+    extension = path.splitext(file_path)[1].lower()
+    if extension in COMPRESSED_EXTENSIONS:
+        return COMPRESSED_EXTENSIONS[extension]
+
+    with open(file_path, "rb") as source_file:
+        header = source_file.read(6)
+    for magic_bytes, opener in COMPRESSED_MAGIC_BYTES:
+        if header.startswith(magic_bytes):
+            return opener
+
+    return None
+
+
+def open_source(file_path: str, newline: Optional[str] = None) -> IO[str]:
+    """Open a source file (of quotes or tweets) as UTF-8 text, decompressing .gz, .bz2 and .xz files on the fly.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the source file.
+    newline : Optional[str], optional
+        How line endings are handled (see `open`), by default None (universal newlines)
+
+    Returns
+    -------
+    IO[str]
+        The opened file.
+    """
+    opener = __compressed_opener(file_path)
+    if opener is None:
+        return open(file_path, "r", encoding="utf-8", newline=newline)
+
+    return opener(file_path, "rt", encoding="utf-8", newline=newline)
+
+
+def source_format(file_path: str) -> str:
+    """Get the format (extension) of a source file, ignoring the extension of its compression (e.g. "json" for "tweets.json.gz").
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the source file.
+
+    Returns
+    -------
+    str
+        Extension of the file, without the dot.
+    """
+    root, extension = path.splitext(file_path)
+    if extension.lower() in COMPRESSED_EXTENSIONS:
+        extension = path.splitext(root)[1]
+
+    return extension[1:]
+
+
+def iter_json_lines(file_path: str) -> Iterator[Any]:
+    """Lazily load the JSON values of a JSON Lines (.jsonl) file, one per line.
+
+    The file is read line by line, so it can be read while it is still being appended to. Blank lines are skipped, and so is a last line that is incomplete (not yet ended by a newline and not valid JSON).
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .jsonl file (which may be compressed, see `open_source`).
+
+    Returns
+    -------
+    Iterator[Any]
+        The value of each line.
+    """
+    with open_source(file_path) as jsonl_file:
+        for line in jsonl_file:
+            if line.strip() == "":
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Line still being written by the producer
+                if not line.endswith("\n"):
+                    return
+                raise
+
+
+def __field_columns(
+    fields: List[str],
+    columns: Optional[Dict[str, str]] = None
+) -> List[Tuple[str, str]]:
+    """Pair each field with the name of the column it is read from.
+
+    Parameters
+    ----------
+    fields : List[str]
+        Fields to load.
+    columns : Optional[Dict[str, str]], optional
+        Mapping of (some of the) fields to column names, by default None (each field is read from the column with its name)
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        Each field and the name of its column.
+
+    Raises
+    ------
+    InvalidColumnMapping
+        Raised when the mapping is not a dictionary or has unknown fields.
+    """
+    columns = {} if columns is None else columns
+    if not isinstance(columns, dict) or any(field not in fields for field in columns):
+        raise InvalidColumnMapping(
+            f"Please provide the columns as a dictionary that maps (some of) these fields to column names:\n\t{fields}")
+
+    return [(field, columns.get(field, field)) for field in fields]
+
+
+def iter_csv_rows(
+    file_path: str,
+    fields: List[str],
+    columns: Optional[Dict[str, str]] = None
+) -> Iterator[Dict[str, str]]:
+    """Lazily load the rows of a CSV (or TSV) file with a header, as dictionaries of the given fields.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .csv or .tsv file (which may be compressed, see `open_source`).
+    fields : List[str]
+        Fields to load from each row.
+    columns : Optional[Dict[str, str]], optional
+        Mapping of fields to the names of the columns they are read from, by default None (each field is read from the column with its name)
+
+    Returns
+    -------
+    Iterator[Dict[str, str]]
+        The fields of each row.
+
+    Raises
+    ------
+    InvalidColumnMapping
+        Raised when the mapping has unknown fields, or the file lacks one of the columns.
+    """
+    field_columns = __field_columns(fields, columns)
+    delimiter = DELIMITERS.get(source_format(file_path), ",")
+
+    with open_source(file_path, newline="") as csv_file:
+        reader = csv.reader(csv_file, delimiter=delimiter)
+        header = next(reader, [])
+        missing_columns = [column for _, column in field_columns if column not in header]
+        if missing_columns != list():
+            raise InvalidColumnMapping(
+                f"The file {file_path} is missing the columns {missing_columns}.\n\tIts columns are {header}.")
+
+        indexes = [(field, header.index(column)) for field, column in field_columns]
+        for row in reader:
+            # Skip blank lines
+            if row == list():
+                continue
+            yield {field: row[index] if index < len(row) else "" for field, index in indexes}
+
+
+def iter_sqlite_rows(
+    db_path: str,
+    query: str,
+    fields: List[str],
+    columns: Optional[Dict[str, str]] = None,
+    after_rowid: Optional[int] = None,
+    rowid_column: str = "rowid"
+) -> Iterator[Dict[str, Any]]:
+    """Lazily load the rows returned by a query to a SQLite database, as dictionaries of the given fields.
+
+    The database is opened read-only and the rows are fetched `SQLITE_BATCH_SIZE` at a time.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to the SQLite database.
+    query : str
+        SELECT statement returning the columns of the fields (and, to resume, `rowid_column`).
+    fields : List[str]
+        Fields to load from each row.
+    columns : Optional[Dict[str, str]], optional
+        Mapping of fields to the names of the columns they are read from, by default None (each field is read from the column with its name)
+    after_rowid : Optional[int], optional
+        If given, only the rows with a larger `rowid_column` are loaded, in its order (to resume an interrupted batch), by default None
+    rowid_column : str, optional
+        Column of the query results with the row ids, by default "rowid"
+
+    Returns
+    -------
+    Iterator[Dict[str, Any]]
+        The fields of each row.
+
+    Raises
+    ------
+    InvalidSourceQuery
+        Raised when the query is missing or can't be run.
+    InvalidColumnMapping
+        Raised when the mapping has unknown fields, or the query results lack one of the columns.
+    """
+    if not isinstance(query, str) or query.strip() == "":
+        raise InvalidSourceQuery("Please provide the SELECT query that loads the rows of the SQLite database.")
+    field_columns = __field_columns(fields, columns)
+
+    parameters = ()
+    query = query.strip().rstrip(";")
+    if after_rowid is not None:
+        query = f'SELECT * FROM ({query}) WHERE "{rowid_column}" > ? ORDER BY "{rowid_column}"'
+        parameters = (after_rowid,)
+
+    connection = sqlite3.connect(f"file:{pathname2url(path.abspath(db_path))}?mode=ro", uri=True)
+    try:
+        try:
+            cursor = connection.execute(query, parameters)
+        except sqlite3.Error as error:
+            raise InvalidSourceQuery(f"The query to {db_path} could not be run: {error}")
+
+        header = [description[0] for description in cursor.description]
+        missing_columns = [column for _, column in field_columns if column not in header]
+        if missing_columns != list():
+            raise InvalidColumnMapping(
+                f"The query to {db_path} is missing the columns {missing_columns}.\n\tIts columns are {header}.")
+
+        indexes = [(field, header.index(column)) for field, column in field_columns]
+        rows = cursor.fetchmany(SQLITE_BATCH_SIZE)
+        while rows != list():
+            for row in rows:
+                yield {field: row[index] for field, index in indexes}
+            rows = cursor.fetchmany(SQLITE_BATCH_SIZE)
+    finally:
+        connection.close()
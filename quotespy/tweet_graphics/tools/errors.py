@@ -191,3 +191,63 @@ class InvalidTweetText(Exception):
             The error message.
         """
         self.msg = msg
+
+
+class InvalidPreviewScale(Exception):
+    """Error raised when the scale of a preview graphic is not a number between 0 (exclusive) and 1.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidPreviewScale with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidCanvasFit(Exception):
+    """Error raised when the padding or aspect ratio of a canvas fit to its content is not a valid number.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidCanvasFit with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidPicCacheDir(Exception):
+    """Error raised when the directory of the disk cache of profile pictures can't be used.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidPicCacheDir with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
+
+
+class InvalidPicResample(Exception):
+    """Error raised when the resampling filter chosen for profile pictures does not exist.
+    """
+
+    def __init__(self, msg: str):
+        """Initializes InvalidPicResample with an error message.
+
+        Parameters
+        ----------
+        msg : str
+            The error message.
+        """
+        self.msg = msg
@@ -0,0 +1,141 @@
+from textwrap import wrap
+from typing import Dict, List, Tuple
+from PIL import ImageFont
+from .type_interfaces import GraphicSettings, TweetInfo
+from ...tools.fonts import load_font, runs_width, split_runs
+
+
+class TweetLayout:
+    """Layout of a tweet graphic: fonts, wrapped lines (split into runs per font), their sizes and the dimensions of the header and of the text.
+
+    Computed once per tweet, so that each piece of text is wrapped and measured only once, both to calculate the content dimensions and to draw the graphic.
+    """
+
+    __slots__ = (
+        "font_header",
+        "font_text",
+        "header_fonts",
+        "text_fonts",
+        "user_name_lines",
+        "text_lines",
+        "user_name_runs",
+        "user_tag_runs",
+        "text_runs",
+        "user_name_sizes",
+        "user_tag_size",
+        "text_sizes",
+        "header_dimensions",
+        "text_dimensions",
+    )
+
+    @staticmethod
+    def __measure_line(
+        fonts: List[ImageFont.FreeTypeFont],
+        line: str,
+        runs: List[Tuple[int, str]]
+    ) -> Tuple[int, int]:
+        """Measure the width and height of a line of text (offset included), rasterizing it once.
+
+        Parameters
+        ----------
+        fonts : List[ImageFont.FreeTypeFont]
+            Main font followed by the fallback fonts.
+        line : str
+            Line of text.
+        runs : List[Tuple[int, str]]
+            Runs of the line per font (see `split_runs`).
+
+        Returns
+        -------
+        Tuple[int, int]
+            Width and height of the line (pixels).
+        """
+        font = fonts[0]
+        bbox = font.getmask(line).getbbox()
+        offset = font.font.getsize(line)[1]
+
+        # Lines drawn with fallback fonts are as wide as the sum of their runs
+        if len(runs) > 1:
+            return (runs_width(runs, fonts), bbox[3] + offset[1])
+
+        return (bbox[2] + offset[0], bbox[3] + offset[1])
+
+    def __init__(self, tweet_info: TweetInfo, graphic_settings: GraphicSettings):
+        """Initializes TweetLayout, wrapping and measuring all the text of the tweet.
+
+        Parameters
+        ----------
+        tweet_info : TweetInfo
+            Dictionary with all the tweet's information.
+        graphic_settings : GraphicSettings
+            Dictionary with the graphic's settings.
+        """
+        margin = graphic_settings["margin_bottom"]
+        profile_pic_size = graphic_settings["profile_pic_size"]
+        font_chain = [graphic_settings["font_family"]] + \
+            graphic_settings.get("fallback_fonts", [])
+
+        # Create all fonts needed (the main ones and their fallbacks)
+        self.header_fonts = [
+            load_font(font_family, graphic_settings["font_size_header"]) for font_family in font_chain]
+        self.text_fonts = [
+            load_font(font_family, graphic_settings["font_size_text"]) for font_family in font_chain]
+        self.font_header = self.header_fonts[0]
+        self.font_text = self.text_fonts[0]
+
+        # Wrap the username based on the presence of the profile picture and\
+        # the tweet's text based on the line character limit
+        username_char_limit = 19 if tweet_info["user_pic"] != "" else 38
+        self.user_name_lines = wrap(tweet_info["user_name"], username_char_limit)
+        self.text_lines = wrap(tweet_info["tweet_text"], graphic_settings["wrap_limit"])
+
+        # Split each line into runs of characters drawn with the same font
+        self.user_name_runs = [split_runs(line, font_chain) for line in self.user_name_lines]
+        self.user_tag_runs = split_runs(tweet_info["user_tag"], font_chain)
+        self.text_runs = [split_runs(line, font_chain) for line in self.text_lines]
+
+        # Width and height of each line
+        self.user_name_sizes = [
+            self.__measure_line(self.header_fonts, line, runs)
+            for line, runs in zip(self.user_name_lines, self.user_name_runs)]
+        self.user_tag_size = self.__measure_line(
+            self.header_fonts, tweet_info["user_tag"], self.user_tag_runs)
+        self.text_sizes = [
+            self.__measure_line(self.text_fonts, line, runs)
+            for line, runs in zip(self.text_lines, self.text_runs)]
+
+        # The header's text is as wide as the largest of the username lines\
+        # and the user tag, next to the profile picture
+        width_header_text = max(
+            [width for width, _ in self.user_name_sizes] + [self.user_tag_size[0]])
+        width_header = profile_pic_size[0] + margin + width_header_text
+
+        # Total username height is the sum of the height of each line, with\
+        # a margin between lines
+        height_user_name = sum(height for _, height in self.user_name_sizes) + \
+            margin * (len(self.user_name_sizes) - 1)
+        height_header_text = height_user_name + self.user_tag_size[1] + margin
+        # If the header's text is taller than the profile picture, than that's\
+        # the header height (otherwise, the profile picture sets it)
+        if (height_header_text + margin) > profile_pic_size[1]:
+            height_header = height_header_text
+        else:
+            height_header = profile_pic_size[1]
+
+        # The text's width is set by the largest line and its height is the\
+        # sum of the height of each line (the last one without bottom margin)
+        width_text = max(width for width, _ in self.text_sizes)
+        height_text = sum(height for _, height in self.text_sizes) + \
+            margin * (len(self.text_sizes) - 1)
+
+        self.header_dimensions = [width_header, height_header]
+        self.text_dimensions = [width_text, height_text]
+
+    @property
+    def dimensions(self) -> Dict[str, List[int]]:
+        """Dimensions (width and height) of the header and of the text.
+        """
+        return {
+            "header": list(self.header_dimensions),
+            "text": list(self.text_dimensions),
+        }
@@ -36,3 +36,15 @@ class DefaultFormats(Enum):
     LIGHT = "light"
     DARK = "dark"
     BLUE = "blue"
+
+
+class PicResample(Enum):
+    """Contains the resampling filters available to resize profile pictures.
+    """
+
+    NEAREST = "nearest"
+    BOX = "box"
+    BILINEAR = "bilinear"
+    HAMMING = "hamming"
+    BICUBIC = "bicubic"
+    LANCZOS = "lanczos"
@@ -1,257 +1,196 @@
+import hashlib
 import json
-from textwrap import wrap
-from typing import Dict, List, Tuple, Union
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-from .type_interfaces import GraphicSettings, TweetInfo
-
-
-def __calculate_header_height(
-    tweet_info: TweetInfo,
-    graphic_settings: GraphicSettings,
-    font: ImageFont.FreeTypeFont,
-) -> float:
-    """Calculate the header height: username, user tag and profile picture.
+import os
+from math import ceil
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from PIL import Image, ImageDraw, ImageFont
+from .errors import MissingDictKeys
+from .layout import TweetLayout
+from .type_interfaces import GraphicSettings, PicResample, TweetInfo
+from ...tools.fonts import load_font
+from ...tools.utils import (
+    DELIMITERS,
+    SQLITE_FORMATS,
+    STREAMED_FORMATS,
+    iter_csv_rows,
+    iter_json_lines,
+    iter_sqlite_rows,
+    open_source,
+    source_format,
+)
+
+
+# Resampling filters (by name) used to resize profile pictures
+RESAMPLE_FILTERS = {
+    PicResample.NEAREST.value: Image.NEAREST,
+    PicResample.BOX.value: Image.BOX,
+    PicResample.BILINEAR.value: Image.BILINEAR,
+    PicResample.HAMMING.value: Image.HAMMING,
+    PicResample.BICUBIC.value: Image.BICUBIC,
+    PicResample.LANCZOS.value: Image.LANCZOS,
+}
+# Large pictures are first reduced (by an integer factor) to up to this many\
+# times the final size, and only then resampled with the chosen filter
+REDUCING_GAP = 2.0
+
+
+@lru_cache(maxsize=32)
+def __ellipse_mask(dimensions: Tuple[int, int]) -> Image.Image:
+    """Create (once per dimensions) the mask for the circular crop of profile pictures.
 
     Parameters
     ----------
-    tweet_info : TweetInfo
-        Dictionary with all the tweet's information.
-    graphic_settings : GraphicSettings
-        Dictionary with the graphic's settings.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the header.
+    dimensions : Tuple[int, int]
+        Width and height of the profile picture.
 
     Returns
     -------
-    float
-        Height needed for the header (pixels).
-    """
-    user_pic = tweet_info["user_pic"]
-    height_margin = graphic_settings["margin_bottom"]
-    profile_pic_size = graphic_settings["profile_pic_size"]
-    user_name = tweet_info["user_name"]
-    user_tag = tweet_info["user_tag"]
-
-    # Calculate the height of the header's text: user name and user tag
-    height_user_name = __calculate_username_height(user_name, user_pic, height_margin, font)
-    height_usertag = font.getmask(user_tag).getbbox()[3] + font.font.getsize(user_tag)[1][1]
-    height_header_text = height_user_name + height_usertag + height_margin
-
-    # If the header's text is taller than the profile picture, than that's\
-    # the header height
-    if (height_header_text + height_margin) > profile_pic_size[1]:
-        height_header = height_header_text
-    # Otherwise, the profile picture sets the header height
-    else:
-        height_header = profile_pic_size[1]
-
-    return height_header
-
-
-def __calculate_header_width(
-    tweet_info: TweetInfo,
-    graphic_settings: GraphicSettings,
-    font_header: ImageFont.FreeTypeFont
-) -> float:
-    """Calculate the width of the header.
-
-    Parameters
-    ----------
-    tweet_info : TweetInfo
-        Dictionary with all the tweet's information.
-    graphic_settings : GraphicSettings
-        Dictionary with the graphic's settings.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the text.
-
-    Returns
-    -------
-    float
-        Width needed to draw the header (pixels).
+    Image.Image
+        Mask with a white ellipse on a black background.
     """
-    # Calculate the header of the profile picture
-    profile_pic_width = graphic_settings["profile_pic_size"][0]
-    # Calculate the user name width
-    username_width = __calculate_username_width(
-        tweet_info["user_name"],
-        tweet_info["user_pic"],
-        font_header
-    )
-    # Calculate the user tag width
-    user_tag = tweet_info["user_tag"]
-    usertag_width = font_header.getmask(user_tag).getbbox()[2] +\
-        font_header.font.getsize(user_tag)[1][0]
-
-    # The width of the header's text is set by the largest of the user\
-    # name and user tag
-    if username_width > usertag_width:
-        text_width = username_width
-    else:
-        text_width = usertag_width
+    mask = Image.new("L", dimensions, 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0) + dimensions, fill=255)
 
-    # The header width is given as the sum of the profile picture and\
-    # the header text width
-    width_header = profile_pic_width + \
-        graphic_settings["margin_bottom"] + text_width
+    return mask
 
-    return width_header
 
+def __crop_pic(
+    pic_source: str,
+    dimensions: Tuple[int, int],
+    pic_resample: str = PicResample.BICUBIC.value
+) -> Image.Image:
+    """Load a profile picture, resize and crop it to be circular.
 
-def __calculate_text_height(
-    tweet_info: TweetInfo,
-    graphic_settings: GraphicSettings,
-    font: ImageFont.FreeTypeFont,
-) -> float:
-    """Calculate the height needed to draw the tweet text.
+    Large JPEG pictures are decoded at a reduced scale (1/2, 1/4 or 1/8) still larger than needed, and reduced by an integer factor before the final resampling, so that they are never decoded and resampled at full resolution.
 
     Parameters
     ----------
-    tweet_info : TweetInfo
-        Dictionary with all the tweet's information.
-    graphic_settings : GraphicSettings
-        Dictionary with the graphic's settings.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the text.
+    pic_source : str
+        Path to the user's profile picture.
+    dimensions : Tuple[int, int]
+        Final width and height of the profile picture.
+    pic_resample : str, optional
+        Resampling filter used for the final resize, by default PicResample.BICUBIC.value
 
     Returns
     -------
-    float
-        Height needed to draw the text (pixels).
+    Image.Image
+        Resized and cropped user profile.
     """
-    # Wrap the tweet's text based on the line character limit
-    text_wrapped = wrap(
-        tweet_info["tweet_text"],
-        graphic_settings["wrap_limit"]
-    )
-    height_margin = graphic_settings["margin_bottom"]
+    with Image.open(pic_source, "r") as pic:
+        # Decode only as many pixels as the crop needs (JPEG only)
+        scale = max(dimensions[0] / pic.width, dimensions[1] / pic.height)
+        if scale < 1:
+            pic.draft(pic.mode, (ceil(pic.width * scale), ceil(pic.height * scale)))
+
+        # Crop the largest area with the final aspect ratio from the top\
+        # left corner (like `ImageOps.fit` with centering (0, 0))
+        width, height = pic.size
+        ratio = dimensions[0] / dimensions[1]
+        if width / height >= ratio:
+            crop_box = (0, 0, height * ratio, height)
+        else:
+            crop_box = (0, 0, width, width / ratio)
+
+        cropped_pic = pic.resize(
+            dimensions,
+            RESAMPLE_FILTERS[pic_resample],
+            box=crop_box,
+            reducing_gap=REDUCING_GAP
+        )
+    cropped_pic.putalpha(__ellipse_mask(dimensions))
 
-    # Total text height is the sum of height of each text line
-    heights_text = [
-        font.getmask(line).getbbox()[3] +
-        font.font.getsize(line)[1][1] +
-        height_margin
-        for line in text_wrapped]
-    # Last line does not have bottom margin
-    heights_text[-1] -= height_margin
-    total_text_height = sum(heights_text)
+    return cropped_pic
 
-    return total_text_height
 
-
-def __calculate_text_width(
-    tweet_info: TweetInfo,
-    graphic_settings: GraphicSettings,
-    font: ImageFont.FreeTypeFont
-) -> float:
-    """Calculate the width of the tweet content. 
-    The width is given as the width of the largest tweet text line.
+def __cached_pic_path(
+    pic_source: str,
+    dimensions: Tuple[int, int],
+    pic_resample: str,
+    cache_dir: str
+) -> str:
+    """Path of a processed profile picture in the disk cache, named after the hash of the picture's content, its final dimensions and the resampling filter.
 
     Parameters
     ----------
-    tweet_info : TweetInfo
-        Dictionary with all the tweet's information.
-    graphic_settings : GraphicSettings
-        Dictionary with the graphic's settings.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the text.
+    pic_source : str
+        Path to the user's profile picture.
+    dimensions : Tuple[int, int]
+        Final width and height of the profile picture.
+    pic_resample : str
+        Resampling filter used to resize the picture.
+    cache_dir : str
+        Directory of the disk cache.
 
     Returns
     -------
-    float
-        Width needed to draw the text.
+    str
+        Path to the processed picture (which may not exist yet).
     """
-    # Break the text into multiple lines based on the character limit
-    text_wrapped = wrap(
-        tweet_info["tweet_text"],
-        graphic_settings["wrap_limit"]
-    )
-
-    # The text's width is set by the largest text line
-    width_text = max([
-        font.getmask(text_line).getbbox()[2] +
-        font.font.getsize(text_line)[1][0]
-        for text_line in text_wrapped
-    ])
-
-    return width_text
-
-
-def __calculate_username_width(
-    user_name: str,
-    user_pic: str,
-    font: ImageFont.FreeTypeFont
-) -> float:
-    """Calculate the width of the username.
-    The width is given as the width of the largest username line (in case it is broken up into multiple lines).
-
-    user_name : str
-        User name.
-    user_pic : str
-        Path to the profile picture.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the username (header).
+    content_hash = hashlib.sha256()
+    with open(pic_source, "rb") as pic_file:
+        for chunk in iter(lambda: pic_file.read(1 << 20), b""):
+            content_hash.update(chunk)
+
+    return os.path.join(
+        cache_dir, f"{content_hash.hexdigest()}_{dimensions[0]}x{dimensions[1]}_{pic_resample}.png")
+
+
+@lru_cache(maxsize=128)
+def __load_processed_pic(
+    pic_source: str,
+    modified_time: int,
+    file_size: int,
+    dimensions: Tuple[int, int],
+    pic_resample: str = PicResample.BICUBIC.value,
+    cache_dir: Optional[str] = None
+) -> Image.Image:
+    """Load a profile picture, resize and crop it to be circular, once per process for the same file (path, modification time and size) and dimensions.
 
-    Returns
-    -------
-    float
-        Width needed to draw the username.
-    """
-    # Calculate username character limit per line based on the presence of\
-    # the profile picture
-    username_char_limit = 19 if user_pic != "" else 38
-    # Break the text into multiple lines based on the character limit
-    username_wrapped = wrap(user_name, username_char_limit)
-
-    # The username's width is set by the largest username text line
-    width_username = max([
-        font.getmask(text_line).getbbox()[2] +
-        font.font.getsize(text_line)[1][0]
-        for text_line in username_wrapped
-    ])
-
-    return width_username
-
-
-def __calculate_username_height(
-    user_name: str,
-    user_pic: str,
-    height_margin: int,
-    font: ImageFont.FreeTypeFont
-) -> float:
-    """Calculate the height of the username.
-    The height is given as the sum of the heights each line of username (when the username exceeds the limit of characters per line).
+    With a disk cache, the processed picture is loaded from it if it was already processed (by any process), and saved to it otherwise.
 
     Parameters
     ----------
-    user_name : str
-        User name.
-    user_pic : str
-        Path to the profile picture.
-    height_margin: int
-        Vertical margin between lines of text.
-    font : ImageFont.FreeTypeFont
-        Font to be used for the username (header).
+    pic_source : str
+        Path to the user's profile picture.
+    modified_time : int
+        Last modification time of the file (nanoseconds), so that changed pictures are loaded again.
+    file_size : int
+        Size of the file (bytes).
+    dimensions : Tuple[int, int]
+        Final width and height of the profile picture.
+    pic_resample : str, optional
+        Resampling filter used to resize the picture, by default PicResample.BICUBIC.value
+    cache_dir : Optional[str], optional
+        Directory of the disk cache of processed pictures, by default None (no disk cache)
 
     Returns
     -------
-    float
-        Height needed to draw the username.
+    Image.Image
+        Resized and cropped user profile (shared between calls, so it must not be modified).
     """
-    # Wrap the username into multiple lines as needed
-    username_char_limit = 19 if user_pic != "" else 38
-    user_name = wrap(user_name, username_char_limit)
-
-    # Total username height is the sum of height of each username line
-    heights_username = [
-        font.getmask(line).getbbox()[3] +
-        font.font.getsize(line)[1][1] +
-        height_margin
-        for line in user_name]
-    # Last line does not have bottom margin
-    heights_username[-1] -= height_margin
-    total_height_username = sum(heights_username)
+    if cache_dir is None:
+        return __crop_pic(pic_source, dimensions, pic_resample)
+
+    cached_path = __cached_pic_path(pic_source, dimensions, pic_resample, cache_dir)
+    if os.path.isfile(cached_path):
+        with Image.open(cached_path, "r") as cached_pic:
+            cached_pic.load()
+            if cached_pic.mode == "RGBA" and cached_pic.size == dimensions:
+                return cached_pic.copy()
+
+    # Cached pictures are always RGBA (e.g. grayscale ones are cropped to\
+    # "LA"), so that they are recognized when loaded
+    cropped_pic = __crop_pic(pic_source, dimensions, pic_resample).convert("RGBA")
+    # Write to a temporary file first, so that other processes never load\
+    # a partially written picture
+    temp_path = f"{cached_path}.{os.getpid()}.tmp"
+    cropped_pic.save(temp_path, format="PNG")
+    os.replace(temp_path, cached_path)
 
-    return total_height_username
+    return cropped_pic
 
 
 def process_pic(
@@ -260,6 +199,8 @@ def process_pic(
 ) -> Image.Image:
     """Load the user profile picture, resize and crop it to be circular and 10% of the graphic size.
 
+    The processed picture is cached per process, so each profile picture is only decoded and cropped once for the same dimensions (e.g. for many tweets of the same account). If the settings include a `pic_cache_dir`, processed pictures are also kept there, to be reused by other processes and later runs. The resampling filter is read from the `pic_resample` setting (bicubic by default).
+
     Parameters
     ----------
     graphic_settings : GraphicSettings
@@ -270,11 +211,8 @@ def process_pic(
     Returns
     -------
     Image.Image
-        Resized and cropped user profile, ready to be drawn in the final graphic.
+        Resized and cropped user profile, ready to be drawn in the final graphic (it must not be modified).
     """
-    # Load the profile picture
-    pic = Image.open(pic_source, "r")
-
     graphic_dimensions = graphic_settings["size"]
     profile_pic_dimensions = graphic_settings["profile_pic_size"]
 
@@ -287,16 +225,16 @@ def process_pic(
     else:
         new_dimensions = tuple(profile_pic_dimensions)
 
-    # Create a mask for the circular crop
-    mask = Image.new("L", new_dimensions, 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse((0, 0) + new_dimensions, fill=255)
-
-    # Resize and crop the profile picture based on the circular mask
-    cropped_pic = ImageOps.fit(pic, mask.size, centering=(0, 0))
-    cropped_pic.putalpha(mask)
+    pic_stats = os.stat(pic_source)
 
-    return cropped_pic
+    return __load_processed_pic(
+        pic_source,
+        pic_stats.st_mtime_ns,
+        pic_stats.st_size,
+        new_dimensions,
+        graphic_settings.get("pic_resample", PicResample.BICUBIC.value),
+        graphic_settings.get("pic_cache_dir")
+    )
 
 
 def create_graphic_fonts(
@@ -319,10 +257,8 @@ def create_graphic_fonts(
     font_size_text = graphic_settings["font_size_text"]
     font_size_header = graphic_settings["font_size_header"]
     # Create the fonts
-    font_header = ImageFont.truetype(
-        font_family, font_size_header, encoding="utf-8")
-    font_text = ImageFont.truetype(
-        font_family, font_size_text, encoding="utf-8")
+    font_header = load_font(font_family, font_size_header)
+    font_text = load_font(font_family, font_size_text)
 
     return [font_header, font_text]
 
@@ -346,34 +282,10 @@ def calculate_content_dimensions(
         Dictionary with the dimensions of the header (without profile picture) and of the text.
     """
 
-    # Create all fonts needed
-    font_header, font_text = create_graphic_fonts(graphic_settings)
+    # Wrap and measure all the text of the tweet
+    layout = TweetLayout(tweet_info, graphic_settings)
 
-    # Calculate the height needed for the header
-    height_header = __calculate_header_height(
-        tweet_info, graphic_settings, font_header
-    )
-
-    width_header = __calculate_header_width(
-        tweet_info, graphic_settings, font_header)
-
-    # Calculate the width needed for the tweet text
-    width_text = __calculate_text_width(
-        tweet_info, graphic_settings, font_text
-    )
-
-    # Calculate the height needed for the tweet text
-    height_text = __calculate_text_height(
-        tweet_info, graphic_settings, font_text
-    )
-
-    # Agreggate the header and text heights in a single dictionary
-    dimensions = {
-        "header": [width_header, height_header],
-        "text": [width_text, height_text],
-    }
-
-    return dimensions
+    return layout.dimensions
 
 
 def parse_json_settings(file_path: str) -> GraphicSettings:
@@ -394,20 +306,80 @@ def parse_json_settings(file_path: str) -> GraphicSettings:
     return json_settings
 
 
-def get_ready_tweets(file_path: str) -> List[TweetInfo]:
-    """Load a list of tweets (`tweet_info`) from a .json file.
+def get_ready_tweets(
+    file_path: str,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None
+) -> List[TweetInfo]:
+    """Load a list of tweets (`tweet_info`) from a .json (or .jsonl, .csv or .tsv) file or a SQLite database (.db, .sqlite or .sqlite3).
+
+    Files compressed with gzip, bzip2 or xz (e.g. "tweets.json.gz") are decompressed on the fly.
 
     Parameters
     ----------
     file_path : str
-        Path to the .json file.
+        Path to the .json, .jsonl, .csv or .tsv file (or to the SQLite database).
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of `tweet_info` fields to the columns they are read from, by default None (each field from the column with its name)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the tweets, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the tweets with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch, by default None
 
     Returns
     -------
     List[TweetInfo]
         List of `tweet_info` dictionaries.
     """
-    with open(file_path, "r", encoding="utf-8") as json_file:
+    if source_format(file_path) in STREAMED_FORMATS:
+        return list(iter_ready_tweets(file_path, columns, query, after_rowid))
+
+    with open_source(file_path) as json_file:
         json_tweets = json.load(json_file)
 
     return json_tweets
+
+
+def iter_ready_tweets(
+    file_path: str,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None
+) -> Iterator[TweetInfo]:
+    """Lazily load tweets (`tweet_info`) from a JSON Lines (.jsonl) file, one per line, from a CSV (or TSV) file with a header, one per row, or from a SQLite database, one per row returned by `query`.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the .jsonl, .csv or .tsv file (or to the SQLite database).
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of `tweet_info` fields to the columns they are read from, by default None (each field from the column with its name)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the tweets, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the tweets with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch, by default None
+
+    Returns
+    -------
+    Iterator[TweetInfo]
+        `tweet_info` dictionaries, as they are read.
+
+    Raises
+    ------
+    MissingDictKeys
+        Raised when a line of a .jsonl file is not a JSON object.
+    """
+    if source_format(file_path) in DELIMITERS:
+        fields = list(TweetInfo.__annotations__.keys())
+        yield from iter_csv_rows(file_path, fields, columns)
+        return
+    if source_format(file_path) in SQLITE_FORMATS:
+        fields = list(TweetInfo.__annotations__.keys())
+        yield from iter_sqlite_rows(file_path, query, fields, columns, after_rowid)
+        return
+
+    for tweet in iter_json_lines(file_path):
+        if not isinstance(tweet, dict):
+            raise MissingDictKeys("Each line of a .jsonl file must be a `tweet_info` JSON object.")
+        yield tweet
@@ -1,11 +1,17 @@
+import os
+from functools import lru_cache
 from re import findall
 from typing import Dict, List, Optional, Tuple, Union
 from PIL import Image, ImageFont, ImageColor
 from .errors import (
     FontNotFound,
+    InvalidCanvasFit,
     InvalidColorFormat,
     InvalidFieldLength,
     InvalidFormatOption,
+    InvalidPicCacheDir,
+    InvalidPicResample,
+    InvalidPreviewScale,
     InvalidProfilePicturePath,
     InvalidProfilePictureDimensions,
     InvalidTweetName,
@@ -16,7 +22,7 @@ from .errors import (
     MissingGraphicSettings,
     MissingDictKeys
 )
-from .type_interfaces import DefaultFormats, GraphicSettings, TweetInfo
+from .type_interfaces import DefaultFormats, GraphicSettings, PicResample, TweetInfo
 
 
 def __validate_dict_keys(
@@ -433,29 +439,24 @@ def validate_format_option(format_option: str) -> str:
         raise InvalidFormatOption(error_msg)
 
 
-def validate_g_settings(
-    tweet_info: TweetInfo,
-    g_settings: GraphicSettings
-) -> GraphicSettings:
-    """Validate a complete `graphic_settings` dictionary.
+def validate_shared_g_settings(g_settings: GraphicSettings) -> GraphicSettings:
+    """Validate the fields of a `graphic_settings` dictionary that do not depend on the tweet.
+
+    The `profile_pic_size` field depends on the tweet's profile picture, so only its length is validated here. Use `validate_tweet_g_settings` to finish the validation for a given tweet.
 
     Parameters
     ----------
-    tweet_info : TweetInfo
-        Dictionary with the necessary information about the tweet.
     g_settings : GraphicSettings
         Dictionary of graphic settings.
 
     Returns
     -------
     GraphicSettings
-        Validated dictionary.
+        Validated dictionary, with `profile_pic_size` still as given.
     """
     # Validate if the dictionary has all the required fields
     __validate_dict_keys(g_settings, GraphicSettings, "graphic_settings")
 
-    user_pic = tweet_info["user_pic"]
-
     font_family_error_msg = f"The font {g_settings['font_family']} was not in found in your machine.\n\tPlease note you can provide an absolute path to your font if needed."
     font_family_validated = __validate_font_family(
         g_settings["font_family"], font_family_error_msg
@@ -477,11 +478,9 @@ def validate_g_settings(
         g_settings["size"], size_error_msg_length, size_error_msg_type
     )
 
-    prof_pic_error_msg_type = "Please provide a list of two integers for the final width and height of the profile picture, taking into account the width and the height must be the same."
     prof_pic_error_msg_length = "Please provide two measures for the profile picture size: one for the width and a second for the height."
-    profile_pic_size_validated = __validate_profile_pic_size(
-        g_settings["profile_pic_size"], user_pic, prof_pic_error_msg_length, prof_pic_error_msg_type
-    )
+    if len(g_settings["profile_pic_size"]) != 2:
+        raise InvalidFieldLength(prof_pic_error_msg_length)
 
     color_scheme_error_msg_format = (
         "Please provide either Hexadecimal or RGBA values for the background and text colors, as strings. The transparency value for RGBA colors must be a number between 0 and 1, where 0 is completely transparent and 1 is completely opaque. However, the background color can also be `None` for transparent backgrounds."
@@ -510,7 +509,7 @@ def validate_g_settings(
         "font_size_header": font_size_header_validated,
         "font_size_text": font_size_text_validated,
         "size": size_validated,
-        "profile_pic_size": profile_pic_size_validated,
+        "profile_pic_size": g_settings["profile_pic_size"],
         "color_scheme": color_scheme_validated,
         "wrap_limit": wrap_limit_validated,
         "margin_bottom": margin_bottom_validated
@@ -519,6 +518,61 @@ def validate_g_settings(
     return validated_settings
 
 
+def validate_tweet_g_settings(
+    tweet_info: TweetInfo,
+    shared_settings: GraphicSettings
+) -> GraphicSettings:
+    """Finish the validation of a `graphic_settings` dictionary already validated by `validate_shared_g_settings`, for a given tweet.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    shared_settings : GraphicSettings
+        Dictionary of graphic settings returned by `validate_shared_g_settings`.
+
+    Returns
+    -------
+    GraphicSettings
+        Validated dictionary.
+    """
+    prof_pic_error_msg_type = "Please provide a list of two integers for the final width and height of the profile picture, taking into account the width and the height must be the same."
+    prof_pic_error_msg_length = "Please provide two measures for the profile picture size: one for the width and a second for the height."
+    profile_pic_size_validated = __validate_profile_pic_size(
+        shared_settings["profile_pic_size"], tweet_info["user_pic"], prof_pic_error_msg_length, prof_pic_error_msg_type
+    )
+
+    # Copy the shared settings so they can be reused for other tweets
+    validated_settings = dict(shared_settings)
+    validated_settings["profile_pic_size"] = profile_pic_size_validated
+
+    return validated_settings
+
+
+def validate_g_settings(
+    tweet_info: TweetInfo,
+    g_settings: GraphicSettings
+) -> GraphicSettings:
+    """Validate a complete `graphic_settings` dictionary.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    g_settings : GraphicSettings
+        Dictionary of graphic settings.
+
+    Returns
+    -------
+    GraphicSettings
+        Validated dictionary.
+    """
+    shared_settings = validate_shared_g_settings(g_settings)
+    validated_settings = validate_tweet_g_settings(tweet_info, shared_settings)
+
+    return validated_settings
+
+
 def __validate_tweet_name(tweet_name: str, error_msg: str) -> str:
     """Validate the tweet's name.
 
@@ -602,6 +656,23 @@ def __validate_user_tag(user_tag: str, error_msg: str) -> str:
         return "@" + user_tag
 
 
+@lru_cache(maxsize=256)
+def __probe_user_pic(user_pic_path: str, modified_time: int, file_size: int) -> None:
+    """Check (once per process for the same file) that the profile picture can be opened as an image.
+
+    Parameters
+    ----------
+    user_pic_path : str
+        Path to the profile picture.
+    modified_time : int
+        Last modification time of the file (nanoseconds), so that changed pictures are checked again.
+    file_size : int
+        Size of the file (bytes).
+    """
+    with Image.open(user_pic_path, "r"):
+        pass
+
+
 def __validate_user_pic(user_pic_path: str, error_msg: str) -> str:
     """Validate the path to the user's profile picture.
 
@@ -624,7 +695,8 @@ def __validate_user_pic(user_pic_path: str, error_msg: str) -> str:
     """
     try:
         if user_pic_path != "":
-            pic = Image.open(user_pic_path, "r")
+            pic_stats = os.stat(user_pic_path)
+            __probe_user_pic(user_pic_path, pic_stats.st_mtime_ns, pic_stats.st_size)
             return user_pic_path
         else:
             return user_pic_path
@@ -705,3 +777,161 @@ def validate_tweet_info(t_info: TweetInfo) -> TweetInfo:
     }
 
     return t_info_validated
+
+
+def validate_preview_scale(scale: float) -> float:
+    """Validate the fraction of the graphic's size at which to draw a preview.
+
+    Parameters
+    ----------
+    scale : float
+        Fraction of the graphic's size.
+
+    Returns
+    -------
+    float
+        Validated scale.
+
+    Raises
+    ------
+    InvalidPreviewScale
+        Raised when the scale is not a number between 0 (exclusive) and 1.
+    """
+    error_msg = "Please provide a number between 0 (exclusive) and 1 for the preview scale (e.g. 0.25 for a quarter of the graphic's size)."
+    try:
+        scale = float(scale)
+    except (TypeError, ValueError):
+        raise InvalidPreviewScale(error_msg)
+
+    if (scale <= 0) or (scale > 1):
+        raise InvalidPreviewScale(error_msg)
+
+    return scale
+
+
+def validate_canvas_fit(
+    padding: int,
+    aspect_ratio: Optional[float] = None
+) -> Tuple[int, Optional[float]]:
+    """Validate the padding and aspect ratio of a canvas sized to fit its content.
+
+    Parameters
+    ----------
+    padding : int
+        Space around the content (pixels).
+    aspect_ratio : Optional[float], optional
+        Width divided by height of the canvas, by default None (no fixed aspect ratio)
+
+    Returns
+    -------
+    Tuple[int, Optional[float]]
+        Validated padding and aspect ratio.
+
+    Raises
+    ------
+    InvalidCanvasFit
+        Raised when the padding is not a non-negative integer or the aspect ratio is not a positive number.
+    """
+    if isinstance(padding, bool) or not isinstance(padding, int) or padding < 0:
+        raise InvalidCanvasFit(
+            "Please provide a non-negative integer for the padding around the content (pixels).")
+
+    if aspect_ratio is not None:
+        error_msg = "Please provide a positive number for the aspect ratio (width divided by height, e.g. 1 for a square graphic)."
+        try:
+            aspect_ratio = float(aspect_ratio)
+        except (TypeError, ValueError):
+            raise InvalidCanvasFit(error_msg)
+        if aspect_ratio <= 0:
+            raise InvalidCanvasFit(error_msg)
+
+    return (padding, aspect_ratio)
+
+
+def validate_fallback_fonts(fallback_fonts: List[str]) -> List[str]:
+    """Validate the fonts used for characters the main font can't draw.
+
+    Parameters
+    ----------
+    fallback_fonts : List[str]
+        Names of (or paths to) the fallback fonts, in order of preference.
+
+    Returns
+    -------
+    List[str]
+        Validated font names (including the file extension).
+
+    Raises
+    ------
+    FontNotFound
+        Raised when a font is not found on the user's machine (or the fonts are not given as a list).
+    """
+    if not isinstance(fallback_fonts, (list, tuple)):
+        raise FontNotFound("Please provide the fallback fonts as a list of font names (or paths).")
+
+    validated_fonts = []
+    for font_family in fallback_fonts:
+        error_msg = f"The fallback font {font_family} was not in found in your machine.\n\tPlease note you can provide an absolute path to your font if needed."
+        if not isinstance(font_family, str):
+            raise FontNotFound(error_msg)
+        validated_fonts.append(__validate_font_family(font_family, error_msg))
+
+    return validated_fonts
+
+
+def validate_pic_cache_dir(cache_dir: str) -> str:
+    """Validate the directory of the disk cache of processed profile pictures, creating it if needed.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path to the directory.
+
+    Returns
+    -------
+    str
+        Absolute path to the directory.
+
+    Raises
+    ------
+    InvalidPicCacheDir
+        Raised when the path is not a string or the directory can't be created or written to.
+    """
+    if not isinstance(cache_dir, str) or cache_dir == "":
+        raise InvalidPicCacheDir("Please provide the path to the profile picture cache directory as a string.")
+
+    cache_dir = os.path.abspath(cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        raise InvalidPicCacheDir(f"The profile picture cache directory {cache_dir} could not be created.")
+    if not os.access(cache_dir, os.W_OK):
+        raise InvalidPicCacheDir(f"The profile picture cache directory {cache_dir} is not writable.")
+
+    return cache_dir
+
+
+def validate_pic_resample(pic_resample: str) -> str:
+    """Validate that the user chose an existing resampling filter for the profile pictures.
+
+    Parameters
+    ----------
+    pic_resample : str
+        Resampling filter chosen.
+
+    Returns
+    -------
+    str
+        Validated resampling filter.
+
+    Raises
+    ------
+    InvalidPicResample
+        Raised when the resampling filter does not exist.
+    """
+    valid_options = [option.value for option in PicResample]
+    if isinstance(pic_resample, str) and pic_resample.lower() in valid_options:
+        return pic_resample.lower()
+    else:
+        error_msg = f"You chose an invalid resampling filter for the profile pictures.\n\tPlease choose one of this: {valid_options}"
+        raise InvalidPicResample(error_msg)
@@ -1,28 +1,59 @@
-from os import path
+from collections import OrderedDict
+from math import ceil
+from os import path, stat
 from textwrap import wrap
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple, Union
 from PIL import Image, ImageDraw, ImageFont
 from .tools.default_settings import (
     blue_mode_settings,
     dark_mode_settings,
     light_mode_settings,
 )
-from .tools.type_interfaces import DefaultFormats, GraphicSettings, TweetInfo
+from .tools.layout import TweetLayout
+from .tools.type_interfaces import DefaultFormats, GraphicSettings, PicResample, TweetInfo
 from .tools.utils import (
     calculate_content_dimensions,
     get_ready_tweets,
+    iter_ready_tweets,
     parse_json_settings,
     process_pic,
-    create_graphic_fonts
 )
+from ..tools.batch import canvas_bytes, render_batch
+from ..tools.dedup import RenderDeduplicator
+from ..tools.output import ShardedLayout, open_sink, save_image
+from ..tools.fonts import draw_runs, missing_glyphs
+from ..tools.type_interfaces import BatchJob, PreflightReport
+from ..tools.utils import STREAMED_FORMATS, in_shard, source_format, validate_shard
 from .tools.validation import (
+    validate_canvas_fit,
+    validate_fallback_fonts,
     validate_format_option,
-    validate_g_settings,
+    validate_pic_cache_dir,
+    validate_pic_resample,
+    validate_preview_scale,
     validate_settings_existence,
+    validate_shared_g_settings,
+    validate_tweet_g_settings,
     validate_tweet_info,
 )
 
 
+# Maximum number of header tiles kept in memory (per process)
+HEADER_TILES_CACHE_SIZE = 64
+# Settings the header of a tweet depends on
+HEADER_SETTINGS = (
+    "font_family",
+    "font_size_header",
+    "profile_pic_size",
+    "color_scheme",
+    "margin_bottom",
+    "fallback_fonts",
+    "pic_resample",
+)
+# Header tiles drawn, from least to most recently used
+__header_tiles: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+
+
 def __load_default_settings(default_settings_format: str) -> GraphicSettings:
     """Based on the option chosen, load default graphic settings.
 
@@ -44,18 +75,15 @@ def __load_default_settings(default_settings_format: str) -> GraphicSettings:
         return dark_mode_settings
 
 
-def __choose_graphic_settings(
-    tweet_info: TweetInfo,
+def __choose_shared_settings(
     graphic_settings: GraphicSettings,
     default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
 ) -> GraphicSettings:
     """Based on the custom graphic settings and (lack of) default settings passed,
-    choose the settings to be used.
+    choose and validate the settings shared by every tweet.
 
     Parameters
     ----------
-    tweet_info : TweetInfo
-        Dictionary with the necessary information about the tweet.
     graphic_settings : GraphicSettings
         Custom graphic settings dictionary.
     default_settings_format : DefaultFormats, optional
@@ -64,7 +92,7 @@ def __choose_graphic_settings(
     Returns
     -------
     GraphicSettings
-        A dictionary of graphic settings to be used.
+        A dictionary of graphic settings, whose `profile_pic_size` is yet to be validated for a given tweet.
     """
     # Validate that either custom or default settings were passed
     validate_settings_existence(graphic_settings, default_settings_format)
@@ -82,7 +110,37 @@ def __choose_graphic_settings(
     else:
         chosen_settings = graphic_settings
     # Validate the chosen settings, independent of it being custom or default settings
-    validated_settings = validate_g_settings(tweet_info, chosen_settings)
+    validated_settings = validate_shared_g_settings(chosen_settings)
+
+    return validated_settings
+
+
+def __choose_graphic_settings(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings,
+    default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
+) -> GraphicSettings:
+    """Based on the custom graphic settings and (lack of) default settings passed,
+    choose the settings to be used.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Custom graphic settings dictionary.
+    default_settings_format : DefaultFormats, optional
+        Default graphic settings format, by default DefaultFormats.CUSTOM.value
+
+    Returns
+    -------
+    GraphicSettings
+        A dictionary of graphic settings to be used.
+    """
+    shared_settings = __choose_shared_settings(
+        graphic_settings, default_settings_format)
+    # Only the profile picture size depends on the tweet itself
+    validated_settings = validate_tweet_g_settings(tweet_info, shared_settings)
 
     return validated_settings
 
@@ -95,7 +153,8 @@ def __draw_header_with_profile_pic(
     coordinates: Tuple[int],
     header_height: int,
     font_header: ImageFont.FreeTypeFont,
-    profile_picture: Image.Image
+    profile_picture: Image.Image,
+    tweet_layout: Optional[TweetLayout] = None
 ) -> int:
     """Draw the graphic's header: username, user tag and profile picture.
 
@@ -117,6 +176,8 @@ def __draw_header_with_profile_pic(
         Font used for the header.
     profile_picture : Image.Image
         Profile picture ready to be drawn in the graphic.
+    tweet_layout : Optional[TweetLayout], optional
+        Layout with the username already wrapped and split into runs per font, by default None (wrapped here, drawn with `font_header` only)
 
     Returns
     -------
@@ -134,7 +195,10 @@ def __draw_header_with_profile_pic(
     img_height = graphic_settings["size"][1]
     profile_pic_height = graphic_settings["profile_pic_size"][1]
     profile_pic_width = graphic_settings["profile_pic_size"][0]
-    user_name = wrap(username, 19)
+    if tweet_layout is not None:
+        user_name = tweet_layout.user_name_lines
+    else:
+        user_name = wrap(username, 19)
 
     # Draw the profile picture
     wip_img.paste(profile_picture, (x, y), mask=profile_picture)
@@ -147,22 +211,30 @@ def __draw_header_with_profile_pic(
         x_header_text = int(coordinates[0] + profile_pic_width + margin)
 
     # Draw the username
-    for line in user_name:
+    for i, line in enumerate(user_name):
+        if tweet_layout is not None:
+            draw_runs(draw_interface, (x_header_text, y),
+                      tweet_layout.user_name_runs[i], tweet_layout.header_fonts, text_color)
+        else:
+            draw_interface.text(
+                (x_header_text, y),
+                line,
+                font=font_header,
+                fill=text_color
+            )
+        y += font_header.size + margin
+
+    # Draw the user tag
+    if tweet_layout is not None:
+        draw_runs(draw_interface, (x_header_text, y),
+                  tweet_layout.user_tag_runs, tweet_layout.header_fonts, text_color)
+    else:
         draw_interface.text(
             (x_header_text, y),
-            line,
+            user_tag,
             font=font_header,
             fill=text_color
         )
-        y += font_header.size + margin
-
-    # Draw the user tag
-    draw_interface.text(
-        (x_header_text, y),
-        user_tag,
-        font=font_header,
-        fill=text_color
-    )
 
     # Calculate the vertical coordinate at which to start drawing the\
     # tweet text
@@ -180,6 +252,7 @@ def __draw_header_without_profile_pic(
     coordinates: Tuple[int],
     header_height: int,
     font_header: ImageFont.FreeTypeFont,
+    tweet_layout: Optional[TweetLayout] = None
 ) -> int:
     """Draw the graphic's header: username and user tag only.
 
@@ -201,6 +274,8 @@ def __draw_header_without_profile_pic(
         Font used for the header.
     profile_picture : Image.Image
         Profile picture ready to be drawn in the graphic.
+    tweet_layout : Optional[TweetLayout], optional
+        Layout with the username already wrapped and split into runs per font, by default None (wrapped here, drawn with `font_header` only)
 
     Returns
     -------
@@ -211,20 +286,28 @@ def __draw_header_without_profile_pic(
     y = coordinates[1]
 
     username = tweet_info["user_name"]
-    user_name = wrap(username, 19)
     user_tag = tweet_info["user_tag"]
     text_color = graphic_settings["color_scheme"][1]
     margin = graphic_settings["margin_bottom"]
     profile_pic_width = graphic_settings["profile_pic_size"][0]
 
     # Draw the username
-    user_name = wrap(username, 38)
-    for line in user_name:
-        draw_interface.text((x, y), line, font=font_header, fill=text_color)
-        y += font_header.size + margin
+    if tweet_layout is not None:
+        for runs in tweet_layout.user_name_runs:
+            draw_runs(draw_interface, (x, y), runs, tweet_layout.header_fonts, text_color)
+            y += font_header.size + margin
+    else:
+        user_name = wrap(username, 38)
+        for line in user_name:
+            draw_interface.text((x, y), line, font=font_header, fill=text_color)
+            y += font_header.size + margin
 
     # Draw the user tag
-    draw_interface.text((x, y), user_tag, font=font_header, fill=text_color)
+    if tweet_layout is not None:
+        draw_runs(draw_interface, (x, y), tweet_layout.user_tag_runs,
+                  tweet_layout.header_fonts, text_color)
+    else:
+        draw_interface.text((x, y), user_tag, font=font_header, fill=text_color)
 
     # Calculate the vertical coordinate at which to start drawing the\
     # tweet text
@@ -274,84 +357,485 @@ def __get_initial_coordinates(
     return (x, y)
 
 
-def create_tweet(
+def __header_tile(
     tweet_info: TweetInfo,
     graphic_settings: GraphicSettings,
-    default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
-    save_dir: Optional[str] = "",
-) -> None:
-    """Create a tweet graphic.
+    tweet_layout: TweetLayout,
+    antialias: bool = True
+) -> Tuple[Image.Image, int]:
+    """Draw the header of a tweet (profile picture, username and user tag) on its own tile, reusing the tile already drawn for the same header and settings.
+
+    The tile has the background color and some padding around the header, so pasting it over the background gives the same pixels as drawing the header on the graphic.
 
     Parameters
     ----------
     tweet_info : TweetInfo
-        Dictionary with the necessary information about the tweet.
+        Dictionary with all the tweet's information.
     graphic_settings : GraphicSettings
-        Dictionary with the settings needed to draw the graphic.
-    default_settings_format : DefaultFormats, optional
-        Default graphic settings option chosen, by default DefaultFormats.CUSTOM.value
-    save_dir : Optional[str], optional
-        Directory in which to save the graphic., by default ""
-    """
-    # Validate the tweet info
-    t_info = validate_tweet_info(tweet_info)
-    # Use the graphic settings passed (either custom or default)
-    graphic_settings = __choose_graphic_settings(
-        tweet_info, graphic_settings, default_settings_format)
+        Validated dictionary with the graphic's settings.
+    tweet_layout : TweetLayout
+        Layout of the tweet.
+    antialias : bool, optional
+        Whether to draw antialiased text (disabled for previews), by default True
 
-    # Get the tweet info received
-    tweet_text = tweet_info["tweet_text"]
+    Returns
+    -------
+    Tuple[Image.Image, int]
+        Header tile (shared between tweets, so it must not be modified) and its padding (pixels around the header).
+    """
     user_pic = tweet_info["user_pic"]
+    # A changed profile picture is drawn again
+    pic_stamp = None
+    if user_pic != "":
+        pic_stats = stat(user_pic)
+        pic_stamp = (pic_stats.st_mtime_ns, pic_stats.st_size)
+    key = (
+        user_pic,
+        pic_stamp,
+        tweet_info["user_name"],
+        tweet_info["user_tag"],
+        repr([graphic_settings.get(setting) for setting in HEADER_SETTINGS]),
+        # The default profile picture size depends on the graphic's size
+        tuple(graphic_settings["size"]) if 0 in graphic_settings["profile_pic_size"] else None,
+        antialias,
+    )
+    if key in __header_tiles:
+        __header_tiles.move_to_end(key)
+        return __header_tiles[key]
+
+    font_header = tweet_layout.font_header
+    margin = graphic_settings["margin_bottom"]
+    header_width, header_height = tweet_layout.header_dimensions
+    # Lines are drawn one font size (plus margin) apart, so the header's\
+    # text may go further down than its measured height
+    text_bottom = len(tweet_layout.user_name_lines) * (font_header.size + margin) + \
+        tweet_layout.user_tag_size[1]
+    drawn_width, drawn_height = header_width, max(header_height, text_bottom)
+    # The layout measures a default profile picture size as zero, but the\
+    # picture (and the text next to it) are drawn relative to the\
+    # graphic's size
+    profile_pic_size = graphic_settings["profile_pic_size"]
+    if user_pic != "" and 0 in profile_pic_size:
+        img_size = graphic_settings["size"]
+        header_text_width = header_width - profile_pic_size[0] - margin
+        x_header_text = img_size[0] * 0.1 if profile_pic_size[0] == 0 else profile_pic_size[0]
+        drawn_width = max(
+            int(img_size[0] * 0.1), ceil(x_header_text + margin + header_text_width))
+        drawn_height = max(drawn_height, int(img_size[1] * 0.1))
+    padding = font_header.size
+    tile_size = (
+        int(drawn_width) + 2 * padding,
+        int(drawn_height) + 2 * padding
+    )
+
+    tile = Image.new("RGBA", tile_size, color=graphic_settings["color_scheme"][0])
+    draw = ImageDraw.Draw(tile)
+    if not antialias:
+        draw.fontmode = "1"
+    if user_pic == "":
+        __draw_header_without_profile_pic(
+            tweet_info, graphic_settings, tile, draw, (padding, padding), header_height, font_header,
+            tweet_layout)
+    else:
+        profile_pic_processed = process_pic(graphic_settings, user_pic)
+        __draw_header_with_profile_pic(
+            tweet_info, graphic_settings, tile, draw, (padding, padding), header_height, font_header, profile_pic_processed,
+            tweet_layout)
+
+    __header_tiles[key] = (tile, padding)
+    if len(__header_tiles) > HEADER_TILES_CACHE_SIZE:
+        __header_tiles.popitem(last=False)
+
+    return tile, padding
+
+
+def __draw_tweet(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings,
+    antialias: bool = True
+) -> Image.Image:
+    """Draw a tweet graphic from already validated tweet information and graphic settings.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Validated dictionary with the settings needed to draw the graphic.
+    antialias : bool, optional
+        Whether to draw antialiased text (disabled for previews), by default True
+
+    Returns
+    -------
+    Image.Image
+        The drawn tweet graphic.
+    """
     # Dimensions of the graphic
     img_size = graphic_settings["size"]
-    # Final dimensions of the profile picture
-    profile_pic_size = graphic_settings["profile_pic_size"]
     # Vertical margin in between lines
     margin_bottom = graphic_settings["margin_bottom"]
     background_color = graphic_settings["color_scheme"][0]
     text_color = graphic_settings["color_scheme"][1]
-    # Maximum number of character per line of text
-    chars_limit = graphic_settings["wrap_limit"]
 
-    # Create all the fonts needed
-    font_header, font_text = create_graphic_fonts(graphic_settings)
-
-    # Process the profile picture
-    if user_pic != "":
-        # Process the profile picture
-        profile_pic_processed = process_pic(graphic_settings, user_pic)
+    # Wrap and measure all the text (and create the fonts needed) once
+    layout = TweetLayout(tweet_info, graphic_settings)
+    font_text = layout.font_text
 
     # Dictionary with dimensions for the header and text (width, height)
-    content_dims = calculate_content_dimensions(tweet_info, graphic_settings)
+    content_dims = layout.dimensions
     header_height = content_dims["header"][1]
 
     # Create what will be the final image
     img = Image.new("RGBA", (img_size[0], img_size[1]), color=background_color)
     # Create the drawing interface
     draw = ImageDraw.Draw(img)
+    if not antialias:
+        draw.fontmode = "1"
 
     # Calculate the inital drawing coordinates for the header
     x, y = __get_initial_coordinates(graphic_settings, content_dims)
 
-    # Draw the header (and update the vertical coordinate to be where the\
-    # tweet text starts)
-    if user_pic == "":
-        y = __draw_header_without_profile_pic(
-            tweet_info, graphic_settings, img, draw, (x, y), header_height, font_header)
-    else:
-        y = __draw_header_with_profile_pic(
-            tweet_info, graphic_settings, img, draw, (x, y), header_height, font_header, profile_pic_processed)
+    # Paste the header (drawn once for all the tweets with the same one) and\
+    # update the vertical coordinate to be where the tweet text starts
+    tile, padding = __header_tile(tweet_info, graphic_settings, layout, antialias)
+    img.paste(tile, (x - padding, y - padding))
+    y += header_height + margin_bottom
 
-    # Split the tweet text into lines
-    text_wrapped = wrap(tweet_text, chars_limit)
     # Draw the tweet text
-    for line in text_wrapped:
-        draw.text((x, y), line, font=font_text, fill=text_color)
+    for runs in layout.text_runs:
+        draw_runs(draw, (x, y), runs, layout.text_fonts, text_color)
         y += font_text.size + margin_bottom
 
+    return img
+
+
+def __scale_settings(
+    graphic_settings: GraphicSettings,
+    scale: float
+) -> GraphicSettings:
+    """Scale the dimensions of validated graphic settings (graphic size, font sizes, profile picture size and margin), e.g. to draw a preview.
+
+    Parameters
+    ----------
+    graphic_settings : GraphicSettings
+        Validated graphic settings.
+    scale : float
+        Fraction of the original dimensions.
+
+    Returns
+    -------
+    GraphicSettings
+        Scaled graphic settings.
+    """
+    scaled_settings = dict(graphic_settings)
+    scaled_settings["font_size_text"] = max(
+        1, round(graphic_settings["font_size_text"] * scale))
+    scaled_settings["font_size_header"] = max(
+        1, round(graphic_settings["font_size_header"] * scale))
+    scaled_settings["size"] = [
+        max(1, round(dimension * scale)) for dimension in graphic_settings["size"]]
+    # Zero means the default profile picture size (relative to the graphic's\
+    # size), so it stays zero
+    scaled_settings["profile_pic_size"] = [
+        max(1, round(dimension * scale)) if dimension != 0 else 0
+        for dimension in graphic_settings["profile_pic_size"]]
+    scaled_settings["margin_bottom"] = graphic_settings["margin_bottom"] * scale
+
+    return scaled_settings
+
+
+def __fit_canvas(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings,
+    padding: int,
+    aspect_ratio: Optional[float] = None
+) -> GraphicSettings:
+    """Size the canvas to the measured header and text plus padding, optionally snapped to an aspect ratio (by growing the shorter side).
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Validated dictionary with the settings needed to draw the graphic.
+    padding : int
+        Space around the content (pixels).
+    aspect_ratio : Optional[float], optional
+        Width divided by height of the canvas, by default None (no fixed aspect ratio)
+
+    Returns
+    -------
+    GraphicSettings
+        Graphic settings with the fitted canvas size.
+    """
+    fitted_settings = dict(graphic_settings)
+    img_size = graphic_settings["size"]
+
+    # The default profile picture size is relative to the original canvas,\
+    # so it's resolved before the canvas changes (and before measuring)
+    if tweet_info["user_pic"] != "" and 0 in graphic_settings["profile_pic_size"]:
+        fitted_settings["profile_pic_size"] = [
+            int(img_size[0] * 0.1), int(img_size[1] * 0.1)]
+
+    content_dims = calculate_content_dimensions(tweet_info, fitted_settings)
+    header_width, header_height = content_dims["header"]
+    text_width, text_height = content_dims["text"]
+
+    # Same content box as used by `__get_initial_coordinates`
+    width = ceil(max(header_width, text_width) + 2 * padding)
+    height = ceil(header_height + text_height +
+                  graphic_settings["margin_bottom"] + 2 * padding)
+
+    if aspect_ratio is not None:
+        if width / height < aspect_ratio:
+            width = ceil(height * aspect_ratio)
+        else:
+            height = ceil(width / aspect_ratio)
+
+    fitted_settings["size"] = [max(1, width), max(1, height)]
+
+    return fitted_settings
+
+
+def __tweet_overflows(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings
+) -> bool:
+    """Check if the content of a tweet graphic overflows its canvas, by measuring it without drawing it.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Validated dictionary with the settings needed to draw the graphic.
+
+    Returns
+    -------
+    bool
+        True if the header and text don't fit in the graphic.
+    """
+    content_dims = calculate_content_dimensions(tweet_info, graphic_settings)
+    x, y = __get_initial_coordinates(graphic_settings, content_dims)
+
+    return x < 0 or y < 0
+
+
+def __preflight_tweet(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings,
+    max_lines: Optional[int] = None
+) -> PreflightReport:
+    """Lay out the content of a tweet graphic, without drawing it, and report on its lines, overflow and missing glyphs.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Validated dictionary with the settings needed to draw the graphic.
+    max_lines : Optional[int], optional
+        Maximum number of lines of tweet text allowed, by default None (no maximum)
+
+    Returns
+    -------
+    PreflightReport
+        Report on the layout of the graphic.
+    """
+    layout = TweetLayout(tweet_info, graphic_settings)
+    x, y = __get_initial_coordinates(graphic_settings, layout.dimensions)
+    all_text = tweet_info["user_name"] + tweet_info["user_tag"] + tweet_info["tweet_text"]
+    font_chain = [graphic_settings["font_family"]] + graphic_settings.get("fallback_fonts", [])
+
+    return {
+        "lines": len(layout.text_lines),
+        "overflow": x < 0 or y < 0,
+        "too_many_lines": max_lines is not None and len(layout.text_lines) > max_lines,
+        "missing_glyphs": missing_glyphs(all_text, font_chain),
+    }
+
+
+def __tweet_content(tweet_info: TweetInfo) -> List:
+    """Get everything in the tweet's information that affects its graphic (i.e., all but the tweet's name).
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+
+    Returns
+    -------
+    List
+        The tweet's content, including the last modification time of the profile picture.
+    """
+    user_pic = tweet_info["user_pic"]
+    # A profile picture changed in between batches must not be reused
+    user_pic_mtime = path.getmtime(user_pic) if user_pic != "" else None
+
+    return [
+        tweet_info["user_name"],
+        tweet_info["user_tag"],
+        user_pic,
+        user_pic_mtime,
+        tweet_info["tweet_text"]
+    ]
+
+
+def create_tweet(
+    tweet_info: TweetInfo,
+    graphic_settings: GraphicSettings,
+    default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
+    save_dir: Optional[str] = "",
+    preview: Optional[float] = None,
+    fit_to_content: bool = False,
+    padding: int = 60,
+    aspect_ratio: Optional[float] = None,
+    fallback_fonts: Optional[List[str]] = None,
+    pic_cache_dir: Optional[str] = None,
+    pic_resample: PicResample = PicResample.BICUBIC.value,
+) -> Optional[bool]:
+    """Create a tweet graphic.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with the necessary information about the tweet.
+    graphic_settings : GraphicSettings
+        Dictionary with the settings needed to draw the graphic.
+    default_settings_format : DefaultFormats, optional
+        Default graphic settings option chosen, by default DefaultFormats.CUSTOM.value
+    save_dir : Optional[str], optional
+        Directory in which to save the graphic., by default ""
+    preview : Optional[float], optional
+        If given, draw a quick preview at this fraction of the graphic's size (with aliased text and fast compression), saved as "{tweet_name}_preview.png", by default None
+    fit_to_content : bool, optional
+        Whether to size the canvas to the header and text (plus `padding`) instead of using the `size` setting, by default False
+    padding : int, optional
+        For canvases fit to their content, space around the content (pixels), by default 60
+    aspect_ratio : Optional[float], optional
+        For canvases fit to their content, width divided by height of the canvas (the shorter side grows to match it), by default None (no fixed aspect ratio)
+    fallback_fonts : Optional[List[str]], optional
+        Fonts (in order of preference) used to draw the characters the main font lacks, by default None
+    pic_cache_dir : Optional[str], optional
+        Directory in which to keep the processed (resized and cropped) profile pictures, to be reused by other processes and later runs, by default None (no disk cache)
+    pic_resample : PicResample, optional
+        Resampling filter used to resize the profile pictures, by default PicResample.BICUBIC.value
+
+    Returns
+    -------
+    Optional[bool]
+        For previews, whether the content would overflow the full-size graphic. None otherwise.
+    """
+    # Validate the tweet info
+    t_info = validate_tweet_info(tweet_info)
+    # Use the graphic settings passed (either custom or default)
+    graphic_settings = __choose_graphic_settings(
+        tweet_info, graphic_settings, default_settings_format)
+    if fallback_fonts:
+        graphic_settings = dict(
+            graphic_settings, fallback_fonts=validate_fallback_fonts(fallback_fonts))
+    if pic_cache_dir is not None:
+        graphic_settings = dict(
+            graphic_settings, pic_cache_dir=validate_pic_cache_dir(pic_cache_dir))
+    if pic_resample != PicResample.BICUBIC.value:
+        graphic_settings = dict(
+            graphic_settings, pic_resample=validate_pic_resample(pic_resample))
+    if fit_to_content:
+        padding, aspect_ratio = validate_canvas_fit(padding, aspect_ratio)
+        graphic_settings = __fit_canvas(
+            tweet_info, graphic_settings, padding, aspect_ratio)
+
+    if preview is not None:
+        scale = validate_preview_scale(preview)
+        overflow = __tweet_overflows(tweet_info, graphic_settings)
+
+        img = __draw_tweet(
+            tweet_info, __scale_settings(graphic_settings, scale), antialias=False)
+        save_name = f"{tweet_info['tweet_name']}_preview.png"
+        save_name = path.join(save_dir, save_name)
+        save_image(img, save_name, {"compress_level": 1})
+
+        return overflow
+
+    img = __draw_tweet(tweet_info, graphic_settings)
+
     save_name = f"{tweet_info['tweet_name']}.png"
     save_name = path.join(save_dir, save_name)
-    img.save(save_name)
+    save_image(img, save_name)
+
+
+def __user_key(tweet_info: TweetInfo) -> Tuple[str, str, str]:
+    """Identify the header of a tweet: its profile picture, username and user tag.
+
+    Tweets are not validated yet when they are grouped, so missing fields count as empty.
+
+    Parameters
+    ----------
+    tweet_info : TweetInfo
+        Dictionary with all the tweet's information.
+
+    Returns
+    -------
+    Tuple[str, str, str]
+        Profile picture, username and user tag of the tweet.
+    """
+    return tuple(str(tweet_info.get(field, "")) for field in ("user_pic", "user_name", "user_tag"))
+
+
+def __tweet_jobs(
+    tweets: List[TweetInfo],
+    shared_settings: GraphicSettings,
+    preview_scale: Optional[float] = None,
+    overflows: Optional[Dict[str, bool]] = None,
+    canvas_fit: Optional[Tuple[int, Optional[float]]] = None,
+    group_by_user: bool = False
+) -> Iterator[BatchJob]:
+    """Validate each loaded tweet, resolve its graphic settings and turn it into a job for `render_batch`.
+
+    Parameters
+    ----------
+    tweets : List[TweetInfo]
+        List of `tweet_info` dictionaries.
+    shared_settings : GraphicSettings
+        Graphic settings validated by `validate_shared_g_settings`.
+    preview_scale : Optional[float], optional
+        If given, the jobs draw previews at this fraction of the graphic's size, by default None
+    overflows : Optional[Dict[str, bool]], optional
+        For previews, filled with whether each full-size graphic would overflow, by default None
+    canvas_fit : Optional[Tuple[int, Optional[float]]], optional
+        Validated padding and aspect ratio to fit each canvas to its content with, by default None (canvases of the `size` setting)
+    group_by_user : bool, optional
+        Whether to put the jobs of tweets with the same header (see `__user_key`) in the same group, by default False
+
+    Returns
+    -------
+    Iterator[BatchJob]
+        One job per tweet.
+    """
+    for tweet in tweets:
+        validate_tweet_info(tweet)
+        # Resolve the settings that depend on the tweet (profile picture)
+        g_settings = validate_tweet_g_settings(tweet, shared_settings)
+        if canvas_fit is not None:
+            g_settings = __fit_canvas(tweet, g_settings, *canvas_fit)
+
+        if preview_scale is None:
+            name = tweet["tweet_name"]
+            draw_settings = g_settings
+            args = (tweet, draw_settings)
+        else:
+            name = f"{tweet['tweet_name']}_preview"
+            draw_settings = __scale_settings(g_settings, preview_scale)
+            args = (tweet, draw_settings, False)
+            overflows[tweet["tweet_name"]] = __tweet_overflows(tweet, g_settings)
+
+        yield {
+            "name": name,
+            "content": ["tweet", __tweet_content(tweet), draw_settings, preview_scale],
+            "args": args,
+            "cost": canvas_bytes(draw_settings["size"]),
+            "group": __user_key(tweet) if group_by_user else None
+        }
 
 
 def gen_tweets_from_file(
@@ -359,28 +843,146 @@ def gen_tweets_from_file(
     graphic_settings: GraphicSettings,
     default_settings_format: DefaultFormats = DefaultFormats.CUSTOM.value,
     save_dir: Optional[str] = "",
-) -> None:
-    """Load tweets from a .json file and create a graphic for each one.
+    dedup: Optional[RenderDeduplicator] = None,
+    layout: Optional[ShardedLayout] = None,
+    archive_path: Optional[str] = None,
+    workers: int = 1,
+    memory_budget: Optional[int] = None,
+    preview: Optional[float] = None,
+    dry_run: bool = False,
+    max_lines: Optional[int] = None,
+    fit_to_content: bool = False,
+    padding: int = 60,
+    aspect_ratio: Optional[float] = None,
+    fallback_fonts: Optional[List[str]] = None,
+    pic_cache_dir: Optional[str] = None,
+    pic_resample: PicResample = PicResample.BICUBIC.value,
+    group_by_user: bool = False,
+    columns: Optional[Dict[str, str]] = None,
+    query: Optional[str] = None,
+    after_rowid: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Optional[Dict[str, Union[bool, PreflightReport]]]:
+    """Load tweets from a .json, .jsonl, .csv or .tsv file (or SQLite database) and create a graphic for each one.
+
+    JSON Lines files (one `tweet_info` object per line), CSV/TSV files and SQLite databases (one tweet per row) are read lazily, so graphics are created while the file is read.
 
     If `default_settings_format` is passed, `graphic_settings` must be an empty dictionary.
 
+    The graphic settings are validated once for the whole file; only the profile picture size is resolved for each tweet.
+
     Parameters
     ----------
     file_path : str
-        Path to the .json file with tweets.
+        Path to the .json, .jsonl, .csv or .tsv file (or to the .db, .sqlite or .sqlite3 SQLite database) with tweets.
     graphic_settings : GraphicSettings
         Dictionary of graphic settings.
     default_settings_format : DefaultFormats, optional
         Default graphic settings chosen, by default DefaultFormats.CUSTOM.value
     save_dir : Optional[str], optional
         Directory at which to save the graphic, by default ""
+    dedup : Optional[RenderDeduplicator], optional
+        Used to copy or hard-link graphics identical to ones already created instead of drawing them again, by default None
+    layout : Optional[ShardedLayout], optional
+        Layout used to shard the graphics into subdirectories of `save_dir`, by default None (all graphics directly in `save_dir`)
+    archive_path : Optional[str], optional
+        Path to a .zip or .tar archive in which to save the graphics instead of `save_dir`, by default None
+    workers : int, optional
+        Number of processes drawing graphics in parallel, by default 1
+    memory_budget : Optional[int], optional
+        Maximum memory (in bytes) for the canvases being drawn at the same time by the workers, by default None
+    preview : Optional[float], optional
+        If given, draw quick previews at this fraction of the graphics' size (see `create_tweet`), by default None
+    dry_run : bool, optional
+        Whether to only validate and lay out each tweet, without drawing or saving any graphic, by default False
+    max_lines : Optional[int], optional
+        For dry runs, maximum number of lines of tweet text a graphic may have, by default None (no maximum)
+    fit_to_content : bool, optional
+        Whether to size each canvas to its header and text (see `create_tweet`), by default False
+    padding : int, optional
+        For canvases fit to their content, space around the content (pixels), by default 60
+    aspect_ratio : Optional[float], optional
+        For canvases fit to their content, width divided by height of the canvases, by default None (no fixed aspect ratio)
+    fallback_fonts : Optional[List[str]], optional
+        Fonts (in order of preference) used to draw the characters the main font lacks, by default None
+    pic_cache_dir : Optional[str], optional
+        Directory in which to keep the processed (resized and cropped) profile pictures, to be reused by other processes and later runs, by default None (no disk cache)
+    pic_resample : PicResample, optional
+        Resampling filter used to resize the profile pictures, by default PicResample.BICUBIC.value
+    group_by_user : bool, optional
+        Whether to draw the tweets of each user (same profile picture, username and user tag) one after the other and, with several workers, in the same process, so that their profile picture is processed only once. The tweets are sorted by user first, so the whole source is loaded in memory (even .jsonl, .csv, .tsv and SQLite sources, otherwise read lazily), by default False
+    columns : Optional[Dict[str, str]], optional
+        For .csv and .tsv files and SQLite databases, mapping of `tweet_info` fields to the columns they are read from, by default None (each field from the column with its name)
+    query : Optional[str], optional
+        For SQLite databases, SELECT statement returning the tweets, by default None
+    after_rowid : Optional[int], optional
+        For SQLite databases, if given, only the tweets with a larger "rowid" column (which `query` must return) are loaded, to resume an interrupted batch, by default None
+    shard : Optional[Tuple[int, int]], optional
+        Index (from 0) and number of shards: if given, only the tweets assigned to this shard (by a stable hash of their `tweet_name`) are processed, so several machines can split the same file without coordination, by default None (all tweets)
+
+    Returns
+    -------
+    Optional[Dict[str, Union[bool, PreflightReport]]]
+        For dry runs, a mapping of each tweet name to the report on its layout (number of lines, overflow, too many lines and missing glyphs). For previews, a mapping of each tweet name to whether its content would overflow the full-size graphic. None otherwise.
     """
-    # Load the tweets from a JSON file as a list of tweet_info dictionaries
-    json_tweets = get_ready_tweets(file_path)
-
-    # Create a graphic for each quote
-    for tweet in json_tweets:
-        # Use the graphic settings passed (either custom or default)
-        g_settings = __choose_graphic_settings(
-            tweet, graphic_settings, default_settings_format)
-        create_tweet(tweet, g_settings, save_dir=save_dir)
+    # Load the tweets from the source file as tweet_info dictionaries
+    if source_format(file_path) in STREAMED_FORMATS:
+        # Read lazily, as the tweets are drawn
+        json_tweets = iter_ready_tweets(file_path, columns, query, after_rowid)
+    else:
+        json_tweets = get_ready_tweets(file_path)
+
+    # Keep only the tweets of this shard
+    if shard is not None:
+        shard = validate_shard(shard)
+        json_tweets = (
+            tweet for tweet in json_tweets if in_shard(str(tweet.get("tweet_name", "")), shard))
+
+    # Use the graphic settings passed (either custom or default), validated\
+    # only once for all tweets
+    shared_settings = __choose_shared_settings(
+        graphic_settings, default_settings_format)
+    if fallback_fonts:
+        shared_settings = dict(
+            shared_settings, fallback_fonts=validate_fallback_fonts(fallback_fonts))
+    if pic_cache_dir is not None:
+        shared_settings = dict(
+            shared_settings, pic_cache_dir=validate_pic_cache_dir(pic_cache_dir))
+    if pic_resample != PicResample.BICUBIC.value:
+        shared_settings = dict(
+            shared_settings, pic_resample=validate_pic_resample(pic_resample))
+    canvas_fit = validate_canvas_fit(padding, aspect_ratio) if fit_to_content else None
+
+    # Lay out each tweet without creating any graphic
+    if dry_run:
+        reports = {}
+        for tweet in json_tweets:
+            validate_tweet_info(tweet)
+            g_settings = validate_tweet_g_settings(tweet, shared_settings)
+            if canvas_fit is not None:
+                g_settings = __fit_canvas(tweet, g_settings, *canvas_fit)
+            reports[tweet["tweet_name"]] = __preflight_tweet(tweet, g_settings, max_lines)
+
+        return reports
+
+    if preview is None:
+        preview_scale = None
+        overflows = None
+        save_options = None
+    else:
+        preview_scale = validate_preview_scale(preview)
+        overflows = {}
+        # Fastest PNG compression for previews
+        save_options = {"compress_level": 1}
+
+    # Draw the tweets of each user together (the graphics keep their names)
+    if group_by_user:
+        json_tweets = sorted(json_tweets, key=__user_key)
+
+    # Create a graphic for each tweet
+    jobs = __tweet_jobs(
+        json_tweets, shared_settings, preview_scale, overflows, canvas_fit, group_by_user)
+    sink = open_sink(save_dir, layout, archive_path, save_options)
+    render_batch(jobs, __draw_tweet, sink, dedup, workers, memory_budget)
+
+    return overflows
@@ -17,9 +17,13 @@ setup(
     author_email="jose.fernando.costa.1998@gmail.com",
     packages=find_namespace_packages(include=["quotespy*"]),
     install_requires=[
-        "pillow>=7.1.2",
+        "pillow>=8.0.0",
         "typing-extensions>=3.7.4.2"
     ],
+    extras_require={
+        # Faster measurement of large batches of text
+        "fast": ["numpy>=1.17"]
+    },
     python_requires=">=3.7",
     classifiers=[
         "Programming Language :: Python :: 3",
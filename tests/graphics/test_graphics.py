@@ -1,3 +1,9 @@
+import bz2
+import gzip
+import lzma
+import sqlite3
+import tarfile
+import zipfile
 from os import path
 
 import pytest
@@ -9,6 +15,13 @@ import quotespy
 import quotespy.graphics.graphics as src
 import quotespy.graphics.tools.validation as validation
 import quotespy.graphics.tools.errors as errors
+import quotespy.graphics.tools.index as index
+from quotespy.tools.batch import canvas_bytes
+from quotespy.tools.dedup import RenderDeduplicator
+import quotespy.tools.fonts as fonts
+from quotespy.tools.errors import InvalidColumnMapping, InvalidShard, InvalidSourceQuery
+from quotespy.tools.output import ShardedLayout, load_index
+from quotespy.graphics.tools.layout import balanced_wrap, fit_font_size
 
 from .data_samples import (default_settings_lyrics, default_settings_quote,
                            invalid_color_scheme_length,
@@ -186,3 +199,521 @@ def test_validate_rgba_fails(mocker, g_settings):
     with pytest.raises(errors.InvalidColorFormat):
         validation.__validate_color_scheme(
             color_scheme, error_msg_size, error_msg_format)
+
+
+@pytest.mark.parametrize("graphic_settings, default_format", [
+    (valid_custom_settings, ""),
+    ({}, "lyrics"),
+    ({}, "quote")
+])
+def test_gen_graphics_validates_settings_once(mocker, graphic_settings, default_format):
+    mocker.patch("PIL.Image.Image.save")
+    quotes = {info["title"]: info["text"] for info in valid_info_list}
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+    spy = mocker.spy(src, "validate_g_settings")
+
+    src.gen_graphics_from_file(
+        "quotes.json", graphic_settings, default_settings_format=default_format)
+
+    assert spy.call_count == 1
+    assert Image.Image.save.call_count == len(quotes)
+
+
+def test_gen_graphics_dedup(mocker, tmp_path):
+    quotes = {
+        "chorus": "Say goodbye to the silence",
+        "verse": "We can dance to the sirens",
+        "chorus 2": "Say goodbye to the silence",
+        "chorus 3": "Say goodbye to the silence",
+    }
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+    dedup = RenderDeduplicator(index_path=str(tmp_path / "dedup.json"))
+
+    src.gen_graphics_from_file(
+        "lyrics.txt", valid_custom_settings, save_dir=str(tmp_path), dedup=dedup)
+    assert (dedup.renders, dedup.renders_avoided) == (2, 2)
+    for title in quotes:
+        assert (tmp_path / f"{title}.png").is_file()
+
+    # A later batch reuses the graphics created by the first one
+    dedup = RenderDeduplicator(index_path=str(tmp_path / "dedup.json"))
+    src.gen_graphics_from_file(
+        "lyrics.txt", valid_custom_settings, save_dir=str(tmp_path), dedup=dedup)
+    assert (dedup.renders, dedup.renders_avoided) == (0, 4)
+
+
+def test_gen_graphics_dedup_overwritten(mocker, tmp_path):
+    index_path = str(tmp_path / "dedup.json")
+    sources = [{"a": "hello world"}, {"a": "goodbye"}, {"b": "hello world"}]
+    patched = mocker.patch.object(src, "get_ready_text")
+
+    for quotes in sources:
+        patched.return_value = quotes
+        dedup = RenderDeduplicator(index_path=index_path)
+        src.gen_graphics_from_file(
+            "quotes.json", valid_custom_settings, save_dir=str(tmp_path), dedup=dedup)
+
+    # a.png was overwritten with "goodbye", so "hello world" is drawn again
+    assert (dedup.renders, dedup.renders_avoided) == (1, 0)
+    assert (tmp_path / "a.png").read_bytes() != (tmp_path / "b.png").read_bytes()
+
+
+def test_create_graphic_keeps_hard_links(mocker, tmp_path):
+    mocker.patch.object(src, "get_ready_text", return_value={"a": "hello world", "b": "hello world"})
+    src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path), dedup=RenderDeduplicator())
+    linked = (tmp_path / "b.png").read_bytes()
+
+    # Drawing a.png again replaces it instead of writing through the link
+    src.create_graphic({"title": "a", "text": "goodbye"}, valid_custom_settings, save_dir=str(tmp_path))
+
+    assert (tmp_path / "b.png").read_bytes() == linked
+    assert (tmp_path / "a.png").read_bytes() != linked
+
+@pytest.mark.parametrize("archive_name", ["quotes.zip", "quotes.tar"])
+def test_gen_graphics_dedup_archive_batches(mocker, tmp_path, archive_name):
+    archive_path = str(tmp_path / archive_name)
+    patched = mocker.patch.object(src, "get_ready_text")
+    dedup = RenderDeduplicator()
+
+    # Each batch writes the archive anew, so the second one can't reuse a.png
+    for quotes in [{"a": "hello world"}, {"b": "hello world"}]:
+        patched.return_value = quotes
+        src.gen_graphics_from_file(
+            "quotes.json", valid_custom_settings, archive_path=archive_path, dedup=dedup)
+
+    assert (dedup.renders, dedup.renders_avoided) == (2, 0)
+    if archive_name.endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == ["b.png"]
+    else:
+        with tarfile.open(archive_path) as archive:
+            assert archive.getnames() == ["b.png"]
+            assert archive.getmember("b.png").isfile()
+
+@pytest.mark.parametrize("depth, fan_out, expected_path", [
+    (1, 16, path.join("d", "strange_days.png")),
+    (2, 256, path.join("0d", "56", "strange_days.png")),
+    (3, 10, path.join("5", "2", "5", "strange_days.png")),
+])
+def test_sharded_layout_path(depth, fan_out, expected_path):
+    layout = ShardedLayout(depth=depth, fan_out=fan_out)
+    assert layout.relative_path("strange_days") == expected_path
+
+
+def test_gen_graphics_sharded_layout(mocker, tmp_path):
+    quotes = {info["title"]: info["text"] for info in valid_info_list}
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+    layout = ShardedLayout(depth=2, fan_out=16)
+
+    src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path), layout=layout)
+
+    index = load_index(str(tmp_path / layout.index_name))
+    assert sorted(index) == sorted(quotes)
+    for title, graphic_path in index.items():
+        assert graphic_path == layout.relative_path(title)
+        assert (tmp_path / graphic_path).is_file()
+
+
+@pytest.mark.parametrize("size, mode, expected_bytes", [
+    ([3840, 2160], "RGBA", 33177600),
+    ([2800, 2800], "RGB", 23520000),
+    ([100, 100], "L", 10000),
+])
+def test_canvas_bytes(size, mode, expected_bytes):
+    assert canvas_bytes(size, mode) == expected_bytes
+
+
+@pytest.mark.parametrize("workers, memory_budget", [
+    (2, None),
+    (3, canvas_bytes(valid_custom_settings["size"])),
+    (2, 1),
+])
+def test_gen_graphics_parallel(mocker, tmp_path, workers, memory_budget):
+    quotes = {f"quote {i}": f"quote number {i % 3}" for i in range(8)}
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+    dedup = RenderDeduplicator()
+
+    src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path),
+        dedup=dedup, workers=workers, memory_budget=memory_budget)
+
+    assert sorted(file.name for file in tmp_path.iterdir()) == sorted(
+        f"{title}.png" for title in quotes)
+    assert (dedup.renders, dedup.renders_avoided) == (3, 5)
+
+
+def test_create_graphic_preview(mocker, tmp_path):
+    overflow = src.create_graphic(
+        valid_info, valid_custom_settings, save_dir=str(tmp_path), preview=0.25)
+
+    assert overflow == False
+    with Image.open(tmp_path / f"{valid_info['title']}_preview.png") as preview_img:
+        assert list(preview_img.size) == [700, 700]
+
+
+def test_gen_graphics_preview_overflows(mocker, tmp_path):
+    quotes = {
+        "short": "Who needs memories",
+        "long": "You don't get anything playing the part when it's insincere " * 4,
+    }
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+
+    overflows = src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path), preview=0.1)
+
+    assert overflows == {"short": False, "long": True}
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        "long_preview.png", "short_preview.png"]
+
+
+def test_fit_font_size():
+    short_fit = fit_font_size(
+        "Who needs memories", valid_custom_settings["font_family"], 200,
+        valid_custom_settings["size"], valid_custom_settings["margin_bottom"])
+    long_fit = fit_font_size(
+        "You don't get anything playing the part when it's insincere " * 4,
+        valid_custom_settings["font_family"], 200,
+        valid_custom_settings["size"], valid_custom_settings["margin_bottom"])
+
+    assert short_fit[0] > long_fit[0]
+    assert long_fit[1] > short_fit[1]
+
+
+def test_gen_graphics_auto_fit(mocker, tmp_path):
+    quotes = {
+        "short": "Who needs memories",
+        "long": "You don't get anything playing the part when it's insincere " * 4,
+    }
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+
+    overflows = src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path),
+        preview=0.1, auto_fit=True)
+
+    assert overflows == {"short": False, "long": False}
+
+
+@pytest.mark.parametrize(
+    "text, wrap_limit",
+    [
+        ("You don't get anything playing the part when it's insincere", 40),
+        ("Are you talking to me? " * 12, 35),
+        ("Who needs memories", 50),
+    ]
+)
+def test_balanced_wrap(text, wrap_limit):
+    font_family = valid_custom_settings["font_family"]
+    font = ImageFont.truetype(font_family, 100)
+    greedy_lines = wrap(text, wrap_limit)
+    balanced_lines = balanced_wrap(text, font_family, 100, wrap_limit)
+
+    # Same words, no wider lines, and no longer than one extra line
+    assert " ".join(balanced_lines).split() == text.split()
+    assert max(font.getlength(line) for line in balanced_lines) <= \
+        max(font.getlength(line) for line in greedy_lines) + 1
+    assert len(balanced_lines) <= len(greedy_lines) + 1
+
+
+@pytest.mark.parametrize("text, wrap_limit", [
+    ("one two three four-five six seven eight nine ten eleven twelve", 19),
+    ("aaaa bbbb cccc dd-ee ff gg hh ii jj kk ll mm", 14),
+    ("a supercalifragilisticexpialidocious-and-more word here", 19),
+])
+def test_balanced_wrap_keeps_text(text, wrap_limit):
+    balanced_lines = balanced_wrap(text, valid_custom_settings["font_family"], 40, wrap_limit)
+
+    assert "".join(balanced_lines).replace(" ", "") == "".join(text.split())
+    # Hyphenated words that fit a line are never broken
+    assert all(word in " ".join(balanced_lines).split()
+               for word in text.split() if len(word) <= wrap_limit)
+
+
+def test_balanced_wrap_evens_lines():
+    font_family = valid_custom_settings["font_family"]
+    font = ImageFont.truetype(font_family, 100)
+    text = "You don't get anything playing the part when it's insincere"
+    greedy_lines = wrap(text, 50)
+    balanced_lines = balanced_wrap(text, font_family, 100, 50)
+
+    def spread(lines):
+        widths = [font.getlength(line) for line in lines]
+        return max(widths) - min(widths)
+
+    assert spread(balanced_lines) < spread(greedy_lines)
+
+
+def test_create_graphic_invalid_line_breaking(mocker, tmp_path):
+    with pytest.raises(errors.InvalidLineBreaking):
+        src.create_graphic(
+            valid_info, valid_custom_settings, save_dir=str(tmp_path),
+            line_breaking="optimal")
+
+
+def test_create_graphic_paginate(mocker, tmp_path):
+    text = "You don't get anything playing the part when it's insincere. " * 20
+    graphic_info = {"title": "insincere", "text": text}
+
+    src.create_graphic(graphic_info, valid_custom_settings,
+                       save_dir=str(tmp_path), paginate=True)
+
+    pages = sorted(file.name for file in tmp_path.iterdir())
+    assert len(pages) > 1
+    assert pages == sorted(f"insincere_{page}.png" for page in range(1, len(pages) + 1))
+
+
+def test_paginate_at_sentence_ends():
+    font = ImageFont.truetype(valid_custom_settings["font_family"], 100)
+    lines = wrap("Who needs memories. " * 30, 30)
+    _, line_heights = src.__get_y_and_heights(lines, 1000, 10, font)
+
+    pages = src.__paginate(lines, line_heights, 1000, 10)
+
+    # The pages cover every line, in order, and all but the last one end a sentence
+    assert [start for start, _ in pages[1:]] == [end for _, end in pages[:-1]]
+    assert (pages[0][0], pages[-1][1]) == (0, len(lines))
+    assert all(lines[end - 1].endswith(".") for _, end in pages[:-1])
+    assert all(sum(line_heights[start:end]) - 10 <= 1000 for start, end in pages[:-1])
+
+
+def test_gen_graphics_dry_run(mocker, tmp_path):
+    quotes = {
+        "short": "Who needs memories",
+        "long": "You don't get anything playing the part when it's insincere " * 4,
+        "missing": "Who needs 一",
+    }
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+    spy = mocker.spy(src, "render_batch")
+
+    reports = src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, save_dir=str(tmp_path),
+        dry_run=True, max_lines=5)
+
+    assert spy.call_count == 0
+    assert list(tmp_path.iterdir()) == []
+    assert reports["short"] == {
+        "lines": 1, "overflow": False, "too_many_lines": False, "missing_glyphs": []}
+    assert reports["long"]["overflow"] and reports["long"]["too_many_lines"]
+    assert reports["missing"]["missing_glyphs"] == ["一"]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_text_widths(mocker, use_numpy):
+    if not use_numpy:
+        mocker.patch.object(fonts, "np", None)
+    texts = ["AVATAR Tower", "", "Who needs memories", "x", "WAVE", ""]
+    font = ImageFont.truetype(valid_custom_settings["font_family"], 100)
+    metrics = fonts.FontMetrics(valid_custom_settings["font_family"])
+
+    widths = metrics.text_widths(texts, 100)
+
+    assert len(widths) == len(texts)
+    assert widths == pytest.approx([font.getlength(text) for text in texts], abs=20)
+
+
+def test_font_coverage_matches_glyphs():
+    font_family = valid_custom_settings["font_family"]
+    font = ImageFont.truetype(font_family, 50)
+    notdef = font.getmask(fonts.NOTDEF_CHAR)
+    coverage = fonts.get_font_coverage(font_family)
+
+    assert coverage is not None
+    for code in range(33, 0x600):
+        glyph = font.getmask(chr(code))
+        drawn = (glyph.size, glyph.getbbox(), glyph.getprojection()) != \
+            (notdef.size, notdef.getbbox(), notdef.getprojection())
+        assert (code in coverage) == drawn
+
+
+def test_split_runs(mocker):
+    mocker.patch.object(fonts, "get_font_coverage", side_effect=lambda font_family: {
+        "main.ttf": frozenset(range(128)),
+        "fallback.ttf": frozenset(range(0x400)),
+    }.get(font_family))
+    font = mocker.patch.object(fonts, "load_font").return_value
+    font.getmetrics.return_value = (40, 10)
+    fonts.get_font_metrics.cache_clear()
+
+    runs = fonts.split_runs("Dvořák and Łódź", ["main.ttf", "fallback.ttf"])
+    missing = fonts.missing_glyphs("Dvořák 一", ["main.ttf", "fallback.ttf"])
+    fonts.get_font_metrics.cache_clear()
+
+    assert runs == [(0, "Dvo"), (1, "řá"), (0, "k and "), (1, "Łó"), (0, "d"), (1, "ź")]
+    assert missing == ["一"]
+
+
+def test_gen_graphics_jsonl(mocker, tmp_path):
+    source_path = tmp_path / "quotes.jsonl"
+    source_path.write_text(
+        '{"title": "chorus", "text": "Who needs memories"}\n'
+        '\n'
+        '{"title": "chorus", "text": "Who needs memories"}\n'
+        '{"title": "verse", "text": "When the night is over"}\n'
+        # Line still being written
+        '{"title": "bridge", "te', encoding="utf-8")
+    save_dir = tmp_path / "graphics"
+    save_dir.mkdir()
+
+    src.gen_graphics_from_file(str(source_path), valid_custom_settings, save_dir=str(save_dir))
+
+    assert sorted(file.name for file in save_dir.iterdir()) == [
+        "chorus 2.png", "chorus.png", "verse.png"]
+
+
+def test_jsonl_invalid_line(tmp_path):
+    source_path = tmp_path / "quotes.jsonl"
+    source_path.write_text('["chorus", "Who needs memories"]\n', encoding="utf-8")
+
+    with pytest.raises(errors.MissingGraphicInfoField):
+        src.get_ready_text(str(source_path))
+
+
+@pytest.mark.parametrize("file_name, compress", [
+    ("lyrics.txt.gz", gzip.compress),
+    ("lyrics.txt.bz2", bz2.compress),
+    ("lyrics.txt.xz", lzma.compress),
+    # Detected from the magic bytes
+    ("lyrics.txt", gzip.compress),
+])
+def test_get_ready_text_compressed(tmp_path, file_name, compress):
+    source_path = tmp_path / file_name
+    source_path.write_bytes(compress(
+        "[chorus]\nWho needs memories\n[chorus]\nWho needs memories\n".encode("utf-8")))
+
+    assert src.get_ready_text(str(source_path)) == {
+        "chorus": "Who needs memories", "chorus 2": "Who needs memories"}
+
+
+@pytest.mark.parametrize("file_name, contents, columns", [
+    ("quotes.csv", 'title,text\nchorus,"Who needs memories, anyway"\nchorus,Who needs memories\n', None),
+    ("quotes.tsv", "id\tsong\tlyric\n1\tchorus\tWho needs memories, anyway\n\n2\tchorus\tWho needs memories\n",
+     {"title": "song", "text": "lyric"}),
+])
+def test_get_ready_text_csv(tmp_path, file_name, contents, columns):
+    source_path = tmp_path / file_name
+    source_path.write_text(contents, encoding="utf-8")
+
+    assert src.get_ready_text(str(source_path), columns) == {
+        "chorus": "Who needs memories, anyway", "chorus 2": "Who needs memories"}
+
+
+@pytest.mark.parametrize("columns", [{"song": "title"}, {"title": "song"}, ["title", "text"]])
+def test_get_ready_text_csv_invalid_columns(tmp_path, columns):
+    source_path = tmp_path / "quotes.csv"
+    source_path.write_text("title,text\nchorus,Who needs memories\n", encoding="utf-8")
+
+    with pytest.raises(InvalidColumnMapping):
+        src.get_ready_text(str(source_path), columns)
+
+
+@pytest.mark.parametrize("after_rowid, expected_titles", [
+    (None, ["chorus.png", "verse.png", "chorus 2.png"]),
+    (1, ["verse.png", "chorus 2.png"]),
+])
+def test_gen_graphics_sqlite(mocker, tmp_path, after_rowid, expected_titles):
+    db_path = str(tmp_path / "quotes.db")
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("CREATE TABLE quotes (song TEXT, lyric TEXT)")
+        connection.executemany("INSERT INTO quotes VALUES (?, ?)", [
+            ("chorus", "Who needs memories"),
+            ("verse", "When the night is over"),
+            ("chorus", "Who needs memories"),
+        ])
+    connection.close()
+    # Fetch the rows in more than one batch
+    mocker.patch("quotespy.tools.utils.SQLITE_BATCH_SIZE", 2)
+    save_dir = tmp_path / "graphics"
+    save_dir.mkdir()
+
+    src.gen_graphics_from_file(
+        db_path, valid_custom_settings, save_dir=str(save_dir),
+        query="SELECT rowid, song, lyric FROM quotes", columns={"title": "song", "text": "lyric"},
+        after_rowid=after_rowid)
+
+    assert sorted(file.name for file in save_dir.iterdir()) == sorted(expected_titles)
+
+
+@pytest.mark.parametrize("query", [None, "SELECT title, text FROM missing_table"])
+def test_get_ready_text_sqlite_invalid_query(tmp_path, query):
+    db_path = str(tmp_path / "quotes.sqlite")
+    sqlite3.connect(db_path).close()
+
+    with pytest.raises(InvalidSourceQuery):
+        src.get_ready_text(db_path, query=query)
+
+
+def test_txt_index(mocker, tmp_path):
+    source_path = tmp_path / "lyrics.txt"
+    source_path.write_bytes(
+        "\ufeff[chorus]\nWho needs memories\n\n[verse]\r\nWhen the night is over 一\r\n\n"
+        "[chorus]\nWho needs memories\n".encode("utf-8"))
+    file_path = str(source_path)
+
+    entries = index.build_txt_index(file_path)
+
+    assert [title for title, _ in entries] == ["chorus", "verse", "chorus 2"]
+    assert dict(index.iter_indexed_text(file_path)) == src.get_ready_text(file_path)
+    assert list(index.iter_indexed_text(file_path, 1, 2)) == [
+        ("verse", "When the night is over 一")]
+    assert index.get_indexed_text(file_path, ["chorus 2", "bridge"]) == {
+        "chorus 2": "Who needs memories"}
+
+    # The sidecar index is reused until the file changes
+    spy = mocker.spy(index, "build_txt_index")
+    index.load_txt_index(file_path)
+    assert spy.call_count == 0
+    with open(source_path, "ab") as source_file:
+        source_file.write(b"[bridge]\nLast line\n")
+    assert index.get_indexed_text(file_path, ["bridge"]) == {"bridge": "Last line"}
+    assert spy.call_count == 1
+
+
+def test_txt_index_interrupted(mocker, tmp_path):
+    source_path = tmp_path / "lyrics.txt"
+    source_path.write_text("[chorus]\nWho needs memories\n", encoding="utf-8")
+
+    def interrupted_dump(index_contents, index_file, **kwargs):
+        index_file.write('{"size": ')
+        raise KeyboardInterrupt
+
+    mocker.patch.object(index.json, "dump", side_effect=interrupted_dump)
+    with pytest.raises(KeyboardInterrupt):
+        index.build_txt_index(str(source_path))
+
+    # No truncated index is left for `load_txt_index` to trust
+    assert not (tmp_path / f"lyrics.txt{index.INDEX_EXTENSION}").exists()
+
+def test_txt_index_invalid_source(tmp_path):
+    source_path = tmp_path / "lyrics.txt.gz"
+    source_path.write_bytes(gzip.compress(b"[chorus]\nWho needs memories\n"))
+
+    with pytest.raises(errors.InvalidIndexSource):
+        index.build_txt_index(str(source_path))
+
+
+def test_gen_graphics_shard(mocker):
+    quotes = {f"quote {i}": f"quote number {i}" for i in range(20)}
+    mocker.patch.object(src, "get_ready_text", return_value=quotes)
+
+    shard_titles = [
+        set(src.gen_graphics_from_file(
+            "quotes.json", valid_custom_settings, dry_run=True, shard=(index, 3)))
+        for index in range(3)
+    ]
+
+    # Every quote is in exactly one shard
+    assert sorted(title for titles in shard_titles for title in titles) == sorted(quotes)
+    assert all(titles != set() for titles in shard_titles)
+    # And always the same one
+    assert set(src.gen_graphics_from_file(
+        "quotes.json", valid_custom_settings, dry_run=True, shard=(1, 3))) == shard_titles[1]
+
+
+@pytest.mark.parametrize("shard", [(3, 3), (-1, 2), (0, 0), (0.5, 2), 2, (0, 1, 2), (True, 2)])
+def test_gen_graphics_invalid_shard(mocker, shard):
+    mocker.patch.object(src, "get_ready_text", return_value={"quote": "quote"})
+
+    with pytest.raises(InvalidShard):
+        src.gen_graphics_from_file(
+            "quotes.json", valid_custom_settings, dry_run=True, shard=shard)
@@ -1,3 +1,12 @@
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+import sqlite3
+import tarfile
+import zipfile
 from os import path
 
 import pytest
@@ -6,9 +15,12 @@ from pytest_mock import mocker
 
 import quotespy
 import quotespy.tweet_graphics.tools.errors as errors
+import quotespy.tweet_graphics.tools.layout as layout
 import quotespy.tweet_graphics.tools.validation as validation
 import quotespy.tweet_graphics.tools.utils as utils
 import quotespy.tweet_graphics.tweet_graphics as src
+import quotespy.tools.batch as batch
+from quotespy.tools.dedup import RenderDeduplicator
 
 from .data_samples import (blue_mode_settings, dark_mode_settings,
                            invalid_color_scheme_length,
@@ -353,3 +365,416 @@ def test_create_graphic_fonts_text(mocker, graphic_settings):
 
     # assert font_family == font_text_family
     assert font_size == font_text_size
+
+
+@pytest.mark.parametrize("graphic_settings, default_format", [
+    (valid_custom_settings, ""),
+    ({}, "blue"),
+    ({}, "dark")
+])
+def test_gen_tweets_validates_settings_once(mocker, graphic_settings, default_format):
+    mocker.patch("PIL.Image.Image.save")
+    mocker.patch.object(src, "get_ready_tweets", return_value=valid_info_list)
+    spy = mocker.spy(src, "validate_shared_g_settings")
+
+    src.gen_tweets_from_file(
+        "tweets.json", graphic_settings, default_settings_format=default_format)
+
+    assert spy.call_count == 1
+    assert Image.Image.save.call_count == len(valid_info_list)
+
+
+@pytest.mark.parametrize("tweet_info, graphic_settings, expected_result", [
+    (valid_info_no_picture, valid_custom_settings, [0, 0]),
+    (valid_info_with_picture, valid_custom_settings, [120, 120]),
+    (valid_info_with_picture, blue_mode_settings, [0, 0])
+])
+def test_validate_tweet_g_settings(mocker, tweet_info, graphic_settings, expected_result):
+    shared_settings = validation.validate_shared_g_settings(graphic_settings)
+    settings = validation.validate_tweet_g_settings(tweet_info, shared_settings)
+    assert settings["profile_pic_size"] == expected_result
+    # The shared settings must be reusable for the next tweet
+    assert shared_settings["profile_pic_size"] == graphic_settings["profile_pic_size"]
+
+
+@pytest.mark.parametrize("archive_name", ["tweets.zip", "tweets.tar"])
+def test_gen_tweets_archive(mocker, tmp_path, archive_name):
+    # All tweets have the same content, so only the first one is drawn
+    tweets = valid_info_list + [dict(valid_info_list[0], tweet_name="test_name4")]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+    archive_path = str(tmp_path / archive_name)
+    dedup = RenderDeduplicator()
+
+    src.gen_tweets_from_file(
+        "tweets.json", {}, default_settings_format="dark",
+        archive_path=archive_path, dedup=dedup)
+
+    expected_names = [f"{tweet['tweet_name']}.png" for tweet in tweets]
+    if archive_name.endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == expected_names
+            assert archive.read("test_name4.png") == archive.read("test_name1.png")
+    else:
+        with tarfile.open(archive_path) as archive:
+            assert archive.getnames() == expected_names
+    assert list(tmp_path.iterdir()) == [tmp_path / archive_name]
+    assert dedup.renders_avoided == 3
+
+
+@pytest.mark.parametrize("tweet_info, graphic_settings, preview, expected_overflow", [
+    (valid_info_no_picture, valid_custom_settings, 0.25, False),
+    (valid_info_no_picture, dict(valid_custom_settings, size=[300, 300]), 0.5, True),
+])
+def test_create_tweet_preview(mocker, tweet_info, graphic_settings, preview, expected_overflow):
+    mocker.patch("PIL.Image.Image.save")
+    overflow = src.create_tweet(tweet_info, graphic_settings, preview=preview)
+
+    assert overflow == expected_overflow
+    save_name = f"{tweet_info['tweet_name']}_preview.png"
+    Image.Image.save.assert_called_once_with(save_name, compress_level=1)
+
+
+@pytest.mark.parametrize("preview", [0, 1.5, -0.5, "test"])
+def test_create_tweet_preview_fails(mocker, preview):
+    mocker.patch("PIL.Image.Image.save")
+    with pytest.raises(errors.InvalidPreviewScale):
+        src.create_tweet(valid_info_no_picture, valid_custom_settings, preview=preview)
+
+
+def test_gen_tweets_dry_run(mocker, tmp_path):
+    tweets = [
+        valid_info_list[0],
+        dict(valid_info_list[1], tweet_text="test " * 50),
+        dict(valid_info_list[2], tweet_text="test 一二"),
+    ]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+    spy = mocker.spy(src, "render_batch")
+
+    reports = src.gen_tweets_from_file(
+        "tweets.json", valid_custom_settings, save_dir=str(tmp_path),
+        dry_run=True, max_lines=3)
+
+    assert spy.call_count == 0
+    assert list(tmp_path.iterdir()) == []
+    assert reports["test_name1"] == {
+        "lines": 1, "overflow": False, "too_many_lines": False, "missing_glyphs": []}
+    assert reports["test_name2"]["too_many_lines"]
+    assert reports["test_name3"]["missing_glyphs"] == ["一", "二"]
+
+
+@pytest.mark.parametrize("tweet_info, graphic_settings, aspect_ratio", [
+    (valid_info_no_picture, valid_custom_settings, None),
+    (valid_info_no_picture, valid_custom_settings, 1),
+    # Default profile picture size, relative to the original canvas
+    (dict(valid_info_no_picture, user_pic=path.join(
+        path.dirname(__file__), "resources", "profile_picture.jpg")),
+     dict(valid_custom_settings, profile_pic_size=[0, 0]), 16 / 9),
+])
+def test_create_tweet_fit_to_content(mocker, tmp_path, tweet_info, graphic_settings, aspect_ratio):
+    src.create_tweet(tweet_info, graphic_settings, save_dir=str(tmp_path),
+                     fit_to_content=True, padding=30, aspect_ratio=aspect_ratio)
+
+    with Image.open(tmp_path / f"{tweet_info['tweet_name']}.png") as img:
+        width, height = img.size
+    assert width < valid_custom_settings["size"][0]
+    assert height < valid_custom_settings["size"][1]
+    if aspect_ratio is not None:
+        assert width / height == pytest.approx(aspect_ratio, abs=0.01)
+
+
+@pytest.mark.parametrize("padding, aspect_ratio", [(-1, None), (1.5, None), (10, 0), (10, "wide")])
+def test_create_tweet_fit_to_content_fails(mocker, padding, aspect_ratio):
+    mocker.patch("PIL.Image.Image.save")
+    with pytest.raises(errors.InvalidCanvasFit):
+        src.create_tweet(valid_info_no_picture, valid_custom_settings,
+                         fit_to_content=True, padding=padding, aspect_ratio=aspect_ratio)
+
+
+def test_create_tweet_wraps_text_once(mocker, tmp_path):
+    layout_wrap = mocker.spy(layout, "wrap")
+    draw_wrap = mocker.spy(src, "wrap")
+
+    src.create_tweet(valid_info_no_picture, valid_custom_settings, save_dir=str(tmp_path))
+
+    # Once for the username and once for the tweet text
+    assert layout_wrap.call_count == 2
+    assert draw_wrap.call_count == 0
+
+
+def test_tweet_layout_dimensions(mocker):
+    tweet_layout = layout.TweetLayout(valid_info_no_picture, valid_custom_settings)
+
+    assert tweet_layout.dimensions == utils.calculate_content_dimensions(
+        valid_info_no_picture, valid_custom_settings)
+    assert tweet_layout.text_lines == ["test test test"]
+    assert len(tweet_layout.text_sizes) == len(tweet_layout.text_lines)
+    with pytest.raises(AttributeError):
+        tweet_layout.extra = None
+
+
+def test_process_pic_cached(mocker, tmp_path):
+    pic_path = str(tmp_path / "profile_picture.png")
+    Image.new("RGB", (400, 300), color="red").save(pic_path)
+    utils.__load_processed_pic.cache_clear()
+    spy = mocker.spy(utils.Image, "open")
+
+    first_pic = utils.process_pic(valid_custom_settings, pic_path)
+    second_pic = utils.process_pic(valid_custom_settings, pic_path)
+    other_size_pic = utils.process_pic(
+        dict(valid_custom_settings, profile_pic_size=[60, 60]), pic_path)
+
+    assert spy.call_count == 2
+    assert first_pic is second_pic
+    assert first_pic.size == (120, 120) and other_size_pic.size == (60, 60)
+    assert first_pic.getpixel((60, 60)) == (255, 0, 0, 255)
+    assert first_pic.getpixel((0, 0))[3] == 0
+
+    # A changed picture is loaded again
+    Image.new("RGB", (400, 300), color="blue").save(pic_path)
+    os.utime(pic_path, ns=(0, 10 ** 9))
+    assert utils.process_pic(valid_custom_settings, pic_path).getpixel((60, 60)) == (0, 0, 255, 255)
+
+
+def test_process_pic_disk_cache(mocker, tmp_path):
+    pic_path = str(tmp_path / "profile_picture.png")
+    Image.new("RGB", (400, 300), color="red").save(pic_path)
+    cache_dir = validation.validate_pic_cache_dir(str(tmp_path / "cache"))
+    g_settings = dict(valid_custom_settings, pic_cache_dir=cache_dir)
+    utils.__load_processed_pic.cache_clear()
+    spy = mocker.spy(utils, "__crop_pic")
+
+    first_pic = utils.process_pic(g_settings, pic_path)
+    cached_files = os.listdir(cache_dir)
+    assert len(cached_files) == 1 and cached_files[0].endswith("_120x120_bicubic.png")
+    assert spy.call_count == 1
+
+    # A new process (empty in-memory cache) loads the processed picture\
+    # instead of cropping the source again
+    utils.__load_processed_pic.cache_clear()
+    open_spy = mocker.spy(utils.Image, "open")
+    cached_pic = utils.process_pic(g_settings, pic_path)
+
+    assert spy.call_count == 1
+    assert [call.args[0] for call in open_spy.call_args_list] == [
+        os.path.join(cache_dir, cached_files[0])]
+    assert cached_pic.mode == "RGBA"
+    assert cached_pic.tobytes() == first_pic.tobytes()
+
+
+def test_process_pic_disk_cache_grayscale(mocker, tmp_path):
+    pic_path = str(tmp_path / "profile_picture.png")
+    Image.new("L", (400, 300), color=128).save(pic_path)
+    cache_dir = validation.validate_pic_cache_dir(str(tmp_path / "cache"))
+    g_settings = dict(valid_custom_settings, pic_cache_dir=cache_dir)
+    spy = mocker.spy(utils, "__crop_pic")
+
+    # Every run after the first one loads the picture from the disk cache
+    for _ in range(3):
+        utils.__load_processed_pic.cache_clear()
+        pic = utils.process_pic(g_settings, pic_path)
+
+    assert spy.call_count == 1
+    assert pic.mode == "RGBA"
+
+def test_invalid_pic_cache_dir(tmp_path):
+    not_a_dir = tmp_path / "file.txt"
+    not_a_dir.write_text("")
+
+    with pytest.raises(errors.InvalidPicCacheDir):
+        validation.validate_pic_cache_dir(str(not_a_dir))
+    with pytest.raises(errors.InvalidPicCacheDir):
+        validation.validate_pic_cache_dir(None)
+
+
+@pytest.mark.parametrize("pic_resample", ["bicubic", "lanczos", "nearest"])
+def test_process_pic_reduced_decoding(mocker, tmp_path, pic_resample):
+    pic_path = str(tmp_path / "profile_picture.jpg")
+    Image.new("RGB", (2400, 1800), color=(200, 30, 30)).save(pic_path)
+    utils.__load_processed_pic.cache_clear()
+    resize_spy = mocker.spy(Image.Image, "resize")
+
+    pic = utils.process_pic(
+        dict(valid_custom_settings, pic_resample=pic_resample), pic_path)
+
+    # The picture was decoded at 1/8 of its size (300x225), not at full size
+    resized_pic = resize_spy.call_args[0][0]
+    assert resized_pic.size == (300, 225)
+    assert resize_spy.call_args[0][2] == utils.RESAMPLE_FILTERS[pic_resample]
+    assert pic.size == (120, 120) and pic.mode == "RGBA"
+    assert all(abs(a - b) < 10 for a, b in zip(pic.getpixel((60, 60)), (200, 30, 30, 255)))
+
+
+@pytest.mark.parametrize("pic_resample", ["cubic", 3, None])
+def test_invalid_pic_resample(pic_resample):
+    with pytest.raises(errors.InvalidPicResample):
+        validation.validate_pic_resample(pic_resample)
+
+
+def test_gen_tweets_group_by_user(mocker, tmp_path):
+    tweets = [
+        dict(valid_info_list[0], tweet_name=f"tweet {i}", user_name=f"user {i % 3}",
+             tweet_text=f"tweet number {i}")
+        for i in range(9)
+    ]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+    spy = mocker.spy(batch.ProcessPoolExecutor, "submit")
+
+    src.gen_tweets_from_file(
+        "tweets.json", valid_custom_settings, save_dir=str(tmp_path),
+        workers=2, group_by_user=True)
+
+    # One group of three tweets per user, saved with their own names
+    assert spy.call_count == 3
+    assert sorted(len(call.args[3]) for call in spy.call_args_list) == [3, 3, 3]
+    assert sorted(file.name for file in tmp_path.iterdir()) == sorted(
+        f"{tweet['tweet_name']}.png" for tweet in tweets)
+
+
+def test_gen_tweets_group_by_user_split(mocker, tmp_path):
+    tweets = [
+        dict(valid_info_list[0], tweet_name=f"tweet {i}", user_name=f"user {i % 2}",
+             tweet_text=f"tweet number {i}")
+        for i in range(10)
+    ]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+    mocker.patch.object(batch, "MAX_GROUP_JOBS", 2)
+    spy = mocker.spy(batch.ProcessPoolExecutor, "submit")
+
+    src.gen_tweets_from_file(
+        "tweets.json", valid_custom_settings, save_dir=str(tmp_path),
+        workers=2, group_by_user=True)
+
+    # Each user's five tweets are split in chunks, all sent to the same worker
+    assert spy.call_count == 6
+    user_workers = {}
+    for call in spy.call_args_list:
+        user_names = {args[0]["user_name"] for args in call.args[3]}
+        assert len(user_names) == 1
+        user_workers.setdefault(user_names.pop(), set()).add(call.args[0])
+    assert all(len(executors) == 1 for executors in user_workers.values())
+    # The two users are drawn by different workers
+    assert len(set.union(*user_workers.values())) == 2
+    assert len(os.listdir(tmp_path)) == len(tweets)
+
+
+def test_header_tile_cached(mocker, tmp_path):
+    tweets = [
+        dict(valid_info_list[0], tweet_name=f"tweet {i}", tweet_text=f"tweet number {i}")
+        for i in range(3)
+    ]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+    src.__header_tiles.clear()
+    spy = mocker.spy(src, "__draw_header_without_profile_pic")
+
+    src.gen_tweets_from_file("tweets.json", valid_custom_settings, save_dir=str(tmp_path))
+    # The preview header (different settings) is drawn again
+    src.create_tweet(tweets[0], valid_custom_settings, save_dir=str(tmp_path), preview=0.5)
+
+    assert spy.call_count == 2
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+@pytest.mark.parametrize("graphic_settings", [
+    (blue_mode_settings_returned),
+    (dark_mode_settings_returned),
+    (light_mode_settings_returned)
+])
+def test_header_tile_default_pic_size(tmp_path, graphic_settings):
+    pic_path = str(tmp_path / "pic.png")
+    Image.new("RGB", (400, 400), color="red").save(pic_path)
+    tweet_info = dict(
+        valid_info_with_picture, user_pic=pic_path, user_name="Some User Name That")
+    src.__header_tiles.clear()
+
+    tiled = src.__draw_tweet(tweet_info, graphic_settings)
+
+    # Draw the same tweet with the header drawn straight on the graphic
+    tweet_layout = layout.TweetLayout(tweet_info, graphic_settings)
+    margin = graphic_settings["margin_bottom"]
+    direct = Image.new("RGBA", graphic_settings["size"], color=graphic_settings["color_scheme"][0])
+    draw = ImageDraw.Draw(direct)
+    x, y = src.__get_initial_coordinates(graphic_settings, tweet_layout.dimensions)
+    y = src.__draw_header_with_profile_pic(
+        tweet_info, graphic_settings, direct, draw, (x, y), tweet_layout.header_dimensions[1],
+        tweet_layout.font_header, utils.process_pic(graphic_settings, pic_path), tweet_layout)
+    for runs in tweet_layout.text_runs:
+        src.draw_runs(draw, (x, y), runs, tweet_layout.text_fonts, graphic_settings["color_scheme"][1])
+        y += tweet_layout.font_text.size + margin
+
+    assert tiled.convert("RGB").tobytes() == direct.convert("RGB").tobytes()
+
+def test_gen_tweets_jsonl(tmp_path):
+    source_path = tmp_path / "tweets.jsonl"
+    with open(source_path, "w", encoding="utf-8") as source_file:
+        for tweet in valid_info_list:
+            source_file.write(json.dumps(tweet) + "\n")
+
+    reports = src.gen_tweets_from_file(str(source_path), valid_custom_settings, dry_run=True)
+
+    assert list(reports) == [tweet["tweet_name"] for tweet in valid_info_list]
+    assert utils.get_ready_tweets(str(source_path)) == valid_info_list
+
+
+@pytest.mark.parametrize("file_name, compress", [
+    ("tweets.json.gz", gzip.compress),
+    ("tweets.jsonl.bz2", bz2.compress),
+    ("tweets.json.xz", lzma.compress),
+    # Detected from the magic bytes
+    ("tweets.json", lzma.compress),
+])
+def test_get_ready_tweets_compressed(tmp_path, file_name, compress):
+    if ".jsonl" in file_name:
+        contents = "".join(json.dumps(tweet) + "\n" for tweet in valid_info_list)
+    else:
+        contents = json.dumps(valid_info_list)
+    source_path = tmp_path / file_name
+    source_path.write_bytes(compress(contents.encode("utf-8")))
+
+    assert utils.get_ready_tweets(str(source_path)) == valid_info_list
+
+
+def test_gen_tweets_csv(mocker, tmp_path):
+    source_path = tmp_path / "tweets.csv"
+    with open(source_path, "w", encoding="utf-8", newline="") as source_file:
+        writer = csv.writer(source_file)
+        writer.writerow(["id", "name", "handle", "picture", "body"])
+        for tweet in valid_info_list:
+            writer.writerow([tweet["tweet_name"], tweet["user_name"], tweet["user_tag"],
+                             tweet["user_pic"], tweet["tweet_text"]])
+    columns = {"tweet_name": "id", "user_name": "name", "user_tag": "handle",
+               "user_pic": "picture", "tweet_text": "body"}
+
+    reports = src.gen_tweets_from_file(
+        str(source_path), valid_custom_settings, dry_run=True, columns=columns)
+
+    assert list(reports) == [tweet["tweet_name"] for tweet in valid_info_list]
+    assert utils.get_ready_tweets(str(source_path), columns) == valid_info_list
+
+
+def test_get_ready_tweets_sqlite(tmp_path):
+    db_path = str(tmp_path / "tweets.sqlite3")
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE tweets (tweet_name, user_name, user_tag, user_pic, tweet_text)")
+        connection.executemany(
+            "INSERT INTO tweets VALUES (:tweet_name, :user_name, :user_tag, :user_pic, :tweet_text)",
+            valid_info_list)
+    connection.close()
+
+    assert utils.get_ready_tweets(db_path, query="SELECT * FROM tweets") == valid_info_list
+    assert utils.get_ready_tweets(
+        db_path, query="SELECT rowid, * FROM tweets", after_rowid=2) == valid_info_list[2:]
+
+
+def test_gen_tweets_shard(mocker):
+    tweets = [dict(valid_info_list[0], tweet_name=f"tweet {i}") for i in range(20)]
+    mocker.patch.object(src, "get_ready_tweets", return_value=tweets)
+
+    shard_names = [
+        list(src.gen_tweets_from_file(
+            "tweets.json", valid_custom_settings, dry_run=True, shard=(index, 2)))
+        for index in range(2)
+    ]
+
+    assert sorted(shard_names[0] + shard_names[1]) == sorted(tweet["tweet_name"] for tweet in tweets)
+    assert set(shard_names[0]).isdisjoint(shard_names[1])